@@ -3,22 +3,56 @@ from importlib import import_module
 from typing import Any, Optional
 
 from flask import Flask, render_template, request
-from flask_apscheduler import APScheduler
 from flask_login import LoginManager, current_user
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
+from .tenancy import TenantSession
+
 # Extensões globais
-db = SQLAlchemy()
-migrate = Migrate()
+# Sessões roteadas por tenant via schema_translate_map (ver app/tenancy.py)
+db = SQLAlchemy(session_options={"class_": TenantSession})
 login_manager = LoginManager()
-# Scheduler global
-scheduler = APScheduler()
 
 # Optional service reference for error logging; may remain None in some envs
 log_service: Optional[Any] = None
 
 
+# Extensões pesadas criadas sob demanda (``from app import migrate``):
+# Flask-Migrate puxa Alembic/Mako e APScheduler só é necessário quando o
+# scheduler sobe, então nenhum dos dois entra no cold start de CLI/testes.
+def _make_migrate():
+    from flask_migrate import Migrate
+
+    return Migrate()
+
+
+def _make_scheduler():
+    from flask_apscheduler import APScheduler
+
+    return APScheduler()
+
+
+_LAZY_EXTENSIONS = {"migrate": _make_migrate, "scheduler": _make_scheduler}
+
+
+def __getattr__(name: str):
+    factory = _LAZY_EXTENSIONS.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = factory()
+    return value
+
+
+def _loaded_by_cli_command() -> bool:
+    """App carregado por `flask <comando>` que não seja `flask run`."""
+    if os.environ.get("FLASK_RUN_FROM_CLI") != "true":
+        return False
+    import click
+
+    ctx = click.get_current_context(silent=True)
+    return not (ctx is not None and ctx.command.name == "run")
+
+
 def create_app(_config_name: str | None = None) -> Flask:
     """Application Factory.
 
@@ -78,10 +112,28 @@ def create_app(_config_name: str | None = None) -> Flask:
     except OSError:
         pass
 
+    # Métricas Prometheus (opcional): pool instrumentado antes do engine
+    from .services import metrics_service
+
+    metrics_service.configure_engine_options(app)
+
     # Inicializar extensões
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Flask-Migrate: registrado sob demanda pelo grupo `flask db` (cli.py)
     login_manager.init_app(app)
+    metrics_service.init_app(app)
+
+    # Tenant da requisição (g.tenant_schema), antes de qualquer consulta
+    @app.before_request
+    def _resolve_tenant():  # pragma: no cover - thin wrapper
+        from .services import tenant_service
+
+        tenant_service.resolve_request_tenant()
+
+    # Contagem de consultas por requisição / Server-Timing / N+1
+    from .utils import query_stats
+
+    query_stats.init_app(app)
 
     # Registrar comandos de CLI (ex.: dev-sync-db)
     try:
@@ -98,38 +150,36 @@ def create_app(_config_name: str | None = None) -> Flask:
 
     # Inicializar APScheduler (evitar reconfigurar quando já estiver em exec.)
     try:
-        _underlying = getattr(scheduler, "_scheduler", None)
+        _underlying = getattr(globals().get("scheduler"), "_scheduler", None)
         state = getattr(_underlying, "state", None)
         is_running = bool(_underlying and state not in (None, 0))
     except Exception:
         is_running = False
 
+    # Evitar iniciar durante testes, em comandos de CLI (flask db, --help...)
+    # e evitar duplicação no reloader
+    should_start_scheduler = (
+        (not app.testing)
+        and not _loaded_by_cli_command()
+        and (os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug)
+    )
     # Respeitar flag DISABLE_SCHEDULER para testes E2E
     if os.environ.get("DISABLE_SCHEDULER") == "1":
         app.logger.info("Scheduler desabilitado (DISABLE_SCHEDULER=1)")
-    elif not is_running:
+    elif should_start_scheduler and not is_running:
+        # Import do APScheduler só quando o scheduler de fato sobe
+        from . import scheduler
+
         scheduler.init_app(app)
-        # Evitar iniciar durante testes e evitar duplicação no reloader
-        should_start_scheduler = (not app.testing) and (
-            os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug
-        )
-        if should_start_scheduler:
-            scheduler.start()
+        scheduler.start()
+        metrics_service.instrument_scheduler(scheduler)
 
-        # Importar log_service e registrar job de purge
-        # (apenas se scheduler ativo)
-        try:
-            from .services import log_service as _ls  # type: ignore
-        except Exception:  # pragma: no cover - defensive import
-            _ls = None  # type: ignore
-        if _ls is not None and hasattr(_ls, "purge_old_logs"):
-            scheduler.add_job(
-                id="purge_dev_logs",
-                func=_ls.purge_old_logs,
-                trigger="interval",
-                days=1,
-                replace_existing=True,
-            )
+        # Jobs de manutenção (retenção, relatório, preços, feriados):
+        # todo processo agenda, mas cada disparo roda uma vez no cluster
+        # (advisory lock + histórico em JobRun; ver jobs_service)
+        from .services import jobs_service
+
+        jobs_service.agendar_jobs(scheduler, app)
 
     # Registro de Blueprints (se existirem)
     import logging
@@ -148,6 +198,7 @@ def create_app(_config_name: str | None = None) -> Flask:
         ("app.blueprints.admin_templates_bp", "admin_templates_bp"),
         ("app.blueprints.settings_bp", "settings_bp"),
         ("app.blueprints.tratamentos_bp", "tratamentos_bp"),
+        ("app.blueprints.metrics_bp", "metrics_bp"),
     ]
     for module_name, attr_name in bp_specs:
         try:
@@ -267,9 +318,9 @@ def create_app(_config_name: str | None = None) -> Flask:
         user_id = None
         try:
             user_id = (
-                current_user.get_id()
+                current_user.id
                 if (
-                    hasattr(current_user, "get_id")
+                    hasattr(current_user, "id")
                     and current_user.is_authenticated
                 )
                 else None
@@ -321,8 +372,8 @@ def create_app(_config_name: str | None = None) -> Flask:
 def load_user(user_id: str):  # pragma: no cover - thin wrapper
     try:
         # Local import to avoid circulars at import time
-        from .models import Usuario  # type: ignore
+        from .services import tenant_service
 
-        return db.session.get(Usuario, int(user_id))
+        return tenant_service.load_login_user(user_id)
     except Exception:
         return None
@@ -1,5 +1,5 @@
-from datetime import datetime
-from decimal import Decimal
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
 
 from flask import (
     Blueprint,
@@ -9,11 +9,22 @@ from flask import (
     redirect,
     render_template,
     request,
+    send_file,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user, login_required
 
-from app.services import financeiro_service, log_service, settings_service
+from app.models import CategoriaEnum, RoleEnum, Usuario
+from app.services import (
+    caixa_service,
+    financeiro_service,
+    jobs_service,
+    log_service,
+    recebiveis_service,
+    relatorio_service,
+    settings_service,
+)
 from app.utils.decorators import admin_required
 
 admin_bp = Blueprint("admin_bp", __name__, url_prefix="/admin")
@@ -50,6 +61,141 @@ def fechar_caixa_submit():
         return redirect(url_for("admin_bp.fechar_caixa_form"))
 
 
+@admin_bp.route("/caixa/previa", methods=["GET"])
+@login_required
+@admin_required
+def fechar_caixa_previa():
+    """Fragmento HTMX: esperado por método x saldo declarado."""
+    try:
+        data_caixa = datetime.strptime(
+            request.args.get("data_caixa") or "", "%Y-%m-%d"
+        ).date()
+    except ValueError:
+        return ""
+    try:
+        saldo_apurado = Decimal(request.args.get("saldo_apurado") or "")
+    except InvalidOperation:
+        saldo_apurado = None
+    previa = caixa_service.previa_fechamento(data_caixa, saldo_apurado)
+    return render_template("admin/_caixa_previa.html", previa=previa)
+
+
+@admin_bp.route("/caixa/mensal", methods=["GET"])
+@login_required
+@admin_required
+def caixa_mensal():
+    hoje = date.today()
+    ano = request.args.get("ano", hoje.year, type=int)
+    mes = request.args.get("mes", hoje.month, type=int)
+    if not 1 <= mes <= 12:
+        abort(400)
+    resumo = caixa_service.resumo_mensal(ano, mes)
+    return render_template("admin/caixa_mensal.html", resumo=resumo)
+
+
+def _filtros_relatorio() -> dict:
+    def _mes(nome: str) -> date | None:
+        raw = request.args.get(nome) or ""
+        try:
+            return datetime.strptime(raw, "%Y-%m").date()
+        except ValueError:
+            return None
+
+    return {
+        "inicio": _mes("inicio"),
+        "fim": _mes("fim"),
+        "dentista_id": request.args.get("dentista_id", type=int),
+        "categoria": request.args.get("categoria") or None,
+    }
+
+
+@admin_bp.route("/relatorios/financeiro", methods=["GET"])
+@login_required
+@admin_required
+def relatorio_financeiro():
+    filtros = _filtros_relatorio()
+    agrupar = request.args.getlist("agrupar") or list(
+        relatorio_service.DIMENSOES
+    )
+    linhas = relatorio_service.consultar(agrupar=agrupar, **filtros)
+    dentistas = Usuario.query.filter(Usuario.role == RoleEnum.DENTISTA).all()
+    return render_template(
+        "admin/relatorio_financeiro.html",
+        linhas=linhas,
+        filtros=filtros,
+        agrupar=agrupar,
+        dentistas={d.id: d.nome_completo or d.username for d in dentistas},
+        categorias={c.name: c.value for c in CategoriaEnum},
+    )
+
+
+@admin_bp.route("/relatorios/financeiro/export.<fmt>", methods=["GET"])
+@login_required
+@admin_required
+def relatorio_financeiro_export(fmt: str):
+    linhas = relatorio_service.iter_linhas(**_filtros_relatorio())
+    if fmt == "csv":
+        return Response(
+            stream_with_context(relatorio_service.exportar_csv(linhas)),
+            mimetype="text/csv; charset=utf-8",
+            headers={
+                "Content-Disposition": (
+                    "attachment; filename=relatorio_financeiro.csv"
+                )
+            },
+        )
+    if fmt == "xlsx":
+        try:
+            arquivo = relatorio_service.exportar_xlsx(linhas)
+        except ValueError as e:
+            abort(501, description=str(e))
+        return send_file(
+            arquivo,
+            mimetype=(
+                "application/"
+                "vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            ),
+            as_attachment=True,
+            download_name="relatorio_financeiro.xlsx",
+        )
+    abort(404)
+
+
+@admin_bp.route("/relatorios/financeiro/atualizar", methods=["POST"])
+@login_required
+@admin_required
+def relatorio_financeiro_atualizar():
+    try:
+        meses = relatorio_service.atualizar_relatorio()
+        flash(f"Relatório atualizado ({meses} mês(es)).", "success")
+    except ValueError as e:
+        flash(str(e), "error")
+    return redirect(url_for("admin_bp.relatorio_financeiro"))
+
+
+@admin_bp.route("/recebiveis", methods=["GET"])
+@login_required
+@admin_required
+def recebiveis():
+    """Aging de carnês vencidos da clínica (lista para cobrança)."""
+    faixa = request.args.get("faixa") or None
+    try:
+        resultado = recebiveis_service.aging(faixa_minima=faixa)
+    except ValueError:
+        abort(400)
+    return render_template(
+        "admin/recebiveis.html", aging=resultado, faixa=faixa
+    )
+
+
+@admin_bp.route("/jobs", methods=["GET"])
+@login_required
+@admin_required
+def jobs():
+    """Jobs agendados: registro e histórico recente de execuções."""
+    return render_template("admin/jobs.html", jobs=jobs_service.resumo_jobs())
+
+
 @admin_bp.route("/configuracoes", methods=["GET"])
 @login_required
 @admin_required
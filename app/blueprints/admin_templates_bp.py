@@ -14,6 +14,7 @@ from flask_login import login_required
 
 from app import db
 from app.models import TemplateDocumento, TipoDocumento
+from app.services import servico_emissao
 from app.utils.decorators import admin_required
 
 """Admin CRUD para TemplateDocumento.
@@ -83,6 +84,7 @@ def novo():  # pragma: no cover - thin controller
         )
         db.session.add(t)
         db.session.commit()
+        servico_emissao.invalidate_templates_cache()
         flash("Template criado com sucesso.", "success")
         return redirect(url_for("admin_templates_bp.index"))
     except Exception as e:
@@ -128,6 +130,7 @@ def editar(tid: int):  # pragma: no cover - thin controller
         t.template_body = conteudo
         t.is_active = is_active
         db.session.commit()
+        servico_emissao.invalidate_templates_cache()
         flash("Template atualizado com sucesso.", "success")
         return redirect(url_for("admin_templates_bp.index"))
     except Exception as e:
@@ -146,6 +149,7 @@ def delete(tid: int):  # pragma: no cover - thin controller
     try:
         db.session.delete(t)
         db.session.commit()
+        servico_emissao.invalidate_templates_cache()
         flash("Template removido.", "success")
     except Exception as e:
         db.session.rollback()
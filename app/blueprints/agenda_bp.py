@@ -3,8 +3,8 @@ from __future__ import annotations
 from flask import Blueprint, abort, jsonify, render_template, request
 
 from .. import db
-from ..models import CalendarEvent, RoleEnum, Usuario
-from ..services import agendamento_service, holiday_service
+from ..models import CalendarEvent
+from ..services import agendamento_service, holiday_service, user_service
 from ..services.agenda_service import format_dt_iso, parse_iso_to_utc
 
 agenda_bp = Blueprint("agenda_bp", __name__)
@@ -358,22 +358,7 @@ def api_delete_event(event_id: int):
 @agenda_bp.get("/api/agenda/dentists")
 def api_list_dentists():
     """Lista dentistas ativos (bind users)."""
-    q = (
-        db.session.query(Usuario)
-        .filter(Usuario.role == RoleEnum.DENTISTA)
-        .filter(Usuario.is_active == True)  # noqa: E712
-        .order_by(Usuario.nome_completo.nullslast())
-    )
-    items = []
-    for u in q.all():
-        items.append(
-            {
-                "id": u.id,
-                "nome": u.nome_completo or u.username,
-                "color": u.color,
-            }
-        )
-    return jsonify(items)
+    return jsonify(user_service.list_dentistas_ativos())
 
 
 @agenda_bp.get("/api/agenda/partials/<path:partial_path>")
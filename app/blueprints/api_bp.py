@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import httpx
 from flask import Blueprint, render_template, request
 
 from app.utils.sanitization import sanitizar_input
@@ -20,6 +19,8 @@ def _fetch_cep_raw(cep: str) -> dict | None:
     if len(cep_clean) != 8 or not cep_clean.isdigit():
         return None
     try:
+        import httpx  # lazy: evita ~70ms no cold start de todo create_app
+
         with httpx.Client(timeout=5.0) as client:
             resp = client.get(f"{BRASIL_API_BASE}{cep_clean}")
             if resp.status_code != 200:
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
-from flask import Blueprint, Response, abort, render_template, request, url_for
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
 from flask_login import current_user, login_required
 
 from app.models import (
     Paciente,
     RoleEnum,
-    TemplateDocumento,
     TipoDocumento,
     Usuario,
 )
-from app.services import servico_emissao
+from app.services import pdf_service, servico_emissao
 
 documentos_bp = Blueprint("documentos_bp", __name__)
 
@@ -28,6 +36,46 @@ def imprimir_log(log_id: int):  # pragma: no cover - thin controller
     )
 
 
+@documentos_bp.route("/imprimir/log/<int:log_id>/pdf", methods=["POST"])
+@login_required
+def solicitar_pdf_log(log_id: int):  # pragma: no cover - thin controller
+    if not pdf_service.is_enabled():
+        return abort(404)
+    try:
+        handle = pdf_service.submit_pdf_job(log_id, base_url=request.url_root)
+    except ValueError:
+        return abort(404)
+    url_pdf = url_for("documentos_bp.baixar_pdf", handle=handle)
+    if pdf_service.get_pdf_job_status(handle) == pdf_service.JOB_DONE:
+        return redirect(url_pdf, code=303)
+    return Response("", status=202, headers={"Location": url_pdf})
+
+
+@documentos_bp.route("/imprimir/pdf/<handle>", methods=["GET"])
+@login_required
+def baixar_pdf(handle: str):  # pragma: no cover - thin controller
+    if not pdf_service.is_enabled():
+        return abort(404)
+    status = pdf_service.get_pdf_job_status(handle)
+    if status == pdf_service.JOB_PENDING:
+        return Response("", status=202, headers={"Retry-After": "1"})
+    if status == pdf_service.JOB_ERROR:
+        # Novo POST em /imprimir/log/<id>/pdf reagenda o documento
+        return Response(
+            "Falha ao gerar o PDF.", status=500, mimetype="text/plain"
+        )
+    if status != pdf_service.JOB_DONE:
+        return abort(404)
+    fh = pdf_service.open_cached_pdf(handle)
+    if fh is None:
+        return abort(404)
+    return send_file(
+        fh,
+        mimetype="application/pdf",
+        download_name=f"documento-{handle[:12]}.pdf",
+    )
+
+
 @documentos_bp.route("/documentos", methods=["GET"])
 @login_required
 def hub_documentos():  # pragma: no cover - thin controller
@@ -43,9 +91,7 @@ def hub_documentos():  # pragma: no cover - thin controller
             tipo_enum = TipoDocumento(tipo_doc_raw)
         except Exception:
             return abort(404)
-        templates = TemplateDocumento.query.filter_by(
-            tipo_doc=tipo_enum, is_active=True
-        ).all()
+        templates = servico_emissao.list_templates_ativos(tipo_enum.value)
         campos_dinamicos: list[str] = []
         if templates:
             campos_dinamicos = servico_emissao.parse_campos_dinamicos(
@@ -90,9 +136,7 @@ def form_documento(tipo_doc: str):  # pragma: no cover - thin controller
     paciente_id = request.args.get("paciente_id", type=int)
     paciente = Paciente.query.get(paciente_id) if paciente_id else None
 
-    templates = TemplateDocumento.query.filter_by(
-        tipo_doc=tipo_enum, is_active=True
-    ).all()
+    templates = servico_emissao.list_templates_ativos(tipo_enum.value)
 
     campos_dinamicos: list[str] = []
     if templates:
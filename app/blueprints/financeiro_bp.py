@@ -15,6 +15,7 @@ from app.services.financeiro_service import (
     get_plano_by_id,
     get_procedimento_by_id,
     get_saldo_plano_calculado,
+    regerar_parcelamento_saldo,
     update_plano_proposto,
 )
 from app.services.paciente_service import get_paciente_by_id
@@ -243,6 +244,32 @@ def gerar_parcelas(plano_id: int):  # pragma: no cover - thin controller
         return str(e), 400
 
 
+@financeiro_bp.route(
+    "/plano/<int:plano_id>/regerar_parcelas", methods=["POST"]
+)
+@login_required
+def regerar_parcelas(plano_id: int):  # pragma: no cover - thin controller
+    num_raw = request.form.get("num_parcelas")
+    data_raw = request.form.get("data_inicio")
+    if not num_raw or not data_raw:
+        return "Parâmetros inválidos.", 400
+    try:
+        from datetime import date
+
+        regerar_parcelamento_saldo(
+            plano_id=plano_id,
+            num_parcelas=int(str(num_raw)),
+            data_inicio=date.fromisoformat(str(data_raw)),
+            usuario_id=getattr(current_user, "id", 0),
+        )
+        lista = get_carne_detalhado(plano_id)
+        return render_template(
+            "pacientes/financeiro/_carne_view.html", lista_retorno=lista
+        )
+    except Exception as e:  # noqa: BLE001 - retornar erro ao cliente
+        return str(e), 400
+
+
 @financeiro_bp.route("/plano/<int:plano_id>/carne_view", methods=["GET"])
 @login_required
 def carne_view(plano_id: int):  # pragma: no cover - thin controller
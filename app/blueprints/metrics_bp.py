@@ -0,0 +1,28 @@
+"""Exposição de métricas Prometheus (``GET /metrics``).
+
+Responde 404 se ``METRICS_ENABLED`` estiver desligado ou sem
+``prometheus_client``. Com ``METRICS_TOKEN`` definido, exige
+``Authorization: Bearer <token>``.
+"""
+
+from __future__ import annotations
+
+import hmac
+
+from flask import Blueprint, abort, current_app, request
+
+from app.services import metrics_service
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    if not metrics_service.is_enabled(current_app):
+        abort(404)
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        auth = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth, f"Bearer {token}"):
+            abort(401)
+    return metrics_service.render_latest()
@@ -4,19 +4,23 @@ import os
 
 from flask import (
     Blueprint,
-    current_app,
+    abort,
     flash,
     redirect,
     render_template,
     request,
-    send_from_directory,
     url_for,
 )
 from flask_login import current_user, login_required
 
 from app.models import Paciente as PacienteModel
 from app.models import TimelineEvento  # noqa: F401 (kept for clarity)
-from app.services import user_preferences_service
+from app.services import (
+    media_derivatives_service,
+    storage_service,
+    timeline_service,
+    user_preferences_service,
+)
 from app.services.paciente_service import (
     create_paciente,
     get_all_pacientes,
@@ -145,14 +149,37 @@ def financeiro(paciente_id: int):
 @paciente_bp.route("/<int:paciente_id>/historico", methods=["GET"])
 @login_required
 def historico(paciente_id: int):
-    """Tela 5: Histórico (Timeline) - Stub (Passo 2.5)."""
+    """Tela 5: Histórico (Timeline) com filtros por tipo e scroll infinito."""
     paciente = get_paciente_by_id(paciente_id)
     if not paciente:
         flash("Paciente não encontrado.", "danger")
         return redirect(url_for("paciente_bp.lista"))
+    tipos = request.args.getlist("tipo")
     return render_template(
         "pacientes/historico/historico.html",
         paciente=paciente,
+        tipos=tipos,
+        tipos_disponiveis=timeline_service.list_tipos_evento(paciente_id),
+        pagina=timeline_service.list_eventos(paciente_id, tipos=tipos),
+    )
+
+
+@paciente_bp.route("/<int:paciente_id>/historico/eventos", methods=["GET"])
+@login_required
+def historico_eventos(paciente_id: int):
+    """Fragmento HTMX: próxima página do histórico (cursor ``before``)."""
+    tipos = request.args.getlist("tipo")
+    try:
+        pagina = timeline_service.list_eventos(
+            paciente_id, before=request.args.get("before"), tipos=tipos
+        )
+    except ValueError:
+        abort(400)
+    return render_template(
+        "pacientes/historico/_eventos.html",
+        paciente_id=paciente_id,
+        tipos=tipos,
+        pagina=pagina,
     )
 
 
@@ -250,9 +277,46 @@ def get_media_file(media_id: int):  # pragma: no cover - thin controller
     from app.models import MediaPaciente  # local import to avoid cycles
 
     media = MediaPaciente.query.get_or_404(media_id)
-    media_dir = os.path.join(current_app.instance_path, "media_storage")
-    # file_path is relative (e.g., "<paciente_id>/<filename>")
-    return send_from_directory(media_dir, media.file_path, as_attachment=False)
+    storage = storage_service.get_storage_service()
+    size = request.args.get("size")
+    if size:
+        # ?size=thumb|preview: derivado em cache; se ausente, agenda a
+        # geração e serve o original desta vez
+        try:
+            derivado = media_derivatives_service.get_cached_derivative(
+                media, size
+            )
+        except ValueError:
+            return abort(400)
+        if derivado:
+            return storage.send_response(
+                derivado,
+                etag=(
+                    f"{media.content_sha256}-{size}"
+                    if media.content_sha256
+                    else None
+                ),
+                mimetype=media_derivatives_service.derivative_mimetype(
+                    derivado
+                ),
+            )
+        media_derivatives_service.schedule_derivatives(media.id)
+    # file_path is relative (e.g., "media/<aa>/<sha256>.<ext>")
+    resp = storage.send_response(
+        media.file_path,
+        etag=None if size else media.content_sha256,
+        mimetype=media.content_type,
+        download_name=media.original_filename
+        or os.path.basename(media.file_path),
+    )
+    if size:
+        # Original servido no lugar do derivado: o navegador não pode
+        # guardá-lo sob a URL da miniatura (pediria o derivado de novo)
+        resp.cache_control.no_store = True
+        resp.cache_control.no_cache = None
+        resp.cache_control.max_age = None
+        resp.headers.pop("ETag", None)
+    return resp
 
 
 @paciente_bp.route("/buscar", methods=["GET"])
@@ -12,6 +12,7 @@ from flask import (
     Blueprint,
     Response,
     abort,
+    current_app,
     flash,
     redirect,
     render_template,
@@ -30,6 +31,7 @@ from app.services import (
     storage_service,
     theme_service,
     user_preferences_service,
+    user_service,
 )
 from app.utils.decorators import admin_required
 
@@ -309,6 +311,7 @@ def usuario_update_color():
             raise ValueError("Usuário não encontrado.")
         user.color = color if color else None
         db.session.commit()
+        user_service.invalidate_usuarios_cache()
         flash("Cor do profissional atualizada!", "success")
     except Exception as e:
         db.session.rollback()
@@ -375,6 +378,7 @@ def admin_criar_usuario():
         novo_usuario = Usuario(**user_kwargs)  # type: ignore[call-arg]
         db.session.add(novo_usuario)
         db.session.commit()
+        user_service.invalidate_usuarios_cache()
 
         flash(f"Usuário '{username}' criado com sucesso!", "success")
     except ValueError as e:
@@ -402,6 +406,7 @@ def admin_desativar_usuario(user_id: int):
 
         user.is_active = False
         db.session.commit()
+        user_service.invalidate_usuarios_cache()
         flash(f"Usuário '{user.username}' desativado.", "success")
     except ValueError as e:
         db.session.rollback()
@@ -447,6 +452,38 @@ def purge_devlogs():
     return ("", 204, {"HX-Redirect": url_for("settings_bp.devlogs")})
 
 
+@settings_bp.route("/admin/queries", methods=["GET"])
+@login_required
+@admin_required
+def query_stats_panel():
+    """Painel dev: consultas SQL por endpoint e suspeitas de N+1."""
+    from app.utils import query_stats
+
+    if not query_stats.is_enabled(current_app):
+        abort(404)
+    endpoints = sorted(
+        query_stats.get_endpoint_stats().items(),
+        key=lambda item: item[1].avg_queries,
+        reverse=True,
+    )
+    return render_template(
+        "settings/query_stats.html",
+        endpoints=endpoints,
+        threshold=current_app.config.get("QUERY_STATS_N1_THRESHOLD", 5),
+    )
+
+
+@settings_bp.route("/admin/queries/reset", methods=["POST"])
+@login_required
+@admin_required
+def query_stats_reset():
+    """Zera o agregado do painel de consultas."""
+    from app.utils import query_stats
+
+    query_stats.reset_endpoint_stats()
+    return ("", 204, {"HX-Redirect": url_for("settings_bp.query_stats_panel")})
+
+
 # --- Configurações Globais (DEV_LOGS_ENABLED, ASSET_VERSION) ---
 
 
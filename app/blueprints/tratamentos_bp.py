@@ -9,6 +9,7 @@ Rotas:
 - /delete/<id> - Soft-delete de tratamento (apenas ADMIN)
 - /ajustar-precos - Modal de ajuste em massa (apenas ADMIN)
 - /preview-ajuste - Preview HTMX do ajuste (apenas ADMIN)
+- /ajustar-precos/<log_id>/desfazer - Desfaz ajuste em massa (apenas ADMIN)
 """
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
@@ -53,6 +54,7 @@ def index():
         ),
         filtro_categoria=categoria,
         filtro_ativo=ativo_param,
+        ultimo_ajuste=procedimentos_service.ultimo_ajuste_desfazivel(),
     )
 
 
@@ -187,6 +189,36 @@ def ajustar_precos():
     return redirect(url_for("tratamentos_bp.index"))
 
 
+@tratamentos_bp.route(
+    "/ajustar-precos/<int:log_id>/desfazer", methods=["POST"]
+)
+@login_required
+@admin_required
+def desfazer_ajuste(log_id: int):
+    """Restaura os preços anteriores de um ajuste em massa (apenas ADMIN)."""
+    resultado = procedimentos_service.desfazer_ajuste_em_massa(
+        log_id, current_user.id
+    )
+
+    if resultado["sucesso"]:
+        msg = (
+            f"✅ Ajuste desfeito: {resultado['revertidos']} preços restaurados"
+        )
+        if resultado["ignorados"]:
+            msg += (
+                f" ({len(resultado['ignorados'])} alterados depois foram "
+                "mantidos)"
+            )
+        flash(msg, "success")
+    else:
+        flash(
+            f"❌ Erro: {resultado.get('erro', 'Erro desconhecido')}",
+            "error",
+        )
+
+    return redirect(url_for("tratamentos_bp.index"))
+
+
 @tratamentos_bp.route("/preview-ajuste", methods=["POST"])
 @login_required
 @admin_required
@@ -199,46 +231,15 @@ def preview_ajuste():
         percentual = float(request.form.get("percentual", 0))
         categoria = request.form.get("categoria") or None
 
-        # Simular ajuste (sem commit) para gerar preview
-        # ATENÇÃO: Aqui usamos a função real mas com rollback
-        # Para evitar modificar o DB, vamos buscar e calcular manualmente
-
-        from decimal import Decimal
-
-        from app.models import CategoriaEnum, Procedimento, db
-
-        # Filtro base: apenas ativos
-        query = db.session.query(Procedimento).filter_by(is_active=True)
-
-        if categoria:
-            try:
-                categoria_enum = CategoriaEnum(categoria)
-                query = query.filter_by(categoria=categoria_enum)
-            except ValueError:
-                pass  # Ignorar categoria inválida
-
-        tratamentos = query.limit(10).all()  # Apenas 10 primeiros para preview
-        total = query.count()
-
-        preview = []
-        for proc in tratamentos:
-            preco_antigo = proc.valor_padrao
-            preco_novo = preco_antigo * (1 + Decimal(percentual) / 100)
-            preco_novo = preco_novo.quantize(Decimal("0.01"))
-
-            preview.append(
-                {
-                    "nome": proc.nome,
-                    "categoria": proc.categoria.value,
-                    "preco_antigo": float(preco_antigo),
-                    "preco_novo": float(preco_novo),
-                }
-            )
+        # Calculado no servidor, sem alterar dados
+        resultado = procedimentos_service.previsualizar_ajuste(
+            percentual, categoria
+        )
 
         return render_template(
             "tratamentos/_preview_ajuste.html",
-            preview=preview,
-            total_afetados=total,
+            preview=resultado["preview"],
+            total_afetados=resultado["total_afetados"],
             percentual=percentual,
         )
 
@@ -0,0 +1,212 @@
+"""Carga em massa via ``COPY`` e snapshots de banco (dev/testes/benchmarks).
+
+- ``copy_rows``: grava linhas com ``COPY ... FROM STDIN`` (API de cópia do
+  psycopg 3) na conexão/transação da sessão atual. Não passa pelo ORM (os
+  listeners de auditoria não rodam); ``default=`` escalares/callables das
+  colunas omitidas são aplicados aqui, como no ``insert()`` do Core.
+- ``reserve_ids``: reserva IDs da sequence para montar linhas filhas
+  (ex.: planos → itens) antes do COPY.
+- ``create_snapshot``/``restore_snapshot``: copiam o banco inteiro via
+  ``CREATE DATABASE ... TEMPLATE`` (cópia de arquivos no servidor, segundos
+  mesmo com milhões de linhas). Todos os schemas (public + tenants) vão
+  juntos. Conexões abertas no banco de origem/destino são encerradas: use
+  só em bancos dedicados de desenvolvimento, teste ou benchmark.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app import db
+from app.tenancy import current_schema
+
+SNAPSHOT_MARKER = "__snap_"
+_SNAPSHOT_NAME_RE = re.compile(r"^[a-z0-9_]{1,30}$")
+
+
+def qualified_name(table) -> str:
+    """Nome ``"schema"."tabela"`` (tabelas de tenant → schema atual)."""
+    schema = table.schema or current_schema()
+    return f'"{schema}"."{table.name}"'
+
+
+def _copy_value(value: Any) -> Any:
+    # SQLAlchemy persiste Enum pelo nome do membro
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, (dict, list)):
+        from psycopg.types.json import Jsonb
+
+        return Jsonb(value)
+    return value
+
+
+def copy_rows(
+    model_or_table,
+    rows: Iterable[Mapping[str, Any] | Sequence[Any]],
+    columns: Sequence[str] | None = None,
+) -> int:
+    """Grava ``rows`` via COPY na transação da sessão; retorna a contagem.
+
+    ``rows`` pode conter dicts (colunas = chaves do primeiro) ou tuplas na
+    ordem de ``columns``. O commit fica a cargo do chamador.
+    """
+    table = getattr(model_or_table, "__table__", model_or_table)
+    iterator = iter(rows)
+    try:
+        first = next(iterator)
+    except StopIteration:
+        return 0
+    as_dict = isinstance(first, Mapping)
+    if columns is None:
+        if not as_dict:
+            raise ValueError("Informe 'columns' para linhas em tupla.")
+        columns = list(first.keys())
+    unknown = [c for c in columns if c not in table.c]
+    if unknown:
+        raise ValueError(f"Colunas inexistentes em {table.name}: {unknown}")
+    defaults = [
+        col
+        for col in table.c
+        if col.name not in columns
+        and col.default is not None
+        and (col.default.is_scalar or col.default.is_callable)
+    ]
+    all_columns = list(columns) + [col.name for col in defaults]
+
+    cols_sql = ", ".join(f'"{c}"' for c in all_columns)
+    sql = f"COPY {qualified_name(table)} ({cols_sql}) FROM STDIN"
+    raw = db.session.connection().connection.driver_connection
+    count = 0
+    with raw.cursor() as cur, cur.copy(sql) as copy:
+        for row in _chain(first, iterator):
+            values = [row[c] for c in columns] if as_dict else list(row)
+            values.extend(_default_value(col) for col in defaults)
+            copy.write_row([_copy_value(v) for v in values])
+            count += 1
+    return count
+
+
+def _default_value(column) -> Any:
+    if column.default.is_callable:
+        return column.default.arg(None)
+    return column.default.arg
+
+
+def _chain(first, rest: Iterator) -> Iterator:
+    yield first
+    yield from rest
+
+
+def reserve_ids(model_or_table, count: int) -> list[int]:
+    """Reserva ``count`` valores da sequence da PK ``id``."""
+    if count <= 0:
+        return []
+    table = getattr(model_or_table, "__table__", model_or_table)
+    schema = table.schema or current_schema()
+    result = db.session.execute(
+        text(
+            "SELECT nextval(pg_get_serial_sequence(:tbl, 'id')) "
+            "FROM generate_series(1, :n)"
+        ),
+        {"tbl": f"{schema}.{table.name}", "n": count},
+    )
+    return [row[0] for row in result]
+
+
+# ----------------------------------
+# Snapshots (CREATE DATABASE ... TEMPLATE)
+# ----------------------------------
+
+
+def _url(url=None):
+    return make_url(url or db.engine.url)
+
+
+def snapshot_db_name(name: str, url=None) -> str:
+    if not _SNAPSHOT_NAME_RE.match(name or ""):
+        raise ValueError(
+            "Nome de snapshot inválido (use [a-z0-9_], até 30 caracteres)."
+        )
+    return f"{_url(url).database}{SNAPSHOT_MARKER}{name}"
+
+
+@contextmanager
+def _maintenance(url=None):
+    engine = create_engine(
+        _url(url).set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+    try:
+        with engine.connect() as conn:
+            yield conn
+    finally:
+        engine.dispose()
+
+
+def _terminate(conn, database: str) -> None:
+    conn.execute(
+        text(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE datname = :d AND pid <> pg_backend_pid()"
+        ),
+        {"d": database},
+    )
+
+
+def _release_app_connections(url=None) -> None:
+    if url is None:
+        db.session.remove()
+        db.engine.dispose()
+
+
+def list_snapshots(url=None) -> list[str]:
+    prefix = f"{_url(url).database}{SNAPSHOT_MARKER}"
+    with _maintenance(url) as conn:
+        rows = conn.execute(
+            text(
+                "SELECT datname FROM pg_database "
+                "WHERE starts_with(datname, :p) ORDER BY datname"
+            ),
+            {"p": prefix},
+        ).scalars()
+        return [name[len(prefix) :] for name in rows]
+
+
+def create_snapshot(name: str, url=None, replace: bool = False) -> str:
+    """Copia o banco atual para ``<db>__snap_<name>``."""
+    source = _url(url).database
+    target = snapshot_db_name(name, url)
+    _release_app_connections(url)
+    with _maintenance(url) as conn:
+        if replace:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{target}"'))
+        _terminate(conn, source)
+        conn.execute(text(f'CREATE DATABASE "{target}" TEMPLATE "{source}"'))
+    return target
+
+
+def restore_snapshot(name: str, url=None) -> str:
+    """Recria o banco atual a partir do snapshot (descarta o conteúdo)."""
+    database = _url(url).database
+    source = snapshot_db_name(name, url)
+    if name not in list_snapshots(url):
+        raise ValueError(f"Snapshot '{name}' não encontrado.")
+    _release_app_connections(url)
+    with _maintenance(url) as conn:
+        _terminate(conn, database)
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+        conn.execute(text(f'CREATE DATABASE "{database}" TEMPLATE "{source}"'))
+    return database
+
+
+def drop_snapshot(name: str, url=None) -> None:
+    target = snapshot_db_name(name, url)
+    with _maintenance(url) as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{target}"'))
@@ -1,4 +1,5 @@
 import click
+from flask.cli import with_appcontext
 from sqlalchemy import text
 
 from . import db
@@ -14,8 +15,8 @@ def register_cli(app):
           1) DROP SCHEMA IF EXISTS public CASCADE;
              DROP SCHEMA IF EXISTS tenant_default CASCADE;
           2) CREATE SCHEMA public; CREATE SCHEMA tenant_default;
-          3) SET LOCAL search_path TO tenant_default, public;
-          4) db.create_all();
+          3) create_all com schema_translate_map {None: tenant_default};
+          4) (tabelas public declaram schema explicitamente);
           5) Seed data: public then tenant_default.
         """
         click.echo(
@@ -45,9 +46,11 @@ def register_cli(app):
         # Etapa 3-4: Contexto + create_all()
         click.echo("[dev-sync-db] Preparando contextos e criando tabelas...")
         try:
-            # Use uma conexão dedicada para garantir o search_path correto
+            # Tabelas sem schema vão para tenant_default (sem search_path)
             with db.engine.begin() as conn:
-                conn.execute(text("SET search_path TO tenant_default, public"))
+                conn = conn.execution_options(
+                    schema_translate_map={None: "tenant_default"}
+                )
                 # Cria todas as tabelas conforme os models
                 db.metadata.create_all(bind=conn)
         except Exception as e:
@@ -106,3 +109,276 @@ def register_cli(app):
         click.echo(
             "[dev-sync-db] Banco de dados sincronizado e populado com sucesso."
         )
+
+    @app.cli.group("snapshot")
+    def snapshot_group():
+        """DEV/testes: snapshots do banco (CREATE DATABASE ... TEMPLATE).
+
+        Ex.: flask dev-sync-db && flask snapshot create seed
+             flask snapshot restore seed   # volta ao estado em segundos
+        """
+
+    @snapshot_group.command("create")
+    @click.argument("name")
+    @click.option("--replace", is_flag=True, help="Substitui se já existir.")
+    def snapshot_create(name: str, replace: bool):
+        """Copia o banco atual para um snapshot."""
+        from .bulk_loader import create_snapshot
+
+        target = create_snapshot(name, replace=replace)
+        click.echo(f"[snapshot] Criado: {target}")
+
+    @snapshot_group.command("restore")
+    @click.argument("name")
+    @click.confirmation_option(
+        prompt="O banco atual será DESCARTADO e recriado. Continuar?"
+    )
+    def snapshot_restore(name: str):
+        """Recria o banco atual a partir de um snapshot."""
+        from .bulk_loader import restore_snapshot
+
+        try:
+            database = restore_snapshot(name)
+        except ValueError as e:
+            raise click.ClickException(str(e)) from e
+        click.echo(f"[snapshot] {database} restaurado de '{name}'.")
+
+    @snapshot_group.command("list")
+    def snapshot_list():
+        """Lista os snapshots do banco atual."""
+        from .bulk_loader import list_snapshots
+
+        for name in list_snapshots():
+            click.echo(name)
+
+    @snapshot_group.command("drop")
+    @click.argument("name")
+    def snapshot_drop(name: str):
+        """Remove um snapshot."""
+        from .bulk_loader import drop_snapshot
+
+        drop_snapshot(name)
+        click.echo(f"[snapshot] Removido: {name}")
+
+    @app.cli.command("relatorio-financeiro")
+    @click.option(
+        "--completo",
+        is_flag=True,
+        help="Recalcula todos os meses (após cargas via COPY/SQL).",
+    )
+    @click.option("--tenant", default=None, help="Schema do tenant.")
+    def relatorio_financeiro_command(completo: bool, tenant: str | None):
+        """Atualiza o cubo do relatório financeiro."""
+        from .services import relatorio_service, tenant_service
+        from .tenancy import default_schema
+
+        with tenant_service.use_tenant(tenant or default_schema()):
+            try:
+                meses = relatorio_service.atualizar_relatorio(
+                    completo=completo
+                )
+            except ValueError as e:
+                raise click.ClickException(str(e))
+        click.echo(f"[relatorio-financeiro] {meses} mês(es) recalculado(s).")
+
+    @app.cli.command("retencao")
+    @click.option("--tenant", default=None, help="Schema do tenant.")
+    def retencao_command(tenant: str | None):
+        """Expurgo em lotes: devlogs, auditoria e arquivo da timeline.
+
+        Retomável: uma execução interrompida continua do último lote.
+        """
+        from .services import (
+            audit_service,
+            log_service,
+            tenant_service,
+            timeline_service,
+        )
+        from .tenancy import default_schema
+
+        def _progress(res):
+            click.echo(
+                f"[retencao] {res.chave}: {res.removidos} linha(s), "
+                f"lote {res.lotes}, id {res.cursor}/{res.limite}"
+            )
+
+        log_service.purge_old_logs(progress=_progress)
+        with tenant_service.use_tenant(tenant or default_schema()):
+            for etapa in (
+                audit_service.purgar_auditoria_antiga,
+                timeline_service.arquivar_eventos_antigos,
+            ):
+                try:
+                    res = etapa(progress=_progress)
+                except Exception as e:
+                    raise click.ClickException(str(e))
+                if res is None:
+                    click.echo(f"[retencao] {etapa.__name__}: desligado.")
+        click.echo("[retencao] Concluído.")
+
+    app.cli.add_command(_LazyMigrateGroup(app))
+
+    @app.cli.command("import-profile")
+    @click.option("--top", default=15, show_default=True)
+    @click.option(
+        "--target",
+        default=None,
+        help="Código Python a medir (padrão: create_app()).",
+    )
+    def import_profile_command(top: int, target: str | None):
+        """Tempo de import por pacote/módulo (python -X importtime)."""
+        from .utils.import_profile import DEFAULT_TARGET, profile_imports
+
+        try:
+            profile = profile_imports(target or DEFAULT_TARGET)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo(
+            f"[import-profile] {len(profile.entries)} módulos, "
+            f"{profile.total_us / 1000:.0f}ms em imports "
+            f"(processo: {profile.wall_s:.2f}s)"
+        )
+        click.echo(f"\n{'pacote':<28} {'próprio':>10} {'módulos':>8}")
+        for pkg, self_us, count in profile.by_package()[:top]:
+            click.echo(f"{pkg:<28} {self_us / 1000:>8.1f}ms {count:>8}")
+        click.echo(f"\n{'módulo (acumulado)':<48} {'tempo':>10}")
+        for entry in profile.slowest(top):
+            click.echo(
+                f"{entry.module[:48]:<48} {entry.cumulative_us / 1000:>8.1f}ms"
+            )
+
+
+@click.command("upgrade-tenants")
+@click.option(
+    "--workers",
+    "-j",
+    default=4,
+    show_default=True,
+    help="Tenants migrados em paralelo.",
+)
+@click.option("--revision", default="head", show_default=True)
+@click.option(
+    "--tenant",
+    "tenants",
+    multiple=True,
+    help="Restringe a estes schemas (repetível).",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Pula tenants já concluídos na mesma revisão.",
+)
+@click.option(
+    "--retry-failed",
+    is_flag=True,
+    help="Reexecuta apenas os tenants que falharam.",
+)
+@click.option(
+    "--skip-public",
+    is_flag=True,
+    help="Não executa o passe do schema public antes.",
+)
+@click.option(
+    "--timeout",
+    type=float,
+    default=None,
+    help="Tempo máximo (s) por tenant.",
+)
+@with_appcontext
+def upgrade_tenants_command(
+    workers, revision, tenants, resume, retry_failed, skip_public, timeout
+):
+    """Upgrade dos schemas de tenant em paralelo (retomável)."""
+    from .services import tenant_migration_service as tms
+
+    try:
+        revision = tms.resolve_revision(revision)
+    except Exception as exc:
+        raise click.ClickException(str(exc))
+    if not skip_public:
+        if tms.public_done(tms.load_state(), revision):
+            click.echo("[upgrade-tenants] Passe public já concluído.")
+        else:
+            click.echo("[upgrade-tenants] Passe public...")
+            tms.upgrade_public(revision)
+
+    alvo = list(tenants) or tms.list_active_tenants()
+    click.echo(
+        f"[upgrade-tenants] {len(alvo)} tenant(s), {workers} worker(s), "
+        f"revisão {revision}"
+    )
+
+    def _progress(done, total, result):
+        status = "ok" if result.ok else "FALHOU"
+        click.echo(
+            f"[{done}/{total}] {result.schema}: {status} "
+            f"({result.duration_s:.1f}s)"
+        )
+
+    summary = tms.upgrade_tenants(
+        alvo,
+        revision=revision,
+        workers=workers,
+        resume=resume,
+        retry_failed=retry_failed,
+        timeout=timeout,
+        progress=_progress,
+    )
+    if summary.skipped:
+        click.echo(
+            f"[upgrade-tenants] {len(summary.skipped)} tenant(s) pulado(s)."
+        )
+    if summary.failed:
+        for result in summary.failed:
+            ultima = (result.error or "").strip().splitlines()[-1:] or [""]
+            click.echo(f"  - {result.schema}: {ultima[0]}", err=True)
+        click.echo(
+            f"[upgrade-tenants] {len(summary.failed)} falha(s); estado em "
+            f"{tms.state_path()} (use --retry-failed).",
+            err=True,
+        )
+        raise SystemExit(1)
+    click.echo("[upgrade-tenants] Concluído.")
+
+
+def _register_db_upgrade_tenants() -> None:
+    """Anexa `upgrade-tenants` ao grupo `flask db` do Flask-Migrate."""
+    try:
+        from flask_migrate.cli import db as db_group
+    except Exception:  # pragma: no cover - Flask-Migrate ausente
+        return
+    if "upgrade-tenants" not in db_group.commands:
+        db_group.add_command(upgrade_tenants_command)
+
+
+class _LazyMigrateGroup(click.Group):
+    """Grupo `flask db` que só importa Flask-Migrate/Alembic quando usado.
+
+    Na primeira resolução inicializa o ``Migrate`` no app (que registra o
+    grupo real em ``app.cli``) e delega a ele o parsing e a execução.
+    """
+
+    def __init__(self, app):
+        super().__init__("db", help="Perform database migrations.")
+        self._app = app
+        self._group = None
+
+    def _load(self) -> click.Group:
+        if self._group is None:
+            from flask_migrate.cli import db as db_group
+
+            from . import migrate
+
+            migrate.init_app(self._app, db)
+            _register_db_upgrade_tenants()
+            self._group = db_group
+        return self._group
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        return self._load().make_context(info_name, args, parent, **extra)
+
+    def list_commands(self, ctx):
+        return self._load().list_commands(ctx)
+
+    def get_command(self, ctx, cmd_name):
+        return self._load().get_command(ctx, cmd_name)
@@ -21,11 +21,104 @@ class Config:
     )
 
     # Engine options recomendadas (MVCC já é nativo do Postgres)
-    # Definir search_path padrão via connect_args (multi-tenant AGENTS.MD §6)
+    # Sem search_path por conexão: o schema do tenant é aplicado pela Session
+    # via schema_translate_map (app/tenancy.py), com um único pool.
     SQLALCHEMY_ENGINE_OPTIONS = {
         "pool_pre_ping": True,
-        "connect_args": {"options": "-c search_path=tenant_default,public"},
     }
 
+    # Multi-tenant (AGENTS.MD §6)
+    TENANT_DEFAULT_SCHEMA = os.environ.get(
+        "TENANT_DEFAULT_SCHEMA", "tenant_default"
+    )
+    MULTI_TENANT_ENABLED = os.environ.get(
+        "MULTI_TENANT_ENABLED", "0"
+    ).lower() in ("1", "true", "yes")
+    TENANT_HEADER = os.environ.get("TENANT_HEADER", "X-Tenant")
+    TENANT_CACHE_TTL = int(os.environ.get("TENANT_CACHE_TTL", "60"))
+
+    # PDF no servidor (opcional; padrão continua window.print no cliente)
+    PDF_SERVER_RENDER = os.environ.get("PDF_SERVER_RENDER", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    # Processos por worker do gunicorn (cada worker tem o próprio pool)
+    PDF_WORKERS = int(os.environ.get("PDF_WORKERS", "2"))
+    # Job "pending" além disto é tratado como falha (processo morreu)
+    PDF_JOB_TIMEOUT_S = int(os.environ.get("PDF_JOB_TIMEOUT_S", "300"))
+
+    # Miniaturas/previews de mídia (pool de threads em segundo plano)
+    MEDIA_DERIVATIVE_WORKERS = int(
+        os.environ.get("MEDIA_DERIVATIVE_WORKERS", "2")
+    )
+
+    # Downloads de mídia: delega o envio ao servidor front (X-Sendfile)
+    USE_X_SENDFILE = os.environ.get("USE_X_SENDFILE", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+    # Cache de dados de referência (lru | redis | null)
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "lru")
+    CACHE_REDIS_URL = os.environ.get(
+        "CACHE_REDIS_URL", "redis://localhost:6379/0"
+    )
+    CACHE_DEFAULT_TTL = int(os.environ.get("CACHE_DEFAULT_TTL", "300"))
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "1024"))
+
+    # Contador de consultas por requisição (None = ligado só em debug/testes)
+    QUERY_STATS_ENABLED = (
+        os.environ["QUERY_STATS_ENABLED"].lower() in ("1", "true", "yes")
+        if "QUERY_STATS_ENABLED" in os.environ
+        else None
+    )
+    QUERY_STATS_SERVER_TIMING = True
+    QUERY_STATS_N1_THRESHOLD = int(
+        os.environ.get("QUERY_STATS_N1_THRESHOLD", "5")
+    )
+
+    # Métricas Prometheus em /metrics (requer prometheus_client)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+    # Relatório financeiro: intervalo do job de atualização incremental
+    RELATORIO_REFRESH_MINUTES = int(
+        os.environ.get("RELATORIO_REFRESH_MINUTES", "15")
+    )
+
+    # Telemetria (DeveloperLog): engine própria + thread escritora
+    TELEMETRY_ASYNC = os.environ.get("TELEMETRY_ASYNC", "1").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    TELEMETRY_QUEUE_SIZE = int(os.environ.get("TELEMETRY_QUEUE_SIZE", "1000"))
+    TELEMETRY_POOL_SIZE = int(os.environ.get("TELEMETRY_POOL_SIZE", "1"))
+    TELEMETRY_STATEMENT_TIMEOUT_MS = int(
+        os.environ.get("TELEMETRY_STATEMENT_TIMEOUT_MS", "5000")
+    )
+    TELEMETRY_CONNECT_TIMEOUT_S = int(
+        os.environ.get("TELEMETRY_CONNECT_TIMEOUT_S", "2")
+    )
+
+    # Retenção (job diário, expurgo em lotes por faixa de PK)
+    # 0 = desligado (auditoria e timeline são mantidas indefinidamente)
+    DEV_LOG_RETENTION_DAYS = int(
+        os.environ.get("DEV_LOG_RETENTION_DAYS", "30")
+    )
+    AUDIT_RETENTION_DAYS = int(os.environ.get("AUDIT_RETENTION_DAYS", "0"))
+    TIMELINE_ARCHIVE_DAYS = int(os.environ.get("TIMELINE_ARCHIVE_DAYS", "0"))
+    JOB_RUNS_RETENTION_DAYS = int(
+        os.environ.get("JOB_RUNS_RETENTION_DAYS", "90")
+    )
+    PURGE_BATCH_SIZE = int(os.environ.get("PURGE_BATCH_SIZE", "5000"))
+    PURGE_PAUSE_S = float(os.environ.get("PURGE_PAUSE_S", "0.1"))
+
     # Desativa o rastreamento de alterações (economiza memória)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
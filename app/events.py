@@ -187,3 +187,11 @@ def track_creates_after_flush(session, flush_context):  # type: ignore[no-redef]
             session.add_all(logs)
         finally:
             session.info["_audit_in_progress"] = False
+
+
+@event.listens_for(db.session, "after_flush")
+def mark_relatorio_pendente(session, flush_context):  # type: ignore[no-redef]
+    """Marca meses do relatório financeiro afetados pelo flush."""
+    from app.services import relatorio_service
+
+    relatorio_service.marcar_alteracoes(session)
@@ -3,15 +3,23 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from enum import Enum
 
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, ExcludeConstraint
 
 from . import db
+from .tenancy import current_schema, login_id
 
 
 # ----------------------------------
 # Developer Log (public schema)
 # ----------------------------------
 class DeveloperLog(db.Model):
+    """Um registro por fingerprint de exceção (tipo + frames normalizados).
+
+    ``timestamp`` é a primeira ocorrência; repetições só incrementam
+    ``occurrence_count``, avançam ``last_seen`` e entram em ``samples``
+    (anel limitado com o contexto das requisições mais recentes).
+    """
+
     __tablename__ = "developer_log"
     __table_args__ = {"schema": "public"}
     id = db.Column(db.Integer, primary_key=True)
@@ -20,6 +28,19 @@ class DeveloperLog(db.Model):
         nullable=False,
         default=lambda: datetime.now(timezone.utc),
     )
+    fingerprint = db.Column(db.String(40), nullable=False, unique=True)
+    occurrence_count = db.Column(
+        db.Integer, nullable=False, default=1, server_default="1"
+    )
+    last_seen = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
+    samples = db.Column(
+        JSONB, nullable=False, default=list, server_default="[]"
+    )
     error_type = db.Column(db.String(100), nullable=False)
     traceback = db.Column(db.Text, nullable=False)
     request_url = db.Column(db.String(500), nullable=True)
@@ -28,6 +49,58 @@ class DeveloperLog(db.Model):
     request_body = db.Column(db.Text, nullable=True)
 
 
+# ----------------------------------
+# Histórico de jobs agendados (public schema)
+# ----------------------------------
+class JobRun(db.Model):
+    """Uma execução de job do scheduler (ver ``jobs_service``).
+
+    Global (não por tenant): o job itera os tenants internamente.
+    """
+
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        db.Index("ix_job_runs_job_started", "job_id", "started_at"),
+        {"schema": "public"},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(100), nullable=False)
+    started_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
+    finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)
+    # running | ok | error
+    status = db.Column(db.String(20), nullable=False)
+    error = db.Column(db.Text, nullable=True)
+    hostname = db.Column(db.String(255), nullable=True)
+    pid = db.Column(db.Integer, nullable=True)
+
+
+class PurgeCheckpoint(db.Model):
+    """Último ``fim`` de lote concluído de um expurgo em andamento.
+
+    Ver ``purge_service``. Global: a chave inclui o schema do tenant, e a
+    retomada funciona em qualquer host/worker.
+    """
+
+    __tablename__ = "purge_checkpoints"
+    __table_args__ = {"schema": "public"}
+
+    schema_name = db.Column(db.String(63), primary_key=True)
+    chave = db.Column(db.String(100), primary_key=True)
+    cursor = db.Column(db.BigInteger, nullable=False)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
 # ----------------------------------
 # Configuração Global (default bind)
 # ----------------------------------
@@ -238,8 +311,9 @@ class Usuario(db.Model):
     def is_anonymous(self) -> bool:  # pragma: no cover - trivial
         return False
 
-    def get_id(self) -> str:  # pragma: no cover - trivial
-        return str(self.id)
+    def get_id(self) -> str:
+        """``<schema>:<id>``: o login vale só no tenant em que foi feito."""
+        return login_id(current_schema(), self.id)
 
     # Helpers de papel para templates
     @property
@@ -500,6 +574,60 @@ class Procedimento(db.Model):
         self.descricao = descricao
 
 
+class ProcedimentoPreco(db.Model):
+    """Preços versionados do catálogo (vigência [valid_from, valid_to)).
+
+    ``valid_to`` nulo = vigente sem data de término. A constraint de exclusão
+    impede dois preços com vigências sobrepostas para o mesmo procedimento;
+    usa ``int4range`` no lugar do inteiro para dispensar a extensão
+    btree_gist (ranges têm operador ``=`` no GiST nativo).
+    """
+
+    __tablename__ = "procedimento_precos"
+    __table_args__ = (
+        ExcludeConstraint(
+            (
+                db.text("int4range(procedimento_id, procedimento_id, '[]')"),
+                "=",
+            ),
+            (db.text("daterange(valid_from, valid_to)"), "&&"),
+            name="ex_procedimento_precos_vigencia",
+            using="gist",
+        ),
+        db.CheckConstraint(
+            "valid_to IS NULL OR valid_to > valid_from",
+            name="ck_procedimento_precos_intervalo",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    procedimento_id = db.Column(
+        db.Integer,
+        db.ForeignKey("procedimentos.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    valor = db.Column(db.Numeric(10, 2), nullable=False)
+    valid_from = db.Column(db.Date, nullable=False)
+    valid_to = db.Column(db.Date, nullable=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("usuarios.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=db.func.now(),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return (
+            f"<ProcedimentoPreco proc={self.procedimento_id} {self.valor} "
+            f"[{self.valid_from}, {self.valid_to})>"
+        )
+
+
 class PlanoTratamento(db.Model):
     __tablename__ = "planos_tratamento"
 
@@ -537,6 +665,7 @@ class PlanoTratamento(db.Model):
         db.DateTime(timezone=True),
         nullable=False,
         default=lambda: datetime.now(timezone.utc),
+        index=True,
     )
 
     paciente = db.relationship("Paciente", back_populates="planos_tratamento")
@@ -623,6 +752,7 @@ class LancamentoFinanceiro(db.Model):
         db.DateTime(timezone=True),
         nullable=False,
         server_default=db.func.now(),
+        index=True,
     )
 
     plano = db.relationship("PlanoTratamento", back_populates="lancamentos")
@@ -665,7 +795,7 @@ class ParcelaPrevista(db.Model):
     plano_id = db.Column(
         db.Integer, db.ForeignKey("planos_tratamento.id"), nullable=False
     )
-    data_vencimento = db.Column(db.Date, nullable=False)
+    data_vencimento = db.Column(db.Date, nullable=False, index=True)
     valor_previsto = db.Column(db.Numeric(10, 2), nullable=False)
     observacao = db.Column(db.String(100), nullable=True)
 
@@ -731,6 +861,7 @@ class LogAuditoria(db.Model):
         db.DateTime(timezone=True),
         nullable=False,
         default=lambda: datetime.now(timezone.utc),
+        index=True,
     )
     # Referência ao usuário do mesmo schema tenant
     user_id = db.Column(
@@ -770,10 +901,16 @@ class MediaPaciente(db.Model):
         db.ForeignKey("pacientes.id"),
         nullable=False,
     )
-    # Caminho relativo sob instance/media_storage/
-    # Ex.: "1/panoramica_2025.jpg"
+    # Caminho relativo no storage (instance/media_storage/ ou chave S3)
+    # Ex.: "media/3f/3fa9...c1.jpg" (endereçado por conteúdo) ou legado
+    # "1/panoramica_2025.jpg"
     file_path = db.Column(db.String(500), nullable=False)
     descricao = db.Column(db.String(255), nullable=True)
+    original_filename = db.Column(db.String(255), nullable=True)
+    # SHA-256 do conteúdo: o mesmo arquivo é gravado uma única vez
+    content_sha256 = db.Column(db.String(64), nullable=True, index=True)
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    content_type = db.Column(db.String(120), nullable=True)
     uploaded_at = db.Column(
         db.DateTime(timezone=True),
         nullable=False,
@@ -923,6 +1060,17 @@ class TimelineEvento(db.Model):
     """
 
     __tablename__ = "timeline_evento"
+    __table_args__ = (
+        # Paginação keyset do histórico: WHERE paciente_id = ? AND
+        # (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC.
+        # Também atende buscas só por paciente_id (prefixo).
+        db.Index(
+            "ix_timeline_evento_paciente_timestamp_id",
+            "paciente_id",
+            db.text("timestamp DESC"),
+            db.text("id DESC"),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -931,7 +1079,6 @@ class TimelineEvento(db.Model):
         db.Integer,
         db.ForeignKey("pacientes.id"),
         nullable=True,  # Agora permite NULL para eventos de sistema
-        index=True,
     )
 
     # Referência ao usuário do mesmo schema tenant
@@ -972,6 +1119,33 @@ class TimelineEvento(db.Model):
         return f"<TimelineEvento {self.id} [{self.evento_tipo}] {short}>"
 
 
+class TimelineEventoArquivo(db.Model):
+    """Eventos de timeline movidos pelo job de retenção.
+
+    Mesmas colunas de ``TimelineEvento`` (o arquivamento copia por nome,
+    preservando o id original), sem FKs: o paciente pode ser removido
+    depois sem afetar o arquivo.
+    """
+
+    __tablename__ = "timeline_evento_arquivo"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    paciente_id = db.Column(db.Integer, nullable=True, index=True)
+    usuario_id = db.Column(db.Integer, nullable=True)
+    timestamp = db.Column(db.DateTime(timezone=True), nullable=False)
+    evento_tipo = db.Column(db.String(50), nullable=False)
+    descricao = db.Column(db.Text, nullable=False)
+    evento_contexto = db.Column(
+        db.Enum(TimelineContexto, name="timeline_contexto_enum"),
+        nullable=False,
+    )
+    arquivado_em = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=db.func.now(),
+    )
+
+
 # ----------------------------------
 # Agenda/Calendário (bind dedicado)
 # ----------------------------------
@@ -1098,6 +1272,114 @@ class FechamentoCaixa(db.Model):
         server_default=db.text("'ABERTO'"),
     )
     saldo_apurado = db.Column(db.Numeric(10, 2), nullable=True)
+    # Movimento de caixa calculado no fechamento (ver caixa_service)
+    saldo_esperado = db.Column(db.Numeric(12, 2), nullable=True)
+
+    resumos = db.relationship(
+        "ResumoCaixaDiario",
+        back_populates="fechamento",
+        cascade="all, delete-orphan",
+        order_by="ResumoCaixaDiario.metodo_pagamento",
+    )
+
+    @property
+    def diferenca(self):
+        """Apurado - esperado (None se algum dos dois ausente)."""
+        if self.saldo_apurado is None or self.saldo_esperado is None:
+            return None
+        return self.saldo_apurado - self.saldo_esperado
 
     def __repr__(self) -> str:  # pragma: no cover
         return f"<FechamentoCaixa {self.data_fechamento} {self.status}>"
+
+
+class ResumoCaixaDiario(db.Model):
+    """Totais do dia por método de pagamento, gravados no fechamento.
+
+    - Estornos entram no método do lançamento original (saída do caixa).
+    - Ajustes (não estorno) ficam na linha "AJUSTE": alteram saldo de
+      planos, não dinheiro em caixa.
+    - Visões mensais leem esta tabela em vez de agregar lançamentos.
+    """
+
+    __tablename__ = "resumo_caixa_diario"
+
+    data = db.Column(
+        db.Date,
+        db.ForeignKey("fechamento_caixa.data_fechamento", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    metodo_pagamento = db.Column(db.String(50), primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    total_pagamentos = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total_estornos = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total_ajustes = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    gerado_em = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
+
+    fechamento = db.relationship("FechamentoCaixa", back_populates="resumos")
+
+    @property
+    def total_caixa(self):
+        """Movimento de caixa do método: pagamentos + estornos."""
+        return (self.total_pagamentos or 0) + (self.total_estornos or 0)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ResumoCaixaDiario {self.data} {self.metodo_pagamento}>"
+
+
+# ----------------------------------
+# Relatório Financeiro (agregados mensais)
+# ----------------------------------
+
+
+class RelatorioFinanceiroMensal(db.Model):
+    """Cubo mensal por dentista e categoria (ver relatorio_service).
+
+    - ``receita``: pagamentos e estornos lançados no mês.
+    - ``faturado``/``em_aberto``/``qtd_planos``: planos APROVADO/CONCLUIDO
+      criados no mês (saldo em aberto na última atualização).
+    - Valores de um plano são rateados entre categorias pelo peso dos
+      itens (``valor_cobrado``); ``qtd_planos`` também é rateada, então a
+      soma entre categorias dá o número real de planos.
+    """
+
+    __tablename__ = "relatorio_financeiro_mensal"
+
+    id = db.Column(db.Integer, primary_key=True)
+    mes = db.Column(db.Date, nullable=False, index=True)
+    # Sem FK: relatório sobrevive à exclusão do usuário
+    dentista_id = db.Column(db.Integer, nullable=True, index=True)
+    categoria = db.Column(db.String(50), nullable=False)
+    receita = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    faturado = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    em_aberto = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    qtd_planos = db.Column(db.Numeric(12, 4), nullable=False, default=0)
+    atualizado_em = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
+
+    @property
+    def ticket_medio(self):
+        if not self.qtd_planos:
+            return None
+        return self.faturado / self.qtd_planos
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return (
+            f"<RelatorioFinanceiroMensal {self.mes} "
+            f"d={self.dentista_id} {self.categoria}>"
+        )
+
+
+class RelatorioMesPendente(db.Model):
+    """Meses marcados para recálculo (listener em app/events.py)."""
+
+    __tablename__ = "relatorio_mes_pendente"
+
+    mes = db.Column(db.Date, primary_key=True)
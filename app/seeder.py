@@ -2,7 +2,6 @@ import importlib
 import os
 from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import text
 from werkzeug.security import generate_password_hash
 
 from app import create_app, db
@@ -33,11 +32,6 @@ def seed_public() -> None:
         # Desabilitar auditoria durante seed do schema public
         # (logs são específicos do tenant e não são necessários aqui)
         db.session.info["_audit_disabled"] = True
-        # Opcional: garantir visibilidade ao tenant_default
-        # caso haja acessos indiretos
-        db.session.execute(
-            text("SET SESSION search_path TO tenant_default, public")
-        )
 
         # Criar tenant principal (idempotente)
         existing_tenant = Tenant.query.filter_by(
@@ -82,10 +76,7 @@ def seed_public() -> None:
 def seed_tenant_default() -> None:
     print("INFO: [seed_tenant_default] Iniciando seed no tenant_default...")
     try:
-        # Garantir search_path para a sessão atual
-        db.session.execute(
-            text("SET SESSION search_path TO tenant_default, public")
-        )
+        # Tabelas de tenant são roteadas pela Session (schema_translate_map)
 
         # Usuários padrão (get_or_create): ADMIN, DENTISTA, SECRETARIA
         # SENHA PADRÃO PARA TODOS: "dev123" (desenvolvimento apenas!)
@@ -1398,10 +1389,6 @@ if __name__ == "__main__":
     cfg = os.environ.get("FLASK_CONFIG") or "default"
     app = create_app(cfg)
     with app.app_context():
-        # Assegura search_path correto
-        db.session.execute(
-            text("SET SESSION search_path TO tenant_default, public")
-        )
         # Executa seeds na ordem
         seed_public()
         seed_tenant_default()
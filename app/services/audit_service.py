@@ -3,7 +3,7 @@ Serviço de Auditoria - EchoDent
 Gerencia logs de auditoria para rastreamento de mudanças críticas.
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from flask import current_app
 from sqlalchemy import desc
@@ -193,3 +193,25 @@ def format_model_name(model_name: str) -> str:
         "lancamento_financeiro": "Lançamentos Financeiros",
     }
     return model_map.get(model_name, model_name.replace("_", " ").title())
+
+
+def purgar_auditoria_antiga(dias: int | None = None, progress=None):
+    """
+    Remove logs de auditoria com mais de ``dias`` dias (padrão
+    ``AUDIT_RETENTION_DAYS``; 0 = retenção desligada, retorna None).
+
+    Expurgo em lotes por faixa de ID (purge_service), retomável.
+    """
+    from app.services import purge_service
+
+    if dias is None:
+        dias = current_app.config.get("AUDIT_RETENTION_DAYS", 0)
+    if not dias:
+        return None
+    corte = datetime.now(timezone.utc) - timedelta(days=dias)
+    return purge_service.purgar_em_lotes(
+        LogAuditoria,
+        LogAuditoria.timestamp < corte,
+        chave="auditoria",
+        progress=progress,
+    )
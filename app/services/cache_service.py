@@ -0,0 +1,259 @@
+"""Cache de resultados para leituras de dados de referência (por tenant).
+
+- Chave: (schema do tenant, namespace, função, argumentos). O schema vem de
+  ``app.tenancy.current_schema()``, então clínicas nunca compartilham
+  entradas.
+- Backend plugável via ``CACHE_BACKEND``: ``lru`` (padrão, em processo),
+  ``redis`` (servidor local compatível com Redis; ``CACHE_REDIS_URL``) ou
+  ``null`` (desliga o cache).
+- Invalidação explícita por namespace: cada (tenant, namespace) tem um
+  contador de geração que entra na chave; ``invalidate()`` incrementa o
+  contador e as entradas antigas simplesmente deixam de ser lidas (expiram
+  por TTL/LRU). No Redis o contador é compartilhado entre processos; no LRU
+  ele é por processo e o TTL limita a defasagem entre workers.
+- Valores devem ser dados simples (dicts, tuplas, SimpleNamespace), nunca
+  instâncias ORM ligadas a uma sessão. Cada leitura devolve uma cópia
+  (como o Redis, que desserializa): mutar o resultado não afeta o cache.
+"""
+
+from __future__ import annotations
+
+import copy
+import functools
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from flask import current_app
+
+from app.services import metrics_service
+from app.tenancy import current_schema
+
+# Namespaces usados pelos services
+NS_PROCEDIMENTOS = "procedimentos"
+NS_DENTISTAS = "dentistas"
+NS_TEMPLATES_DOCUMENTO = "templates_documento"
+NS_CLINICA_INFO = "clinica_info"
+
+_EXTENSION_KEY = "echodent_cache"
+_MISSING = object()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class LRUBackend:
+    """LRU em memória com TTL por entrada (thread-safe)."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._data: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        # Cópia fora do lock: quem ordena/edita o resultado não corrompe
+        # a entrada compartilhada pelo processo
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def generation(self, ns_key: str) -> int:
+        with self._lock:
+            return self._generations.get(ns_key, 0)
+
+    def bump(self, ns_key: str) -> None:
+        with self._lock:
+            self._generations[ns_key] = self._generations.get(ns_key, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+
+
+class RedisBackend:
+    """Backend Redis (import tardio; falhas de conexão viram miss)."""
+
+    def __init__(self, url: str, prefix: str = "echodent:cache:") -> None:
+        import redis  # type: ignore
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Any:
+        try:
+            raw = self._client.get(self.prefix + key)
+        except Exception:
+            return _MISSING
+        if raw is None:
+            return _MISSING
+        return pickle.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            self._client.set(
+                self.prefix + key,
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                ex=max(1, int(ttl)),
+            )
+        except Exception:
+            pass
+
+    def generation(self, ns_key: str) -> int:
+        try:
+            raw = self._client.get(f"{self.prefix}gen:{ns_key}")
+        except Exception:
+            return 0
+        return int(raw or 0)
+
+    def bump(self, ns_key: str) -> None:
+        try:
+            self._client.incr(f"{self.prefix}gen:{ns_key}")
+        except Exception:
+            pass
+
+    def clear(self) -> None:
+        try:
+            keys = list(self._client.scan_iter(f"{self.prefix}*"))
+            if keys:
+                self._client.delete(*keys)
+        except Exception:
+            pass
+
+
+class NullBackend:
+    def get(self, key: str) -> Any:
+        return _MISSING
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        pass
+
+    def generation(self, ns_key: str) -> int:
+        return 0
+
+    def bump(self, ns_key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+class _CacheState:
+    def __init__(self, backend) -> None:
+        self.backend = backend
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self.lock = threading.Lock()
+
+
+def _build_backend(cfg):
+    kind = (cfg.get("CACHE_BACKEND") or "lru").lower()
+    if kind == "null":
+        return NullBackend()
+    if kind == "redis":
+        return RedisBackend(cfg.get("CACHE_REDIS_URL") or "redis://localhost")
+    return LRUBackend(cfg.get("CACHE_MAX_ENTRIES") or 1024)
+
+
+def _state() -> _CacheState:
+    state = current_app.extensions.get(_EXTENSION_KEY)
+    if state is None:
+        state = current_app.extensions.setdefault(
+            _EXTENSION_KEY, _CacheState(_build_backend(current_app.config))
+        )
+    return state
+
+
+def _ns_key(namespace: str, schema: str | None = None) -> str:
+    return f"{schema or current_schema()}:{namespace}"
+
+
+def make_key(namespace: str, func_name: str, args: tuple, kwargs: dict) -> str:
+    ns_key = _ns_key(namespace)
+    gen = _state().backend.generation(ns_key)
+    arg_repr = repr((args, tuple(sorted(kwargs.items()))))
+    return f"{ns_key}:g{gen}:{func_name}:{arg_repr}"
+
+
+def cached(namespace: str, ttl: float | None = None) -> Callable[[F], F]:
+    """Decorator: memoriza o retorno por (tenant, namespace, função, args)."""
+
+    def decorator(func: F) -> F:
+        func_name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            state = _state()
+            key = make_key(namespace, func_name, args, kwargs)
+            value = state.backend.get(key)
+            if value is not _MISSING:
+                with state.lock:
+                    state.hits[namespace] += 1
+                metrics_service.record_cache(namespace, True)
+                return value
+            with state.lock:
+                state.misses[namespace] += 1
+            metrics_service.record_cache(namespace, False)
+            value = func(*args, **kwargs)
+            expire = ttl
+            if expire is None:
+                expire = float(
+                    current_app.config.get("CACHE_DEFAULT_TTL") or 300
+                )
+            state.backend.set(key, value, expire)
+            return value
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def invalidate(*namespaces: str, schema: str | None = None) -> None:
+    """Invalida namespaces do tenant atual (ou do schema informado)."""
+    backend = _state().backend
+    for namespace in namespaces:
+        backend.bump(_ns_key(namespace, schema))
+
+
+def clear() -> None:
+    """Descarta todo o cache e zera as métricas."""
+    state = _state()
+    state.backend.clear()
+    with state.lock:
+        state.hits.clear()
+        state.misses.clear()
+
+
+def get_stats() -> dict[str, dict[str, float]]:
+    """Hits/misses por namespace (e taxa de acerto)."""
+    state = _state()
+    with state.lock:
+        namespaces = set(state.hits) | set(state.misses)
+        stats = {}
+        for ns in sorted(namespaces):
+            hits, misses = state.hits[ns], state.misses[ns]
+            total = hits + misses
+            stats[ns] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": (hits / total) if total else 0.0,
+            }
+    return stats
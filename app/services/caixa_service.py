@@ -0,0 +1,244 @@
+"""Motor de fechamento de caixa (totais por dia e método de pagamento).
+
+Agrega ``LancamentoFinanceiro`` por dia de ``data_lancamento`` e método em
+uma única consulta agrupada:
+
+- pagamentos entram no próprio método;
+- estornos de pagamentos (``lancamento_estornado_id``) entram no método
+  do pagamento original, como saída de caixa (valor negativo), como em
+  ``financeiro_service.valor_pago_expr``;
+- demais ajustes, inclusive estornos de ajustes, ficam na linha ``AJUSTE``
+  (não movimentam dinheiro).
+
+No fechamento (``financeiro_service.fechar_caixa_dia``) o resultado é
+persistido em ``ResumoCaixaDiario`` e o total esperado em
+``FechamentoCaixa.saldo_esperado``; a visão mensal lê esses resumos e só
+agrega lançamentos dos dias ainda abertos.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import Date, and_, case, cast, delete, inspect, literal
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import func
+
+from app import db
+from app.models import (
+    CaixaStatus,
+    FechamentoCaixa,
+    LancamentoFinanceiro,
+    ResumoCaixaDiario,
+)
+
+METODO_AJUSTE = "AJUSTE"
+_ZERO = Decimal("0.00")
+
+
+def _inicio(dia: date) -> datetime:
+    # Naive: o PostgreSQL interpreta no fuso da sessão, o mesmo usado em
+    # CAST(data_lancamento AS date) e em data_lancamento.date()
+    return datetime.combine(dia, time.min)
+
+
+def agregar_lancamentos(
+    inicio: date, fim: date, excluir_dias: set[date] | None = None
+) -> list[ResumoCaixaDiario]:
+    """Totais por (dia, método) no intervalo [inicio, fim).
+
+    Retorna instâncias transitórias de ``ResumoCaixaDiario`` (não
+    adicionadas à sessão), ordenadas por dia e método.
+    """
+    lanc = LancamentoFinanceiro
+    original = aliased(LancamentoFinanceiro)
+    tipo = LancamentoFinanceiro.LancamentoTipo
+    # Só estorno de pagamento é saída de caixa (NULL-safe: sem original)
+    eh_estorno = and_(
+        lanc.lancamento_estornado_id.isnot(None),
+        original.tipo_lancamento.is_not_distinct_from(tipo.PAGAMENTO),
+    )
+    eh_ajuste = and_(lanc.tipo_lancamento == tipo.AJUSTE, ~eh_estorno)
+
+    dia = cast(lanc.data_lancamento, Date)
+    metodo = case(
+        (
+            eh_estorno,
+            func.coalesce(original.metodo_pagamento, lanc.metodo_pagamento),
+        ),
+        (eh_ajuste, literal(METODO_AJUSTE)),
+        else_=lanc.metodo_pagamento,
+    )
+
+    def _soma(cond):
+        return func.coalesce(func.sum(case((cond, lanc.valor), else_=0)), 0)
+
+    stmt = (
+        db.select(
+            dia.label("dia"),
+            metodo.label("metodo"),
+            func.count(lanc.id),
+            _soma(lanc.tipo_lancamento == tipo.PAGAMENTO),
+            _soma(eh_estorno),
+            _soma(eh_ajuste),
+        )
+        .select_from(lanc)
+        .outerjoin(original, original.id == lanc.lancamento_estornado_id)
+        .where(
+            lanc.data_lancamento >= _inicio(inicio),
+            lanc.data_lancamento < _inicio(fim),
+        )
+        .group_by(dia, metodo)
+        .order_by(dia, metodo)
+    )
+    if excluir_dias:
+        stmt = stmt.where(dia.notin_(sorted(excluir_dias)))
+
+    return [
+        ResumoCaixaDiario(
+            data=row_dia,
+            metodo_pagamento=row_metodo,
+            quantidade=int(qtd),
+            total_pagamentos=Decimal(pag),
+            total_estornos=Decimal(est),
+            total_ajustes=Decimal(aju),
+        )
+        for row_dia, row_metodo, qtd, pag, est, aju in db.session.execute(stmt)
+    ]
+
+
+def total_esperado(linhas) -> Decimal:
+    """Movimento de caixa esperado (pagamentos + estornos)."""
+    return sum((linha.total_caixa for linha in linhas), _ZERO)
+
+
+def gravar_resumo_dia(fech: FechamentoCaixa) -> Decimal:
+    """Recalcula e persiste os resumos do dia de ``fech`` (sem commit).
+
+    Atualiza ``fech.saldo_esperado``; o commit fica a cargo do chamador
+    (mesma transação do fechamento).
+    """
+    dia = fech.data_fechamento
+    db.session.execute(
+        delete(ResumoCaixaDiario).where(ResumoCaixaDiario.data == dia)
+    )
+    if inspect(fech).persistent:
+        db.session.expire(fech, ["resumos"])
+    linhas = agregar_lancamentos(dia, dia + timedelta(days=1))
+    for linha in linhas:
+        db.session.add(linha)
+    fech.saldo_esperado = total_esperado(linhas)
+    return fech.saldo_esperado
+
+
+def previa_fechamento(
+    data_caixa: date, saldo_apurado: Decimal | None = None
+) -> SimpleNamespace:
+    """Esperado x declarado do dia (resumo gravado se o caixa já fechou)."""
+    fech = db.session.get(FechamentoCaixa, data_caixa)
+    fechado = fech is not None and fech.status == CaixaStatus.FECHADO
+    if fechado and fech.saldo_esperado is not None:
+        linhas = list(fech.resumos)
+        if saldo_apurado is None:
+            saldo_apurado = fech.saldo_apurado
+    else:
+        linhas = agregar_lancamentos(
+            data_caixa, data_caixa + timedelta(days=1)
+        )
+    esperado = total_esperado(linhas)
+    return SimpleNamespace(
+        data=data_caixa,
+        fechado=fechado,
+        linhas=linhas,
+        total_esperado=esperado,
+        total_ajustes=sum((lin.total_ajustes for lin in linhas), _ZERO),
+        saldo_apurado=saldo_apurado,
+        diferenca=(
+            None if saldo_apurado is None else saldo_apurado - esperado
+        ),
+    )
+
+
+def resumo_mensal(ano: int, mes: int) -> SimpleNamespace:
+    """Visão do mês: dias fechados vêm de ``ResumoCaixaDiario``.
+
+    Apenas dias ainda abertos são agregados a partir dos lançamentos.
+    """
+    inicio = date(ano, mes, 1)
+    fim = date(ano + (mes == 12), mes % 12 + 1, 1)
+
+    fechamentos = {
+        f.data_fechamento: f
+        for f in db.session.execute(
+            db.select(FechamentoCaixa).where(
+                FechamentoCaixa.data_fechamento >= inicio,
+                FechamentoCaixa.data_fechamento < fim,
+                FechamentoCaixa.status == CaixaStatus.FECHADO,
+                FechamentoCaixa.saldo_esperado.isnot(None),
+            )
+        ).scalars()
+    }
+    linhas = list(
+        db.session.execute(
+            db.select(ResumoCaixaDiario)
+            .where(ResumoCaixaDiario.data.in_(sorted(fechamentos)))
+            .order_by(ResumoCaixaDiario.data)
+        ).scalars()
+    )
+    linhas += agregar_lancamentos(inicio, fim, excluir_dias=set(fechamentos))
+
+    dias: dict[date, SimpleNamespace] = {}
+    por_metodo: dict[str, Decimal] = {}
+    total_ajustes = _ZERO
+    for linha in linhas:
+        dia = dias.get(linha.data)
+        if dia is None:
+            fech = fechamentos.get(linha.data)
+            dia = dias[linha.data] = SimpleNamespace(
+                data=linha.data,
+                fechado=fech is not None,
+                saldo_apurado=fech.saldo_apurado if fech else None,
+                metodos={},
+                total_esperado=_ZERO,
+                total_ajustes=_ZERO,
+            )
+        dia.total_ajustes += linha.total_ajustes
+        total_ajustes += linha.total_ajustes
+        if linha.metodo_pagamento == METODO_AJUSTE:
+            continue
+        dia.metodos[linha.metodo_pagamento] = linha
+        dia.total_esperado += linha.total_caixa
+        por_metodo[linha.metodo_pagamento] = (
+            por_metodo.get(linha.metodo_pagamento, _ZERO) + linha.total_caixa
+        )
+    # Dias fechados sem movimento também aparecem
+    for data_fech, fech in fechamentos.items():
+        dias.setdefault(
+            data_fech,
+            SimpleNamespace(
+                data=data_fech,
+                fechado=True,
+                saldo_apurado=fech.saldo_apurado,
+                metodos={},
+                total_esperado=_ZERO,
+                total_ajustes=_ZERO,
+            ),
+        )
+    for dia in dias.values():
+        dia.diferenca = (
+            None
+            if dia.saldo_apurado is None
+            else dia.saldo_apurado - dia.total_esperado
+        )
+
+    return SimpleNamespace(
+        ano=ano,
+        mes=mes,
+        dias=[dias[d] for d in sorted(dias)],
+        metodos=sorted(por_metodo),
+        totais_por_metodo=por_metodo,
+        total=sum(por_metodo.values(), _ZERO),
+        total_ajustes=total_ajustes,
+    )
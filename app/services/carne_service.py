@@ -0,0 +1,147 @@
+"""Motor do Carnê Cosmético (cronograma de ``ParcelaPrevista``).
+
+Cálculo em centavos inteiros numa única passada:
+
+- ``divmod(total_centavos, n)`` dá a parcela base e o resto; o resto é
+  distribuído um centavo por parcela a partir da primeira, então as
+  parcelas diferem no máximo em R$ 0,01 e a soma fecha exatamente;
+- vencimentos mensais a partir de ``data_inicio``, limitados ao último dia
+  do mês (31/01 -> 28/02 -> 31/03).
+
+A gravação apaga o cronograma do plano e insere tudo num único INSERT em
+lote (sem objetos ORM por parcela). Nenhuma função daqui faz commit: o
+chamador (``financeiro_service``) controla a transação e a timeline.
+"""
+
+from __future__ import annotations
+
+import calendar
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import delete, insert, select
+
+from app import db
+from app.models import ParcelaPrevista
+
+_CENTAVO = Decimal("0.01")
+OBS_PARCIAL = "Parcial (recalculado)"
+
+
+def _centavos(valor) -> int:
+    return int((Decimal(str(valor)) / _CENTAVO).to_integral_value())
+
+
+def calcular_parcelas(
+    valor_total, num_parcelas: int, data_inicio: date
+) -> list[tuple[date, Decimal]]:
+    """Lista de (vencimento, valor) com soma exatamente igual ao total."""
+    if num_parcelas <= 0:
+        raise ValueError("Número de parcelas deve ser maior que zero.")
+    total = _centavos(valor_total)
+    if total <= 0:
+        raise ValueError("Valor do parcelamento deve ser maior que zero.")
+    base, resto = divmod(total, num_parcelas)
+
+    ano0, mes0, dia0 = data_inicio.year, data_inicio.month - 1, data_inicio.day
+    parcelas = []
+    for i in range(num_parcelas):
+        ano, mes = divmod(mes0 + i, 12)
+        ano, mes = ano0 + ano, mes + 1
+        dia = min(dia0, calendar.monthrange(ano, mes)[1])
+        centavos = base + (1 if i < resto else 0)
+        parcelas.append((date(ano, mes, dia), Decimal(centavos) * _CENTAVO))
+    return parcelas
+
+
+def gravar_parcelas(
+    plano_id: int,
+    parcelas: list[tuple[date, Decimal]],
+    observacoes: dict[int, str] | None = None,
+) -> int:
+    """Substitui o cronograma do plano (DELETE + um INSERT em lote).
+
+    ``observacoes`` mapeia o índice da parcela para o texto de observação.
+    """
+    observacoes = observacoes or {}
+    db.session.execute(
+        delete(ParcelaPrevista)
+        .where(ParcelaPrevista.plano_id == plano_id)
+        .execution_options(synchronize_session=False)
+    )
+    if parcelas:
+        db.session.execute(
+            insert(ParcelaPrevista),
+            [
+                {
+                    "plano_id": plano_id,
+                    "data_vencimento": venc,
+                    "valor_previsto": valor,
+                    "observacao": observacoes.get(i),
+                }
+                for i, (venc, valor) in enumerate(parcelas)
+            ],
+        )
+    return len(parcelas)
+
+
+def parcelas_quitadas(
+    plano_id: int, total_pago
+) -> tuple[list[tuple[date, Decimal]], bool]:
+    """Parte do cronograma atual já coberta por ``total_pago`` (Regra 4).
+
+    ``total_pago`` vem de ``get_saldo_plano_calculado`` (definição única de
+    pago: ``financeiro_service.valor_pago_expr``).
+
+    Parcelas totalmente cobertas são mantidas; a primeira parcialmente
+    coberta é reduzida ao valor pago (segundo item do retorno = True), de
+    modo que a soma mantida é ``min(total_pago, total previsto)``.
+    """
+    restante = Decimal(str(total_pago))
+    quitadas = []
+    parcial = False
+    linhas = db.session.execute(
+        select(ParcelaPrevista.data_vencimento, ParcelaPrevista.valor_previsto)
+        .where(ParcelaPrevista.plano_id == plano_id)
+        .order_by(ParcelaPrevista.data_vencimento, ParcelaPrevista.id)
+    )
+    for venc, valor in linhas:
+        if restante <= 0:
+            break
+        valor = Decimal(str(valor))
+        parcial = restante < valor
+        pago = min(valor, restante)
+        quitadas.append((venc, pago))
+        restante -= pago
+    return quitadas, parcial
+
+
+def recalcular_saldo(
+    plano_id: int,
+    total_pago,
+    saldo_devedor,
+    num_parcelas: int,
+    data_inicio: date,
+) -> int:
+    """Regera o cronograma a partir do saldo devedor (sem commit).
+
+    O histórico pago é preservado (``parcelas_quitadas``) e o saldo é
+    redistribuído em ``num_parcelas`` novas parcelas a partir de
+    ``data_inicio``; o carnê continua mostrando o que já foi pago como
+    "Paga" e o restante como "Pendente".
+
+    O carnê e o aging atribuem o pago às parcelas por ordem de vencimento,
+    então ``data_inicio`` precisa ser posterior ao último vencimento
+    mantido (ValueError caso contrário).
+    """
+    quitadas, parcial = parcelas_quitadas(plano_id, total_pago)
+    if quitadas and data_inicio <= quitadas[-1][0]:
+        raise ValueError(
+            "A nova data de início deve ser posterior a "
+            f"{quitadas[-1][0].strftime('%d/%m/%Y')} (último vencimento "
+            "já pago)."
+        )
+    novas = calcular_parcelas(saldo_devedor, num_parcelas, data_inicio)
+    observacoes = {len(quitadas) - 1: OBS_PARCIAL} if parcial else None
+    gravar_parcelas(plano_id, quitadas + novas, observacoes)
+    return len(novas)
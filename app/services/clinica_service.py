@@ -9,10 +9,14 @@ Regras:
 
 from __future__ import annotations
 
+from types import SimpleNamespace
+
 from flask import current_app
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models import ClinicaInfo, db
+from app.services import cache_service
 from app.utils.sanitization import sanitizar_input
 
 
@@ -21,6 +25,20 @@ def get_clinica_info() -> ClinicaInfo | None:
     return db.session.get(ClinicaInfo, 1)
 
 
+@cache_service.cached(cache_service.NS_CLINICA_INFO)
+def get_clinica_info_snapshot() -> SimpleNamespace | None:
+    """Cópia somente leitura de ClinicaInfo (cacheada por tenant)."""
+    info = get_clinica_info()
+    if info is None:
+        return None
+    attrs = sa_inspect(ClinicaInfo).column_attrs
+    return SimpleNamespace(**{a.key: getattr(info, a.key) for a in attrs})
+
+
+def invalidate_clinica_info_cache() -> None:
+    cache_service.invalidate(cache_service.NS_CLINICA_INFO)
+
+
 def get_or_create_clinica_info() -> ClinicaInfo:
     """Retorna ou cria o registro singleton de ClinicaInfo."""
     info = get_clinica_info()
@@ -29,6 +47,7 @@ def get_or_create_clinica_info() -> ClinicaInfo:
             info = ClinicaInfo(id=1)
             db.session.add(info)
             db.session.commit()
+            invalidate_clinica_info_cache()
         except SQLAlchemyError as e:
             db.session.rollback()
             current_app.logger.error(f"Erro ao criar ClinicaInfo: {e}")
@@ -97,6 +116,7 @@ def rollback_clinica_info() -> dict:
         info.previous_state = None
 
         db.session.commit()
+        invalidate_clinica_info_cache()
 
         return {
             "success": True,
@@ -163,6 +183,7 @@ def update_clinica_info(data: dict) -> dict:
             info.horario_funcionamento = data["horario_funcionamento"]
 
         db.session.commit()
+        invalidate_clinica_info_cache()
 
         # Retornar dados para rollback
         return {
@@ -217,6 +238,7 @@ def update_logo_path(logo_type: str, file_path: str | None) -> bool:
         info = get_or_create_clinica_info()
         setattr(info, field_map[logo_type], file_path)
         db.session.commit()
+        invalidate_clinica_info_cache()
         return True
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -245,7 +267,8 @@ def get_config_completeness() -> dict:
         }
     """
     try:
-        info = get_or_create_clinica_info()  # Garantir que sempre retorna info
+        # Leitura via snapshot cacheado; cria o singleton só se ausente
+        info = get_clinica_info_snapshot() or get_or_create_clinica_info()
     except Exception as e:
         current_app.logger.error(f"Erro ao obter info da clínica: {e}")
         info = None
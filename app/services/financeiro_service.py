@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-import calendar
 from collections.abc import Iterable, Mapping
 from datetime import date
-from decimal import ROUND_HALF_UP, Decimal
+from decimal import Decimal
+from types import SimpleNamespace
 
-from sqlalchemy import case
-from sqlalchemy.orm import joinedload
+from sqlalchemy import and_, case, exists, not_
+from sqlalchemy.orm import aliased, joinedload
 from sqlalchemy.sql import func
 
 from app import db
@@ -21,7 +21,13 @@ from app.models import (
     StatusPlanoEnum,
     Usuario,
 )
-from app.services import timeline_service
+from app.services import (
+    cache_service,
+    caixa_service,
+    carne_service,
+    precos_service,
+    timeline_service,
+)
 from app.utils.sanitization import sanitizar_input
 
 # ----------------------------------
@@ -65,7 +71,7 @@ def create_plano(
 
     itens_data: iterável de dicts com chaves:
       - procedimento_id (obrigatório)
-      - valor_cobrado (opcional; utiliza Procedimento.valor_padrao se ausente)
+      - valor_cobrado (opcional; usa o preço vigente hoje se ausente)
       - descricao_dente_face (opcional)
     """
     if not _validar_dentista_existe(dentista_id):
@@ -77,45 +83,37 @@ def create_plano(
             "É necessário informar ao menos um item para o plano."
         )
 
-    subtotal = Decimal("0")
-    itens_models: list[ItemPlano] = []
-
+    proc_ids: list[int] = []
     for item in itens_data:
         proc_raw = item.get("procedimento_id")
         if proc_raw is None:
             raise ValueError("Item sem 'procedimento_id'.")
         try:
-            proc_id = int(str(proc_raw))
+            proc_ids.append(int(str(proc_raw)))
         except (TypeError, ValueError):
             raise ValueError("procedimento_id inválido.")
 
-        # Importante para testes: usar query.get para permitir monkeypatch em
-        # Procedimento.query.get. Em produção, Flask-SQLAlchemy 3.x recomenda
-        # session.get, mas aqui priorizamos testabilidade.
-        procedimento = Procedimento.query.get(proc_id)
-        if procedimento is None:
+    # Nome e preço vigente hoje de todos os procedimentos numa consulta
+    catalogo = precos_service.resolver_procedimentos(proc_ids)
+
+    subtotal = Decimal("0")
+    itens_models: list[ItemPlano] = []
+
+    for proc_id, item in zip(proc_ids, itens_data, strict=True):
+        if proc_id in catalogo:
+            proc_nome, proc_valor = catalogo[proc_id]
+        elif "valor_cobrado" in item and item["valor_cobrado"] is not None:
             # Fallback para testes/lançamento avulso: permitir criação quando
             # um valor explícito foi informado, congelando dados diretamente.
-            if "valor_cobrado" in item and item["valor_cobrado"] is not None:
-
-                class _ProcShadow:
-                    def __init__(self, _id: int, _nome: str, _valor: Decimal):
-                        self.id = _id
-                        self.nome = _nome
-                        self.valor_padrao = _valor
-
-                procedimento = _ProcShadow(
-                    proc_id,
-                    "Procedimento Avulso",
-                    _to_decimal(item["valor_cobrado"]),
-                )
-            else:
-                raise ValueError(f"Procedimento id={proc_id} não encontrado.")
+            proc_nome = "Procedimento Avulso"
+            proc_valor = _to_decimal(item["valor_cobrado"])
+        else:
+            raise ValueError(f"Procedimento id={proc_id} não encontrado.")
 
         if "valor_cobrado" in item and item["valor_cobrado"] is not None:
             valor_cobrado = _to_decimal(item["valor_cobrado"])
         else:
-            valor_cobrado = _to_decimal(procedimento.valor_padrao)
+            valor_cobrado = _to_decimal(proc_valor)
 
         descricao = item.get("descricao_dente_face")
         # Sanitizar e normalizar para None se vazio
@@ -128,9 +126,9 @@ def create_plano(
         subtotal += valor_cobrado
 
         it_model = ItemPlano()
-        it_model.procedimento_id = procedimento.id
+        it_model.procedimento_id = proc_id
         # Congelamento (Regra 4): nome e valor no momento da criação
-        it_model.procedimento_nome_historico = procedimento.nome
+        it_model.procedimento_nome_historico = proc_nome
         it_model.valor_cobrado = valor_cobrado
         it_model.descricao_dente_face = desc_val
         itens_models.append(it_model)
@@ -449,14 +447,31 @@ def get_planos_by_paciente(paciente_id: int) -> list[PlanoTratamento]:
     return planos
 
 
-def get_all_procedimentos() -> list[Procedimento]:
-    """Retorna todos os procedimentos (tabela de preços)."""
-    return (
+@cache_service.cached(cache_service.NS_PROCEDIMENTOS)
+def get_all_procedimentos() -> list[SimpleNamespace]:
+    """Retorna todos os procedimentos ativos (tabela de preços).
+
+    Snapshot somente leitura (cacheado por tenant); para alterar, use
+    procedimentos_service.
+    """
+    rows = (
         db.session.query(Procedimento)
         .filter(Procedimento.is_active.is_(True))
         .order_by(Procedimento.nome.asc())
         .all()
     )
+    return [
+        SimpleNamespace(
+            id=p.id,
+            nome=p.nome,
+            codigo=p.codigo,
+            categoria=p.categoria,
+            valor_padrao=p.valor_padrao,
+            descricao=p.descricao,
+            is_active=p.is_active,
+        )
+        for p in rows
+    ]
 
 
 def get_procedimento_by_id(procedimento_id: int) -> Procedimento | None:
@@ -503,11 +518,49 @@ def get_saldo_devedor_plano(plano_id: int) -> Decimal:
     return _to_decimal(plano.valor_total) - total_pago_dec
 
 
+def _estorno_de_pagamento():
+    """Lançamento é estorno de um PAGAMENTO (e não de um ajuste)."""
+    lanc = LancamentoFinanceiro
+    original = aliased(LancamentoFinanceiro)
+    return and_(
+        lanc.lancamento_estornado_id.isnot(None),
+        exists().where(
+            original.id == lanc.lancamento_estornado_id,
+            original.tipo_lancamento == lanc.LancamentoTipo.PAGAMENTO,
+        ),
+    )
+
+
+def valor_pago_expr():
+    """Parcela de cada lançamento que conta como "pago" (Regra 4).
+
+    Pagamentos menos os estornos de pagamentos (valor negativo). Definição
+    única usada pelo saldo do plano, pelo carnê (status e regeração) e pelo
+    aging de recebíveis; somar com ``func.sum`` agrupando por plano.
+    """
+    lanc = LancamentoFinanceiro
+    pago = (lanc.tipo_lancamento == lanc.LancamentoTipo.PAGAMENTO) | (
+        _estorno_de_pagamento()
+    )
+    return case((pago, lanc.valor), else_=0)
+
+
+def valor_ajuste_expr():
+    """Ajustes do plano, exceto estornos de pagamentos (já no pago)."""
+    lanc = LancamentoFinanceiro
+    ajuste = and_(
+        lanc.tipo_lancamento == lanc.LancamentoTipo.AJUSTE,
+        not_(_estorno_de_pagamento()),
+    )
+    return case((ajuste, lanc.valor), else_=0)
+
+
 def get_saldo_plano_calculado(plano_id: int) -> dict:
     """Calcula saldo devedor com 'Soma Burra v2':
 
-    saldo_devedor = valor_total + SUM(ajustes) - SUM(pagamentos)
+    saldo_devedor = valor_total + SUM(ajustes) - SUM(pagos)
 
+    Pagos e ajustes conforme ``valor_pago_expr``/``valor_ajuste_expr``.
     Retorna dicionário: saldo_devedor, valor_total,
     total_pago e total_ajustado.
     """
@@ -517,32 +570,8 @@ def get_saldo_plano_calculado(plano_id: int) -> dict:
 
     pagamentos_sum, ajustes_sum = (
         db.session.query(
-            func.coalesce(
-                func.sum(
-                    case(
-                        (
-                            LancamentoFinanceiro.tipo_lancamento
-                            == LancamentoFinanceiro.LancamentoTipo.PAGAMENTO,
-                            LancamentoFinanceiro.valor,
-                        ),
-                        else_=0,
-                    )
-                ),
-                0,
-            ),
-            func.coalesce(
-                func.sum(
-                    case(
-                        (
-                            LancamentoFinanceiro.tipo_lancamento
-                            == LancamentoFinanceiro.LancamentoTipo.AJUSTE,
-                            LancamentoFinanceiro.valor,
-                        ),
-                        else_=0,
-                    )
-                ),
-                0,
-            ),
+            func.coalesce(func.sum(valor_pago_expr()), 0),
+            func.coalesce(func.sum(valor_ajuste_expr()), 0),
         )
         .filter(LancamentoFinanceiro.plano_id == int(plano_id))
         .one()
@@ -565,15 +594,19 @@ def get_saldo_plano_calculado(plano_id: int) -> dict:
 # ----------------------------------
 
 
-def _last_day_of_month(y: int, m: int) -> int:
-    return calendar.monthrange(y, m)[1]
-
-
-def _add_months(base: date, months: int) -> date:
-    y = base.year + (base.month - 1 + months) // 12
-    m = (base.month - 1 + months) % 12 + 1
-    d = min(base.day, _last_day_of_month(y, m))
-    return date(y, m, d)
+def _registrar_carne_timeline(
+    plano: PlanoTratamento, descricao: str, usuario_id: int
+) -> None:
+    # Timeline non-blocking
+    try:
+        timeline_service.create_timeline_evento(
+            evento_tipo="FINANCEIRO",
+            descricao=descricao,
+            usuario_id=usuario_id,
+            paciente_id=plano.paciente_id,
+        )
+    except Exception:
+        pass
 
 
 def gerar_parcelamento_previsto(
@@ -583,63 +616,71 @@ def gerar_parcelamento_previsto(
 
     Regras:
     - Atômica: limpa parcelas existentes e cria novas; commit único.
-    - Divide o valor_total igualmente entre as parcelas; última recebe ajuste
-      de centavos para fechar a soma.
+    - Divide o valor_total em centavos; o resto da divisão é distribuído
+      um centavo por parcela a partir da primeira (soma exata).
     - Cria evento de timeline após commit (non-blocking).
     """
     plano = db.session.get(PlanoTratamento, int(plano_id))
     if not plano:
         raise ValueError("Plano não encontrado.")
-    if num_parcelas <= 0:
-        raise ValueError("Número de parcelas deve ser maior que zero.")
+    parcelas = carne_service.calcular_parcelas(
+        plano.valor_total, num_parcelas, data_inicio
+    )
 
     try:
-        valor_total = Decimal(str(plano.valor_total))
-        # Limpa parcelas existentes
-        db.session.query(ParcelaPrevista).filter(
-            ParcelaPrevista.plano_id == plano.id
-        ).delete(synchronize_session=False)
-
-        # Cálculo por parcela com arredondamento a 2 casas
-        base_parcela = (valor_total / Decimal(num_parcelas)).quantize(
-            Decimal("0.01"), rounding=ROUND_HALF_UP
-        )
-        total_base = base_parcela * num_parcelas
-        ajuste_final = valor_total - total_base
-
-        for i in range(num_parcelas):
-            venc = _add_months(data_inicio, i)
-            valor = base_parcela
-            # adicionar eventual ajuste de centavos na última parcela
-            if i == num_parcelas - 1:
-                valor = (valor + ajuste_final).quantize(
-                    Decimal("0.01"), rounding=ROUND_HALF_UP
-                )
-            p = ParcelaPrevista()
-            p.plano_id = plano.id
-            p.data_vencimento = venc
-            p.valor_previsto = valor
-            p.observacao = None
-            db.session.add(p)
-
+        carne_service.gravar_parcelas(plano.id, parcelas)
         db.session.commit()
-        # Timeline non-blocking
-        try:
-            timeline_service.create_timeline_evento(
-                evento_tipo="FINANCEIRO",
-                descricao=(
-                    f"Carnê de {num_parcelas} parcelas gerado para plano "
-                    f"#{plano.id}."
-                ),
-                usuario_id=usuario_id,
-                paciente_id=plano.paciente_id,
-            )
-        except Exception:
-            pass
-        return True
     except Exception as exc:
         db.session.rollback()
         raise ValueError(f"Falha ao gerar carnê: {exc}")
+    _registrar_carne_timeline(
+        plano,
+        f"Carnê de {num_parcelas} parcelas gerado para plano #{plano.id}.",
+        usuario_id,
+    )
+    return True
+
+
+def regerar_parcelamento_saldo(
+    plano_id: int, num_parcelas: int, data_inicio: date, usuario_id: int
+) -> bool:
+    """Regera o carnê sobre o saldo devedor após pagamentos parciais.
+
+    Parcelas já pagas ficam no histórico; o saldo da 'Soma Burra v2' é
+    redistribuído em ``num_parcelas`` a partir de ``data_inicio``, que deve
+    ser posterior ao último vencimento mantido.
+    """
+    plano = db.session.get(PlanoTratamento, int(plano_id))
+    if not plano:
+        raise ValueError("Plano não encontrado.")
+    comp = get_saldo_plano_calculado(plano.id)
+    if comp["saldo_devedor"] <= 0:
+        raise ValueError("Plano sem saldo devedor para parcelar.")
+
+    try:
+        carne_service.recalcular_saldo(
+            plano.id,
+            total_pago=comp["total_pago"],
+            saldo_devedor=comp["saldo_devedor"],
+            num_parcelas=num_parcelas,
+            data_inicio=data_inicio,
+        )
+        db.session.commit()
+    except ValueError:
+        db.session.rollback()
+        raise
+    except Exception as exc:
+        db.session.rollback()
+        raise ValueError(f"Falha ao regerar carnê: {exc}")
+    _registrar_carne_timeline(
+        plano,
+        (
+            f"Carnê do plano #{plano.id} regerado: saldo de R$ "
+            f"{comp['saldo_devedor']} em {num_parcelas} parcelas."
+        ),
+        usuario_id,
+    )
+    return True
 
 
 def get_carne_detalhado(plano_id: int) -> list[dict]:
@@ -815,6 +856,8 @@ def fechar_caixa_dia(
 
     - Se já estiver FECHADO, levanta ValueError.
     - Atualiza saldo_apurado e status para FECHADO.
+    - Grava o resumo por método e o saldo_esperado (caixa_service) na
+      mesma transação.
     """
     try:
         fech = db.session.get(FechamentoCaixa, data_caixa)
@@ -828,6 +871,7 @@ def fechar_caixa_dia(
 
         fech.status = CaixaStatus.FECHADO
         fech.saldo_apurado = _to_decimal(saldo_apurado)
+        caixa_service.gravar_resumo_dia(fech)
         db.session.commit()
         # Log de sistema na timeline (non-blocking)
         try:
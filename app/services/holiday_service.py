@@ -2,15 +2,18 @@ from __future__ import annotations
 
 import os
 import time
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from typing import Any
 
 from flask import current_app
+from sqlalchemy import func
 
 from .. import db
 from ..models import Holiday
 
 _CACHE_TTL_SECONDS = 3600  # 1 hour
+# Prefetch: years whose rows are older than this are downloaded again
+PREFETCH_MAX_AGE_DAYS = 30
 _year_cache: dict[int, dict[str, Any]] = {}
 
 
@@ -166,3 +169,38 @@ def refresh_holidays(year: int, state: str | None = None) -> dict[str, Any]:
 def clear_holiday_cache() -> None:
     """Clear in-memory holidays cache for all years."""
     _year_cache.clear()
+
+
+def prefetch_holidays(today: date | None = None) -> dict[int, dict[str, Any]]:
+    """Download current and next year's holidays when missing or stale.
+
+    No-op without an Invertexto token. Returns {year: refresh result} for
+    the years actually refreshed.
+    """
+    if not get_invertexto_token():
+        return {}
+    today = today or date.today()
+    stale_before = datetime.now(timezone.utc) - timedelta(
+        days=PREFETCH_MAX_AGE_DAYS
+    )
+    results: dict[int, dict[str, Any]] = {}
+    for year in (today.year, today.year + 1):
+        last = (
+            db.session.query(func.max(Holiday.updated_at))
+            .filter(Holiday.year == year)
+            .scalar()
+        )
+        if last is not None and last >= stale_before:
+            continue
+        results[year] = refresh_holidays(year)
+    return results
+
+
+def prefetch_holidays_job(app) -> None:
+    """APScheduler job (holidays are global, public schema)."""
+    with app.app_context():
+        for year, res in prefetch_holidays().items():
+            if res.get("status") != "success":
+                app.logger.error(
+                    "Holiday prefetch (%s): %s", year, res.get("message")
+                )
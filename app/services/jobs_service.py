@@ -0,0 +1,290 @@
+"""Registro e execução única dos jobs de manutenção do scheduler.
+
+Cada processo (worker do gunicorn, reloader desligado) sobe o próprio
+APScheduler com os mesmos jobs. Para que cada disparo rode uma vez só no
+cluster, o APScheduler chama ``executar_job`` em vez da função do job:
+
+1. ``pg_try_advisory_lock`` com uma chave derivada do id do job, numa
+   conexão dedicada mantida durante a execução. Quem não obtém o lock
+   desiste na hora (outro processo está rodando o job).
+2. Com o lock, se já houver execução iniciada dentro da janela
+   ``deduplicar_s`` (o mesmo disparo, rodado por outro processo um pouco
+   antes), o job é pulado.
+3. Execução e resultado vão para ``JobRun`` (início, fim, duração, status,
+   erro, host/pid), gravados na mesma conexão do lock, fora da sessão que
+   o job usa.
+
+Processos que morrem liberam o lock junto com a conexão; uma execução
+"running" órfã não bloqueia a próxima (só conta para a deduplicação).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import socket
+import time
+import traceback
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from flask import current_app
+from sqlalchemy import func, insert, select, text, update
+
+from app import db
+from app.models import JobRun
+
+STATUS_RUNNING = "running"
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+# Retornos de executar_job quando nada roda
+SKIPPED_LOCKED = "skipped_locked"
+SKIPPED_RECENT = "skipped_recent"
+
+MAX_ERROR_CHARS = 4000
+HISTORICO_PADRAO = 20
+
+
+@dataclass
+class JobSpec:
+    id: str
+    func: Callable
+    descricao: str
+    # kwargs de trigger do APScheduler (trigger="cron", hour=3, ...)
+    trigger: dict = field(default_factory=dict)
+    # Execuções iniciadas há menos que isto contam como o mesmo disparo
+    deduplicar_s: int = 60
+
+
+_registro: dict[str, JobSpec] = {}
+
+
+def registrar_job(spec: JobSpec) -> JobSpec:
+    _registro[spec.id] = spec
+    return spec
+
+
+def remover_job(job_id: str) -> None:
+    _registro.pop(job_id, None)
+
+
+def _registrar_padrao() -> None:
+    from app.services import (
+        holiday_service,
+        precos_service,
+        purge_service,
+        relatorio_service,
+    )
+
+    minutos = current_app.config.get("RELATORIO_REFRESH_MINUTES") or 15
+    padrao = [
+        JobSpec(
+            id="retencao_dados",
+            func=purge_service.aplicar_retencao_job,
+            descricao="Retenção: devlogs, auditoria e arquivo da timeline",
+            trigger={"trigger": "cron", "hour": 3, "minute": 30},
+            deduplicar_s=6 * 3600,
+        ),
+        JobSpec(
+            id="relatorio_financeiro",
+            func=relatorio_service.atualizar_relatorios_job,
+            descricao="Relatório financeiro: meses pendentes",
+            trigger={"trigger": "interval", "minutes": minutos},
+            deduplicar_s=minutos * 30,
+        ),
+        JobSpec(
+            id="precos_agendados",
+            func=precos_service.aplicar_precos_agendados_job,
+            descricao="Tabela de preços: aplica preços agendados do dia",
+            trigger={"trigger": "cron", "hour": 0, "minute": 5},
+            deduplicar_s=6 * 3600,
+        ),
+        JobSpec(
+            id="feriados_prefetch",
+            func=holiday_service.prefetch_holidays_job,
+            descricao="Feriados: ano atual e próximo (Invertexto)",
+            trigger={"trigger": "cron", "hour": 4, "minute": 15},
+            deduplicar_s=6 * 3600,
+        ),
+    ]
+    for spec in padrao:
+        _registro.setdefault(spec.id, spec)
+
+
+def job_registry() -> list[JobSpec]:
+    """Jobs registrados (os padrão entram na primeira chamada)."""
+    _registrar_padrao()
+    return sorted(_registro.values(), key=lambda s: s.id)
+
+
+def get_job(job_id: str) -> JobSpec:
+    _registrar_padrao()
+    spec = _registro.get(job_id)
+    if spec is None:
+        raise ValueError(f"Job desconhecido: {job_id}")
+    return spec
+
+
+def agendar_jobs(scheduler, app) -> None:
+    """Registra todos os jobs no APScheduler via ``executar_job``."""
+    with app.app_context():
+        specs = job_registry()
+    for spec in specs:
+        scheduler.add_job(
+            id=spec.id,
+            func=executar_job,
+            args=[app, spec.id],
+            replace_existing=True,
+            **spec.trigger,
+        )
+
+
+# ----------------------------------
+# Execução única (advisory lock)
+# ----------------------------------
+
+
+def lock_key(job_id: str) -> int:
+    """Chave bigint estável (hash() do Python varia entre processos)."""
+    digest = hashlib.sha1(f"echodent:job:{job_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def _finalizar(conn, run_id: int, inicio: float, erro: str | None) -> None:
+    conn.execute(
+        update(JobRun)
+        .where(JobRun.id == run_id)
+        .values(
+            finished_at=func.now(),
+            duration_ms=int((time.monotonic() - inicio) * 1000),
+            status=STATUS_ERROR if erro else STATUS_OK,
+            error=erro,
+        )
+    )
+    conn.commit()
+
+
+def executar_job(app, job_id: str) -> str:
+    """Ponto de entrada do APScheduler: roda o job uma vez no cluster.
+
+    Retorna o status final (ok/error) ou o motivo de ter pulado.
+    """
+    with app.app_context():
+        spec = get_job(job_id)
+        engine = db.engine
+    chave = lock_key(job_id)
+
+    with engine.connect() as conn:
+        obtido = conn.execute(
+            text("SELECT pg_try_advisory_lock(:k)"), {"k": chave}
+        ).scalar()
+        conn.commit()
+        if not obtido:
+            app.logger.debug("Job %s: em execução em outro processo", job_id)
+            return SKIPPED_LOCKED
+        try:
+            # Relógio do banco: processos em hosts diferentes concordam
+            desde = func.now() - timedelta(seconds=spec.deduplicar_s)
+            recente = conn.execute(
+                select(JobRun.id)
+                .where(JobRun.job_id == job_id, JobRun.started_at >= desde)
+                .limit(1)
+            ).scalar()
+            if recente is not None:
+                conn.commit()
+                return SKIPPED_RECENT
+
+            run_id = conn.execute(
+                insert(JobRun)
+                .values(
+                    job_id=job_id,
+                    started_at=func.now(),
+                    status=STATUS_RUNNING,
+                    hostname=socket.gethostname()[:255],
+                    pid=os.getpid(),
+                )
+                .returning(JobRun.id)
+            ).scalar_one()
+            conn.commit()
+
+            inicio = time.monotonic()
+            erro = None
+            try:
+                spec.func(app)
+            except Exception:
+                erro = traceback.format_exc()[-MAX_ERROR_CHARS:]
+                app.logger.error("Job %s falhou:\n%s", job_id, erro)
+            _finalizar(conn, run_id, inicio, erro)
+            return STATUS_ERROR if erro else STATUS_OK
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": chave})
+            conn.commit()
+
+
+def purgar_historico(dias: int | None = None):
+    """Remove execuções com mais de ``dias`` (``JOB_RUNS_RETENTION_DAYS``)."""
+    from app.services import purge_service
+
+    if dias is None:
+        dias = current_app.config.get("JOB_RUNS_RETENTION_DAYS", 90)
+    corte = datetime.now(timezone.utc) - timedelta(days=dias)
+    return purge_service.purgar_em_lotes(
+        JobRun, JobRun.started_at < corte, chave="job_runs"
+    )
+
+
+# ----------------------------------
+# Consulta (tela admin)
+# ----------------------------------
+
+
+def list_runs(job_id: str, limite: int = HISTORICO_PADRAO) -> list[JobRun]:
+    return list(
+        db.session.execute(
+            select(JobRun)
+            .where(JobRun.job_id == job_id)
+            .order_by(JobRun.started_at.desc(), JobRun.id.desc())
+            .limit(limite)
+        ).scalars()
+    )
+
+
+def resumo_jobs(limite: int = HISTORICO_PADRAO) -> list[SimpleNamespace]:
+    """Registro + últimas execuções de cada job (uma consulta)."""
+    specs = job_registry()
+    ordem = (
+        func.row_number()
+        .over(
+            partition_by=JobRun.job_id,
+            order_by=(JobRun.started_at.desc(), JobRun.id.desc()),
+        )
+        .label("ordem")
+    )
+    recentes = (
+        select(JobRun.id, ordem)
+        .where(JobRun.job_id.in_([s.id for s in specs]))
+        .subquery()
+    )
+    runs = db.session.execute(
+        select(JobRun)
+        .join(recentes, recentes.c.id == JobRun.id)
+        .where(recentes.c.ordem <= limite)
+        .order_by(JobRun.started_at.desc(), JobRun.id.desc())
+    ).scalars()
+    por_job: dict[str, list[JobRun]] = {s.id: [] for s in specs}
+    for run in runs:
+        por_job[run.job_id].append(run)
+    return [
+        SimpleNamespace(
+            spec=spec,
+            trigger=", ".join(
+                f"{k}={v}" for k, v in spec.trigger.items() if k != "trigger"
+            ),
+            runs=por_job[spec.id],
+            ultima=(por_job[spec.id] or [None])[0],
+        )
+        for spec in specs
+    ]
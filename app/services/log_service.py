@@ -1,12 +1,103 @@
+import hashlib
+import os
 import traceback
 from datetime import datetime, timedelta, timezone
 
-from flask import Request
+from flask import Request, current_app
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from .. import db
 from ..models import DeveloperLog
+from . import telemetry_service
 
 MAX_BODY_LOG_CHARS = 4096
+MAX_MESSAGE_CHARS = 500
+# Amostras (contexto da requisição) guardadas por fingerprint
+MAX_SAMPLES = 20
+
+_RAIZ_PROJETO = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def _caminho_frame(filename: str) -> str:
+    """Caminho do frame sem prefixos da máquina (venv, checkout)."""
+    caminho = filename.replace("\\", "/")
+    if "/site-packages/" in caminho:
+        return caminho.rsplit("/site-packages/", 1)[1]
+    raiz = _RAIZ_PROJETO.replace("\\", "/").rstrip("/") + "/"
+    if caminho.startswith(raiz):
+        return caminho[len(raiz) :]
+    return os.path.basename(caminho)
+
+
+def fingerprint_exception(error: BaseException) -> str:
+    """Identifica a "mesma" falha entre ocorrências.
+
+    Combina o tipo qualificado da exceção com (arquivo, função) de cada
+    frame. Números de linha e a mensagem ficam de fora: mudam com edições
+    não relacionadas e com os dados da requisição (ids, valores).
+    """
+    tipo = type(error)
+    partes = [f"{tipo.__module__}.{tipo.__qualname__}"]
+    partes += [
+        f"{_caminho_frame(frame.filename)}:{frame.name}"
+        for frame in traceback.extract_tb(error.__traceback__)
+    ]
+    return hashlib.sha1("\n".join(partes).encode("utf-8")).hexdigest()
+
+
+def _upsert_stmt(fingerprint: str, dados: dict, amostra: dict):
+    """INSERT ... ON CONFLICT (fingerprint) que só atualiza contadores.
+
+    O anel de amostras descarta a mais antiga (``samples - 0``) ao atingir
+    ``MAX_SAMPLES``; tudo num único comando, sem ler a linha antes.
+    """
+    tabela = DeveloperLog.__table__
+    agora = amostra["ts"]
+    stmt = pg_insert(tabela).values(
+        fingerprint=fingerprint,
+        timestamp=agora,
+        last_seen=agora,
+        occurrence_count=1,
+        samples=[amostra],
+        **dados,
+    )
+    anel = case(
+        (
+            func.jsonb_array_length(tabela.c.samples) >= MAX_SAMPLES,
+            tabela.c.samples.op("-")(0),
+        ),
+        else_=tabela.c.samples,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[tabela.c.fingerprint],
+        set_={
+            "occurrence_count": tabela.c.occurrence_count + 1,
+            "last_seen": stmt.excluded.last_seen,
+            "samples": anel.op("||")(stmt.excluded.samples),
+        },
+    )
+
+
+def _ler_body(request: Request | None) -> str | None:
+    """Captura robusta do corpo da requisição (truncado, sem binários)."""
+    if not request:
+        return None
+    try:
+        mt = (getattr(request, "mimetype", None) or "").lower()
+        # Tipos binários comuns não devem ser logados
+        if mt.startswith("image/") or mt in (
+            "application/pdf",
+            "application/octet-stream",
+        ):
+            return "[Corpo binário não logado]"
+        # Leitura segura e truncamento em 4KB
+        request_text = request.get_data(as_text=True)
+        return (request_text or "")[:MAX_BODY_LOG_CHARS]
+    except Exception as e_body:
+        return f"Falha ao ler o body: {e_body}"
 
 
 def record_exception(
@@ -18,89 +109,83 @@ def record_exception(
     Grava uma exceção não tratada no banco de dados 'logs.db'.
     Esta função é chamada pelo handler global de erros.
 
-    Aderência Mandatória: Regra 7.5 (Atomicidade).
+    Ocorrências repetidas (mesmo fingerprint) não criam linhas novas:
+    incrementam o contador e entram no anel de amostras.
+
+    A gravação é entregue ao ``telemetry_service`` (engine e thread
+    próprias): não usa ``db.session`` nem espera o banco, então a sessão e
+    a transação da requisição que falhou ficam intocadas.
     """
     try:
-        # Garanta uma transação limpa antes de logar (defensivo)
-        # Em alguns cenários, mesmo após o handler global executar rollback,
-        # a sessão pode permanecer marcada como "failed". Este rollback extra
-        # evita o erro InFailedSqlTransaction ao inserir o DeveloperLog.
-        try:
-            db.session.rollback()
-        except Exception:
-            pass
-        # Extrai dados do erro e da requisição
-        tb_string = traceback.format_exc()
-        error_type_str = type(error).__name__
-
-        # Captura robusta do corpo da requisição
-        body_content = None
-        if request:
-            try:
-                mt = (getattr(request, "mimetype", None) or "").lower()
-                # Tipos binários comuns não devem ser logados
-                if mt.startswith("image/") or mt in (
-                    "application/pdf",
-                    "application/octet-stream",
-                ):
-                    body_content = "[Corpo binário não logado]"
-                else:
-                    # Leitura segura e truncamento em 4KB
-                    request_text = request.get_data(as_text=True)
-                    body_content = (request_text or "")[:MAX_BODY_LOG_CHARS]
-            except Exception as e_body:
-                body_content = f"Falha ao ler o body: {e_body}"
-
-        new_log = DeveloperLog()
-        new_log.error_type = error_type_str
-        new_log.traceback = tb_string
-        new_log.request_url = request.url if request else "N/A"
-        new_log.request_method = request.method if request else "N/A"
-        new_log.user_id = user_id
-        new_log.request_body = body_content
-
-        # O modelo DeveloperLog já tem o __bind_key__ = 'logs',
-        # então o SQLAlchemy direcionará automaticamente para o bind correto.
-        db.session.add(new_log)
-        db.session.commit()
+        body_content = _ler_body(request)
+        url = request.url if request else "N/A"
+        method = request.method if request else "N/A"
+
+        dados = {
+            "error_type": type(error).__name__[:100],
+            "traceback": "".join(traceback.format_exception(error)),
+            "request_url": url[:500],
+            "request_method": method,
+            "user_id": user_id,
+            "request_body": body_content,
+        }
+        amostra = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "url": url,
+            "method": method,
+            "user_id": user_id,
+            "message": str(error)[:MAX_MESSAGE_CHARS],
+            "body": body_content,
+        }
+        # DeveloperLog fica no schema public (independe do tenant)
+        telemetry_service.submit(
+            _upsert_stmt(fingerprint_exception(error), dados, amostra)
+        )
 
     except Exception as e:
-        # Se o próprio log falhar, faz rollback e imprime no console
-        db.session.rollback()
+        # Falha ao montar o registro: não propaga para o handler de erros
         print(f"CRITICAL: Falha ao gravar log de erro no DB: {e}")
         print(f"Erro Original: {traceback.format_exc()}")
 
 
-def purge_old_logs(days: int = 30) -> None:
+def purge_old_logs(days: int | None = None, progress=None):
     """
-    Remove registros de log mais antigos que 'days' (padrão 30 dias).
-    Esta função será chamada por um job agendado (APScheduler).
+    Remove fingerprints sem ocorrência há mais de 'days' dias (padrão
+    ``DEV_LOG_RETENTION_DAYS``, 30). Chamado pelo job diário de retenção.
 
-    Aderência Mandatória: Regra 7.5 (Atomicidade).
+    Expurgo em lotes por faixa de ID (purge_service): transações curtas,
+    retomável se interrompido. Retorna o PurgeResult (None em erro).
     """
+    from . import purge_service
+
+    if days is None:
+        days = current_app.config.get("DEV_LOG_RETENTION_DAYS", 30)
     try:
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-
-        # O SQLAlchemy usará o bind 'logs' automaticamente devido ao modelo
-        logs_to_delete = db.session.query(DeveloperLog).filter(
-            DeveloperLog.timestamp < cutoff_date
+        # Fingerprints que continuam ocorrendo não são removidos
+        resultado = purge_service.purgar_em_lotes(
+            DeveloperLog,
+            DeveloperLog.last_seen < cutoff_date,
+            chave="devlogs",
+            progress=progress,
         )
-
-        deleted_count = logs_to_delete.delete(synchronize_session=False)
-        db.session.commit()
-
-        print(f"Log Purge: {deleted_count} logs antigos removidos.")
+        print(f"Log Purge: {resultado.removidos} logs antigos removidos.")
+        return resultado
 
     except Exception as e:
         db.session.rollback()
         print(f"CRITICAL: Falha ao purgar logs antigos: {e}")
+        return None
 
 
 def get_logs_paginated(page: int, per_page: int):
     """
-    Retorna logs paginados, ordenados do mais recente para o mais antigo.
+    Retorna fingerprints paginados, da ocorrência mais recente para a
+    mais antiga.
     """
-    query = DeveloperLog.query.order_by(DeveloperLog.timestamp.desc())
+    query = DeveloperLog.query.order_by(
+        DeveloperLog.last_seen.desc(), DeveloperLog.id.desc()
+    )
     return query.paginate(page=page, per_page=per_page, error_out=False)
 
 
@@ -113,12 +198,15 @@ def get_log_by_id(log_id: int):
 
 def purge_all_logs():
     """
-    Deleta todos os registros de DeveloperLog de forma atômica.
+    Deleta todos os registros de DeveloperLog em lotes (purge_service).
     Retorna True em caso de sucesso, False em caso de erro.
     """
+    from . import purge_service
+
     try:
-        db.session.query(DeveloperLog).delete(synchronize_session=False)
-        db.session.commit()
+        purge_service.purgar_em_lotes(
+            DeveloperLog, chave="devlogs_todos", pausa_s=0
+        )
         return True
     except Exception as e:
         db.session.rollback()
@@ -128,7 +216,7 @@ def purge_all_logs():
 
 def get_total_logs_count() -> int:
     """
-    Retorna o total de logs armazenados no banco.
+    Retorna o total de erros distintos (fingerprints) no banco.
     """
     try:
         return db.session.query(DeveloperLog).count()
@@ -0,0 +1,222 @@
+"""Derivados de mídia (miniaturas e previews) gerados em segundo plano.
+
+- Tamanhos fixos (``SIZES``); o original nunca é alterado.
+- Cache no storage (compartilhado entre tenants) endereçado pelo conteúdo:
+  ``derivatives/<aa>/<sha256>/<size>.<ext>``. Mídias legadas sem hash usam
+  ``derivatives/<schema>/<media_id>/...`` (ids se repetem entre schemas).
+  JPEG para fotos/radiografias comuns e PNG para DICOM (tons de cinza).
+- Geração em ThreadPoolExecutor com app context próprio; Pillow e pydicom
+  são dependências opcionais (import tardio). Sem Pillow, nada é agendado e
+  a rota continua servindo o original.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, g
+
+from app import db
+from app.models import MediaPaciente
+from app.services import storage_service
+from app.tenancy import current_schema
+
+DERIVATIVES_PREFIX = "derivatives"
+
+# Lado maior (px) de cada derivado
+SIZES: dict[str, int] = {
+    "thumb": 256,
+    "preview": 1600,
+}
+
+_DICOM_EXTS = {".dcm", ".dicom"}
+_DICOM_TYPES = {"application/dicom", "application/dicom+json"}
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+# (schema, media_id): ids se repetem entre tenants
+_pending: set[tuple[str, int]] = set()
+_pending_lock = threading.Lock()
+
+
+def _pil_image():
+    # Lazy import: Pillow is optional
+    from PIL import Image, ImageOps  # type: ignore
+
+    return Image, ImageOps
+
+
+def is_available() -> bool:
+    try:
+        _pil_image()
+    except ImportError:
+        return False
+    return True
+
+
+def is_dicom(media: MediaPaciente) -> bool:
+    ext = os.path.splitext(media.file_path or "")[1].lower()
+    return ext in _DICOM_EXTS or (media.content_type or "") in _DICOM_TYPES
+
+
+def derivative_path(media: MediaPaciente, size: str) -> str:
+    ext = "png" if is_dicom(media) else "jpg"
+    sha = media.content_sha256
+    if sha:
+        return f"{DERIVATIVES_PREFIX}/{sha[:2]}/{sha}/{size}.{ext}"
+    return f"{DERIVATIVES_PREFIX}/{current_schema()}/{media.id}/{size}.{ext}"
+
+
+def derivative_mimetype(relative_path: str) -> str:
+    return "image/png" if relative_path.endswith(".png") else "image/jpeg"
+
+
+def get_cached_derivative(media: MediaPaciente, size: str) -> str | None:
+    """Caminho do derivado no storage, ou None se ainda não gerado."""
+    if size not in SIZES:
+        raise ValueError(f"Tamanho inválido: {size}")
+    path = derivative_path(media, size)
+    if storage_service.get_storage_service().exists(path):
+        return path
+    return None
+
+
+# ----------------------------------
+# Decodificação
+# ----------------------------------
+
+
+def _open_dicom(fh):
+    """Primeiro frame de um DICOM como imagem 8-bit em tons de cinza."""
+    import numpy as np  # type: ignore
+    import pydicom  # type: ignore
+
+    Image, _ = _pil_image()
+    ds = pydicom.dcmread(fh)
+    arr = ds.pixel_array
+    if arr.ndim == 3 and getattr(ds, "NumberOfFrames", 1) > 1:
+        arr = arr[0]
+    if arr.ndim == 3:
+        # Já é RGB (ex.: fotos intraorais exportadas em DICOM)
+        return Image.fromarray(arr.astype(np.uint8))
+    arr = arr.astype(np.float32)
+    lo, hi = float(arr.min()), float(arr.max())
+    scale = 255.0 / (hi - lo) if hi > lo else 0.0
+    arr8 = ((arr - lo) * scale).astype(np.uint8)
+    if getattr(ds, "PhotometricInterpretation", "") == "MONOCHROME1":
+        arr8 = 255 - arr8
+    return Image.fromarray(arr8, mode="L")
+
+
+def _open_image(media: MediaPaciente, fh):
+    Image, ImageOps = _pil_image()
+    if is_dicom(media):
+        return _open_dicom(fh)
+    img = Image.open(fh)
+    # JPEG: decodifica já reduzido (muito mais barato que abrir em 100%)
+    img.draft("RGB", (SIZES["preview"], SIZES["preview"]))
+    return ImageOps.exif_transpose(img)
+
+
+def generate_derivatives(media_id: int) -> dict[str, str]:
+    """Gera (ou regenera) todos os derivados de uma mídia.
+
+    Requer app context. Retorna {size: relative_path}.
+    Levanta ValueError se a mídia não existir.
+    """
+    media = db.session.get(MediaPaciente, media_id)
+    if media is None:
+        raise ValueError("Mídia não encontrada.")
+
+    storage = storage_service.get_storage_service()
+    with storage.open_file(media.file_path) as raw:
+        fh = raw
+        seekable = getattr(raw, "seekable", None)
+        if not (seekable and seekable()):
+            # Ex.: corpo de resposta S3; decodificadores precisam de seek
+            fh = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+            shutil.copyfileobj(raw, fh, storage_service.CHUNK_SIZE)
+            fh.seek(0)
+        base = _open_image(media, fh)
+        base.load()
+
+    fmt = "PNG" if is_dicom(media) else "JPEG"
+    if fmt == "JPEG" and base.mode not in ("RGB", "L"):
+        base = base.convert("RGB")
+
+    gerados: dict[str, str] = {}
+    # Do maior para o menor: cada redução parte da anterior
+    img = base
+    for size, lado in sorted(SIZES.items(), key=lambda kv: -kv[1]):
+        img = img.copy()
+        img.thumbnail((lado, lado))
+        buf = io.BytesIO()
+        if fmt == "JPEG":
+            img.save(buf, "JPEG", quality=82, optimize=True, progressive=True)
+        else:
+            img.save(buf, "PNG", optimize=True)
+        buf.seek(0)
+        path = derivative_path(media, size)
+        storage.save_file(
+            buf, relative_path=path, content_type=derivative_mimetype(path)
+        )
+        gerados[size] = path
+    return gerados
+
+
+# ----------------------------------
+# Pool em segundo plano
+# ----------------------------------
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(
+                current_app.config.get("MEDIA_DERIVATIVE_WORKERS") or 2
+            )
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, workers),
+                thread_name_prefix="media-derivatives",
+            )
+        return _executor
+
+
+def _run_job(app, media_id: int, tenant_schema: str) -> None:
+    try:
+        with app.app_context():
+            g.tenant_schema = tenant_schema
+            try:
+                generate_derivatives(media_id)
+            except Exception as exc:
+                app.logger.warning(
+                    f"Falha ao gerar derivados da mídia {media_id}: {exc}"
+                )
+            finally:
+                db.session.remove()
+    finally:
+        with _pending_lock:
+            _pending.discard((tenant_schema, media_id))
+
+
+def schedule_derivatives(media_id: int) -> bool:
+    """Agenda a geração dos derivados; idempotente enquanto pendente.
+
+    Retorna False quando Pillow não está instalado.
+    """
+    if not is_available():
+        return False
+    schema = current_schema()
+    with _pending_lock:
+        if (schema, media_id) in _pending:
+            return True
+        _pending.add((schema, media_id))
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    _get_executor().submit(_run_job, app, media_id, schema)
+    return True
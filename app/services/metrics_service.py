@@ -0,0 +1,272 @@
+"""Métricas de runtime no formato Prometheus (``/metrics``).
+
+Opcional: requer ``prometheus_client`` (import tardio) e
+``METRICS_ENABLED``. Sem um dos dois, todas as funções ``record_*`` são
+no-op e ``/metrics`` responde 404.
+
+- Requisições: histograma de latência por endpoint/método/status.
+- Pool do banco: espera no checkout (``TimedQueuePool``), conexões em uso e
+  tamanho do pool.
+- APScheduler: duração das execuções por job.
+- Cache de referência: acertos/erros por namespace (a taxa de acerto sai
+  de ``rate(hits) / rate(total)`` na consulta).
+- Escritas na timeline/auditoria e bytes de upload.
+
+Gunicorn (vários workers): defina ``PROMETHEUS_MULTIPROC_DIR`` (diretório
+vazio a cada deploy) antes de subir o master e, no gunicorn.conf.py::
+
+    from app.services.metrics_service import child_exit  # noqa: F401
+
+Cada worker grava em arquivos mmap nesse diretório e ``/metrics`` agrega
+todos eles (``MultiProcessCollector``).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from flask import Flask, Response, g, request
+from sqlalchemy.pool import QueuePool
+
+_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+_POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+_JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+_metrics: SimpleNamespace | None = None
+_metrics_lock = threading.Lock()
+_instrumented_schedulers: set[int] = set()
+_job_starts: dict[tuple[str, object], float] = {}
+_job_starts_lock = threading.Lock()
+
+
+def _prometheus():
+    try:
+        import prometheus_client  # type: ignore
+    except ImportError:
+        return None
+    return prometheus_client
+
+
+def is_enabled(app: Flask) -> bool:
+    return bool(app.config.get("METRICS_ENABLED")) and (
+        _prometheus() is not None
+    )
+
+
+def _build_metrics() -> SimpleNamespace | None:
+    """Cria as métricas uma vez por processo (registro global do client)."""
+    global _metrics
+    if _metrics is not None:
+        return _metrics
+    prom = _prometheus()
+    if prom is None:
+        return None
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = SimpleNamespace(
+                request_latency=prom.Histogram(
+                    "echodent_request_duration_seconds",
+                    "Latência das requisições HTTP",
+                    ["endpoint", "method", "status"],
+                    buckets=_LATENCY_BUCKETS,
+                ),
+                pool_wait=prom.Histogram(
+                    "echodent_db_pool_checkout_wait_seconds",
+                    "Espera para obter conexão do pool",
+                    buckets=_POOL_WAIT_BUCKETS,
+                ),
+                pool_checked_out=prom.Gauge(
+                    "echodent_db_pool_checked_out",
+                    "Conexões do pool em uso",
+                    multiprocess_mode="livesum",
+                ),
+                pool_size=prom.Gauge(
+                    "echodent_db_pool_size",
+                    "Tamanho configurado do pool (por processo)",
+                    multiprocess_mode="livemax",
+                ),
+                job_duration=prom.Histogram(
+                    "echodent_job_duration_seconds",
+                    "Duração das execuções de jobs do APScheduler",
+                    ["job", "status"],
+                    buckets=_JOB_BUCKETS,
+                ),
+                cache_requests=prom.Counter(
+                    "echodent_cache_requests",
+                    "Leituras do cache de referência",
+                    ["namespace", "result"],
+                ),
+                rows_written=prom.Counter(
+                    "echodent_rows_written",
+                    "Linhas inseridas em tabelas de histórico",
+                    ["table"],
+                ),
+                upload_bytes=prom.Counter(
+                    "echodent_upload_bytes",
+                    "Bytes recebidos em uploads",
+                    ["kind"],
+                ),
+            )
+    return _metrics
+
+
+# ----------------------------------
+# Pontos de instrumentação (no-op sem métricas)
+# ----------------------------------
+
+
+def record_cache(namespace: str, hit: bool) -> None:
+    if _metrics is not None:
+        _metrics.cache_requests.labels(
+            namespace, "hit" if hit else "miss"
+        ).inc()
+
+
+def record_upload(kind: str, size_bytes: int) -> None:
+    if _metrics is not None and size_bytes:
+        _metrics.upload_bytes.labels(kind).inc(size_bytes)
+
+
+def _record_row_written(mapper, connection, target) -> None:
+    if _metrics is not None:
+        _metrics.rows_written.labels(mapper.local_table.name).inc()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede a espera no checkout e o uso do pool."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        rec = super()._do_get()
+        if _metrics is not None:
+            _metrics.pool_wait.observe(time.perf_counter() - t0)
+            _metrics.pool_checked_out.set(self.checkedout())
+            _metrics.pool_size.set(self.size())
+        return rec
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        if _metrics is not None:
+            _metrics.pool_checked_out.set(self.checkedout())
+
+
+# ----------------------------------
+# APScheduler
+# ----------------------------------
+
+
+def _on_job_submitted(event) -> None:
+    now = time.perf_counter()
+    with _job_starts_lock:
+        for run_time in event.scheduled_run_times:
+            _job_starts[(event.job_id, run_time)] = now
+
+
+def _on_job_finished(event) -> None:
+    with _job_starts_lock:
+        t0 = _job_starts.pop((event.job_id, event.scheduled_run_time), None)
+    if t0 is None or _metrics is None:
+        return
+    status = "error" if event.exception else "ok"
+    _metrics.job_duration.labels(event.job_id, status).observe(
+        time.perf_counter() - t0
+    )
+
+
+def instrument_scheduler(scheduler) -> None:
+    """Registra listeners de duração de jobs (uma vez por scheduler)."""
+    if _metrics is None or id(scheduler) in _instrumented_schedulers:
+        return
+    from apscheduler.events import (
+        EVENT_JOB_ERROR,
+        EVENT_JOB_EXECUTED,
+        EVENT_JOB_SUBMITTED,
+    )
+
+    scheduler.add_listener(_on_job_submitted, EVENT_JOB_SUBMITTED)
+    scheduler.add_listener(
+        _on_job_finished, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR
+    )
+    _instrumented_schedulers.add(id(scheduler))
+
+
+# ----------------------------------
+# Integração Flask
+# ----------------------------------
+
+
+def configure_engine_options(app: Flask) -> None:
+    """Troca o pool por ``TimedQueuePool`` (chamar antes de db.init_app)."""
+    if not is_enabled(app):
+        return
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    options.setdefault("poolclass", TimedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def _before_request() -> None:
+    g._metrics_t0 = time.perf_counter()
+
+
+def _after_request(response):
+    t0 = g.pop("_metrics_t0", None)
+    if t0 is not None and _metrics is not None:
+        _metrics.request_latency.labels(
+            request.endpoint or "<unmatched>",
+            request.method,
+            str(response.status_code),
+        ).observe(time.perf_counter() - t0)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    if not is_enabled(app):
+        return
+    _build_metrics()
+    from sqlalchemy import event
+
+    from app.models import LogAuditoria, TimelineEvento
+
+    for model in (LogAuditoria, TimelineEvento):
+        if not event.contains(model, "after_insert", _record_row_written):
+            event.listen(model, "after_insert", _record_row_written)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+
+def render_latest() -> Response:
+    """Exposição no formato texto do Prometheus (agrega multiprocesso)."""
+    prom = _prometheus()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess  # type: ignore
+
+        registry = prom.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prom.REGISTRY
+    return Response(
+        prom.generate_latest(registry), mimetype=prom.CONTENT_TYPE_LATEST
+    )
+
+
+def child_exit(server, worker) -> None:
+    """Hook do gunicorn: descarta os gauges ``live*`` do worker encerrado."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess  # type: ignore
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -5,12 +5,16 @@ from collections.abc import Mapping
 from datetime import date, datetime
 from typing import Any, cast
 
-from flask import current_app
 from werkzeug.utils import secure_filename
 
 from app import db
 from app.models import Anamnese, AnamneseStatus, MediaPaciente, Paciente
-from app.services import timeline_service
+from app.services import (
+    media_derivatives_service,
+    metrics_service,
+    storage_service,
+    timeline_service,
+)
 from app.utils.sanitization import sanitizar_input
 
 
@@ -276,9 +280,10 @@ def update_anamnese(
 def save_media_file(
     paciente_id: int, file_storage, descricao: str | None, usuario_id: int
 ) -> MediaPaciente:
-    """Save file under instance/media_storage/<paciente_id>/.
+    """Save the upload through storage_service and record it.
 
-    Also record the relative path in the database.
+    - Streamed in chunks with incremental SHA-256 (no full read in memory)
+    - Content-addressed path: identical files (any patient) stored once
     """
     paciente = get_paciente_by_id(paciente_id)
     if paciente is None:
@@ -291,27 +296,37 @@ def save_media_file(
     if not filename:
         raise ValueError("Nome de arquivo inválido.")
 
-    base_dir = os.path.join(current_app.instance_path, "media_storage")
-    media_dir = os.path.join(base_dir, str(paciente_id))
-    os.makedirs(media_dir, exist_ok=True)
-
-    save_path = os.path.join(media_dir, filename)
-    relative_path = os.path.join(str(paciente_id), filename)
-
-    file_storage.save(save_path)
+    _, ext = os.path.splitext(filename)
+    content_type = getattr(file_storage, "mimetype", None) or None
+    stored = storage_service.get_storage_service().save_content_addressed(
+        file_storage.stream,
+        prefix="media",
+        extension=ext,
+        content_type=content_type,
+    )
+    metrics_service.record_upload("media", stored.size_bytes)
 
     media = MediaPaciente()
     media.paciente_id = paciente_id
-    media.file_path = relative_path
+    media.file_path = stored.relative_path
+    media.original_filename = filename
+    media.content_sha256 = stored.sha256
+    media.size_bytes = stored.size_bytes
+    media.content_type = content_type
     _desc = sanitizar_input(descricao)
     media.descricao = (
         cast(str | None, _desc) if isinstance(_desc, str) else None
     )
     db.session.add(media)
     db.session.commit()
+    # Miniatura/preview em segundo plano (opcional; não bloqueia o upload)
+    try:
+        media_derivatives_service.schedule_derivatives(media.id)
+    except Exception:
+        pass
     # Escrita dupla: registrar evento de UX após sucesso
     try:
-        descricao_log = media.descricao or os.path.basename(media.file_path)
+        descricao_log = media.descricao or media.original_filename
         timeline_service.create_timeline_evento(
             evento_tipo="DOCUMENTO",
             descricao=f"Mídia/Documento salvo: '{descricao_log}'.",
@@ -0,0 +1,282 @@
+"""Pipeline opcional de PDF no servidor (pool de processos + cache).
+
+A emissão padrão continua client-side (window.print). Quando
+``PDF_SERVER_RENDER`` está habilitado, o HTML do documento é renderizado no
+request (barato) e convertido em PDF por um pool de processos com WeasyPrint
+já carregado, fora da thread da requisição.
+
+Regras:
+- O handle do job é o SHA-256 do HTML renderizado (endereçamento por
+  conteúdo); reimpressões do mesmo LogEmissao geram o mesmo handle.
+- O PDF resultante é persistido via storage_service em
+  ``pdf_cache/<aa>/<hash>.pdf``; se já existir, nenhum trabalho é agendado.
+- O estado do job também fica no storage (compartilhado entre os workers do
+  gunicorn), ao lado do PDF: ``<hash>.pending`` (instante do agendamento) e
+  ``<hash>.error`` (mensagem da falha). Qualquer worker responde ao poll; um
+  ``.pending`` mais antigo que ``PDF_JOB_TIMEOUT_S`` (processo que morreu no
+  meio do job) conta como falha e permite reenviar.
+- Cada worker do gunicorn tem o próprio pool (``PDF_WORKERS`` processos por
+  worker); o ``.pending`` evita que dois workers gerem o mesmo documento.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import io
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import BinaryIO
+
+from flask import current_app, render_template
+
+from app.services import servico_emissao, storage_service
+
+PDF_CACHE_PREFIX = "pdf_cache"
+
+JOB_DONE = "done"
+JOB_PENDING = "pending"
+JOB_ERROR = "error"
+JOB_UNKNOWN = "unknown"
+
+_HANDLE_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+# Jobs agendados por este processo (evita reagendar; o estado está no storage)
+_jobs: dict[str, Future] = {}
+_jobs_lock = threading.Lock()
+
+MARKER_PENDING = "pending"
+MARKER_ERROR = "error"
+MAX_ERROR_CHARS = 500
+
+
+# ----------------------------------
+# Worker process (sem contexto Flask)
+# ----------------------------------
+
+
+def _warm_worker() -> None:
+    """Inicializador do processo: carrega WeasyPrint e aquece fontes."""
+    try:
+        from app.services import print_service
+
+        print_service.html_to_pdf("<p></p>", None)
+    except Exception:
+        # Falhas aparecem no primeiro job real com traceback completo
+        pass
+
+
+def _render_worker(
+    html_string: str, base_url: str | None, static_root: str | None
+) -> bytes:
+    from app.services import print_service
+
+    return print_service.html_to_pdf(html_string, base_url, static_root)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(current_app.config.get("PDF_WORKERS") or 2)
+            # spawn: workers não herdam conexões do pool nem o scheduler
+            _executor = ProcessPoolExecutor(
+                max_workers=max(1, workers),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+        return _executor
+
+
+def shutdown_pool() -> None:
+    """Encerra o pool de processos (chamado no atexit)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+    with _jobs_lock:
+        _jobs.clear()
+
+
+atexit.register(shutdown_pool)
+
+
+# ----------------------------------
+# Cache endereçado por conteúdo
+# ----------------------------------
+
+
+def is_enabled() -> bool:
+    return bool(current_app.config.get("PDF_SERVER_RENDER"))
+
+
+def content_hash(html_string: str) -> str:
+    return hashlib.sha256(html_string.encode("utf-8")).hexdigest()
+
+
+def is_valid_handle(handle: str) -> bool:
+    return bool(_HANDLE_RE.match(handle or ""))
+
+
+def cache_path(handle: str) -> str:
+    return f"{PDF_CACHE_PREFIX}/{handle[:2]}/{handle}.pdf"
+
+
+def marker_path(handle: str, kind: str) -> str:
+    return f"{PDF_CACHE_PREFIX}/{handle[:2]}/{handle}.{kind}"
+
+
+def _write_marker(storage, handle: str, kind: str, texto: str) -> None:
+    storage.save_file(
+        io.BytesIO(texto.encode("utf-8")),
+        relative_path=marker_path(handle, kind),
+        content_type="text/plain",
+    )
+
+
+def _read_marker(storage, handle: str, kind: str) -> str | None:
+    path = marker_path(handle, kind)
+    if not storage.exists(path):
+        return None
+    try:
+        with storage.open_file(path) as fh:
+            return fh.read().decode("utf-8", "replace")
+    except Exception:
+        # Removido entre exists() e a leitura (job terminou)
+        return None
+
+
+def _pending_state(storage, handle: str) -> str | None:
+    """JOB_PENDING (job em andamento), JOB_ERROR (órfão) ou None."""
+    agendado = _read_marker(storage, handle, MARKER_PENDING)
+    if agendado is None:
+        return None
+    timeout = float(current_app.config.get("PDF_JOB_TIMEOUT_S", 300))
+    try:
+        idade = time.time() - float(agendado)
+    except ValueError:
+        return JOB_ERROR
+    return JOB_PENDING if idade < timeout else JOB_ERROR
+
+
+def render_log_html(log_emissao_id: int) -> str:
+    """HTML completo (página de impressão) de um LogEmissao.
+
+    Levanta ValueError quando o log não existe ou não pode ser renderizado.
+    """
+    html_documento = servico_emissao.renderizar_documento_html(log_emissao_id)
+    return render_template(
+        "documentos/print_page.html",
+        html_documento=html_documento,
+    )
+
+
+def _persist_result(app, handle: str, future: Future) -> None:
+    """Callback do job: grava o PDF (ou a falha) no storage."""
+    try:
+        with app.app_context():
+            storage = storage_service.get_storage_service()
+            try:
+                storage.save_file(
+                    io.BytesIO(future.result()),
+                    relative_path=cache_path(handle),
+                    content_type="application/pdf",
+                )
+            except Exception as exc:
+                app.logger.error(f"Falha ao gerar PDF {handle[:12]}: {exc}")
+                try:
+                    _write_marker(
+                        storage,
+                        handle,
+                        MARKER_ERROR,
+                        str(exc)[:MAX_ERROR_CHARS] or type(exc).__name__,
+                    )
+                except Exception as exc_marker:
+                    app.logger.error(
+                        f"Falha ao registrar erro do PDF {handle[:12]}: "
+                        f"{exc_marker}"
+                    )
+            try:
+                storage.delete(marker_path(handle, MARKER_PENDING))
+            except Exception as exc:
+                app.logger.warning(
+                    f"Marcador do PDF {handle[:12]} não removido: {exc}"
+                )
+    finally:
+        with _jobs_lock:
+            if _jobs.get(handle) is future:
+                _jobs.pop(handle)
+
+
+def submit_pdf_job(log_emissao_id: int, base_url: str | None = None) -> str:
+    """Agenda a geração do PDF de um LogEmissao e retorna o handle.
+
+    Se o PDF já estiver no cache (reimpressão) ou em geração por qualquer
+    worker, retorna imediatamente sem agendar trabalho algum. Um job que
+    falhou é reagendado.
+    """
+    html_string = render_log_html(log_emissao_id)
+    handle = content_hash(html_string)
+
+    storage = storage_service.get_storage_service()
+    if storage.exists(cache_path(handle)):
+        return handle
+
+    with _jobs_lock:
+        fut = _jobs.get(handle)
+        if fut is not None and not fut.done():
+            return handle
+        if _pending_state(storage, handle) == JOB_PENDING:
+            return handle
+        _write_marker(storage, handle, MARKER_PENDING, str(time.time()))
+        storage.delete(marker_path(handle, MARKER_ERROR))
+        try:
+            fut = _get_executor().submit(
+                _render_worker,
+                html_string,
+                base_url,
+                current_app.static_folder,
+            )
+        except Exception:
+            storage.delete(marker_path(handle, MARKER_PENDING))
+            raise
+        _jobs[handle] = fut
+
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    fut.add_done_callback(lambda f: _persist_result(app, handle, f))
+    return handle
+
+
+def get_pdf_job_status(handle: str) -> str:
+    """Status do job: done | pending | error | unknown.
+
+    Lido do storage: vale para qualquer worker, não só o que agendou.
+    """
+    if not is_valid_handle(handle):
+        return JOB_UNKNOWN
+    storage = storage_service.get_storage_service()
+    if storage.exists(cache_path(handle)):
+        return JOB_DONE
+    pendente = _pending_state(storage, handle)
+    if pendente is not None:
+        return pendente
+    if storage.exists(marker_path(handle, MARKER_ERROR)):
+        return JOB_ERROR
+    return JOB_UNKNOWN
+
+
+def open_cached_pdf(handle: str) -> BinaryIO | None:
+    """Abre o PDF em cache para leitura ou retorna None se ausente."""
+    if not is_valid_handle(handle):
+        return None
+    storage = storage_service.get_storage_service()
+    path = cache_path(handle)
+    if not storage.exists(path):
+        return None
+    return storage.open_file(path)
@@ -0,0 +1,306 @@
+"""Tabela de preços versionada (``ProcedimentoPreco``).
+
+Cada procedimento tem uma sequência de vigências ``[valid_from, valid_to)``
+sem sobreposição (garantida por constraint de exclusão no banco).
+``Procedimento.valor_padrao`` continua sendo o preço atual exibido no
+catálogo; o histórico é gravado por ``registrar_precos`` sempre que o preço
+muda (cadastro, edição, ajuste em massa e desfazer).
+
+Consultas:
+
+- ``get_preco_vigente(procedimento_id, data)``: preço em uma data;
+- ``get_precos_vigentes(ids, data)``: vários procedimentos numa consulta.
+
+Procedimentos sem histórico (anteriores à tabela ou carregados fora do
+ORM) caem no ``valor_padrao``. Na primeira mudança de preço, o preço
+anterior entra no histórico a partir da data de criação do procedimento
+(``_semear_historico``), para que datas passadas não passem a mostrar o
+preço novo.
+
+Preços futuros (``agendar_preco``) entram no histórico com ``valid_from``
+adiante; ``aplicar_precos_agendados`` (job diário) copia para
+``valor_padrao`` os preços cuja vigência começou.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import (
+    Date,
+    Integer,
+    Numeric,
+    and_,
+    cast,
+    column,
+    delete,
+    exists,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.sql import func
+
+from app import db
+from app.models import Procedimento, ProcedimentoPreco
+from app.services import cache_service
+
+
+def _vigente_em(data: date):
+    preco = ProcedimentoPreco
+    return and_(
+        preco.valid_from <= data,
+        or_(preco.valid_to.is_(None), preco.valid_to > data),
+    )
+
+
+def _vigentes_stmt(ids: Iterable[int], data: date):
+    preco = ProcedimentoPreco
+    return (
+        select(
+            Procedimento.id,
+            Procedimento.nome,
+            func.coalesce(preco.valor, Procedimento.valor_padrao).label(
+                "valor"
+            ),
+        )
+        .outerjoin(
+            preco,
+            and_(preco.procedimento_id == Procedimento.id, _vigente_em(data)),
+        )
+        .where(Procedimento.id.in_(sorted(set(ids))))
+    )
+
+
+def get_precos_vigentes(
+    procedimento_ids: Iterable[int], data: date | None = None
+) -> dict[int, Decimal]:
+    """Preço vigente em ``data`` (padrão: hoje) de cada procedimento.
+
+    Uma única consulta; ids inexistentes ficam fora do dicionário.
+    """
+    stmt = _vigentes_stmt(procedimento_ids, data or date.today())
+    return {pid: valor for pid, _, valor in db.session.execute(stmt)}
+
+
+def get_preco_vigente(
+    procedimento_id: int, data: date | None = None
+) -> Decimal | None:
+    """Preço do procedimento em ``data`` (None se não existir)."""
+    return get_precos_vigentes([procedimento_id], data).get(procedimento_id)
+
+
+def resolver_procedimentos(
+    procedimento_ids: Iterable[int], data: date | None = None
+) -> dict[int, tuple[str, Decimal]]:
+    """(nome, preço vigente) por id, numa consulta (usado por create_plano)."""
+    stmt = _vigentes_stmt(procedimento_ids, data or date.today())
+    return {
+        pid: (nome, valor) for pid, nome, valor in db.session.execute(stmt)
+    }
+
+
+def get_historico(procedimento_id: int) -> list[ProcedimentoPreco]:
+    return list(
+        db.session.execute(
+            select(ProcedimentoPreco)
+            .where(ProcedimentoPreco.procedimento_id == procedimento_id)
+            .order_by(ProcedimentoPreco.valid_from)
+        ).scalars()
+    )
+
+
+def _semear_historico(
+    ids: list[int], desde: date, anteriores: Mapping[int, Decimal]
+) -> None:
+    """Vigência [criação, ``desde``) com o preço anterior, para os
+    procedimentos criados antes de ``desde`` que ainda não têm histórico.
+
+    O preço anterior vem de ``anteriores`` ou, na falta, do
+    ``valor_padrao`` gravado.
+    """
+    preco = ProcedimentoPreco
+    criado_em = cast(Procedimento.created_at, Date)
+    antes = values(
+        column("procedimento_id", Integer),
+        column("valor", Numeric(10, 2)),
+        name="anteriores",
+    ).data(
+        # VALUES vazio não é SQL válido: linha sem procedimento (id 0)
+        [(int(pid), Decimal(str(v))) for pid, v in anteriores.items()]
+        or [(0, Decimal("0"))]
+    )
+    db.session.execute(
+        insert(preco).from_select(
+            ["procedimento_id", "valor", "valid_from", "valid_to"],
+            select(
+                Procedimento.id,
+                func.coalesce(antes.c.valor, Procedimento.valor_padrao),
+                criado_em,
+                literal(desde, Date),
+            )
+            .outerjoin(antes, antes.c.procedimento_id == Procedimento.id)
+            .where(
+                Procedimento.id.in_(ids),
+                criado_em < desde,
+                ~exists().where(preco.procedimento_id == Procedimento.id),
+            ),
+        )
+    )
+
+
+def registrar_precos(
+    precos: Iterable[tuple[int, Decimal]],
+    desde: date | None = None,
+    user_id: int | None = None,
+    anteriores: Mapping[int, Decimal] | None = None,
+) -> int:
+    """Grava novas vigências a partir de ``desde`` (sem commit).
+
+    ``anteriores``: preço antes da mudança, quando o chamador já gravou o
+    novo ``valor_padrao`` (ajuste em massa, desfazer); só é usado para
+    procedimentos ainda sem histórico.
+
+    Para cada (procedimento_id, valor), em operações por conjunto:
+
+    0. procedimentos sem histórico recebem a vigência do preço anterior;
+    1. a vigência que contém ``desde`` é encerrada em ``desde``;
+    2. uma vigência que começa exatamente em ``desde`` é substituída;
+    3. a nova vigência vai até o início do próximo preço agendado (ou
+       fica aberta).
+    """
+    desde = desde or date.today()
+    precos = list(precos)
+    if not precos:
+        return 0
+    preco = ProcedimentoPreco
+    ids = sorted({int(pid) for pid, _ in precos})
+
+    _semear_historico(ids, desde, anteriores or {})
+    db.session.execute(
+        update(preco)
+        .where(
+            preco.procedimento_id.in_(ids),
+            preco.valid_from < desde,
+            or_(preco.valid_to.is_(None), preco.valid_to > desde),
+        )
+        .values(valid_to=desde)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        delete(preco)
+        .where(preco.procedimento_id.in_(ids), preco.valid_from == desde)
+        .execution_options(synchronize_session=False)
+    )
+
+    novos = values(
+        column("procedimento_id", Integer),
+        column("valor", Numeric(10, 2)),
+        name="novos",
+    ).data([(int(pid), Decimal(str(valor))) for pid, valor in precos])
+    proximo = (
+        select(func.min(preco.valid_from))
+        .where(
+            preco.procedimento_id == novos.c.procedimento_id,
+            preco.valid_from > desde,
+        )
+        .scalar_subquery()
+    )
+    db.session.execute(
+        insert(preco).from_select(
+            ["procedimento_id", "valor", "valid_from", "valid_to", "user_id"],
+            select(
+                novos.c.procedimento_id,
+                novos.c.valor,
+                literal(desde, Date),
+                proximo,
+                literal(user_id, Integer),
+            ),
+        )
+    )
+    return len(precos)
+
+
+def agendar_preco(
+    procedimento_id: int, valor, valid_from: date, user_id: int | None = None
+) -> ProcedimentoPreco:
+    """Agenda um preço futuro (ou retroativo) para um procedimento.
+
+    Atômica; se a vigência já começou, ``valor_padrao`` é atualizado.
+    """
+    proc = db.session.get(Procedimento, int(procedimento_id))
+    if proc is None:
+        raise ValueError("Procedimento não encontrado.")
+    valor = Decimal(str(valor))
+    if valor <= 0:
+        raise ValueError("Valor deve ser maior que zero.")
+
+    try:
+        registrar_precos([(proc.id, valor)], valid_from, user_id)
+        if valid_from <= date.today():
+            proc.valor_padrao = get_preco_vigente(proc.id)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        raise ValueError(f"Falha ao agendar preço: {exc}")
+    cache_service.invalidate(cache_service.NS_PROCEDIMENTOS)
+    return (
+        db.session.execute(
+            select(ProcedimentoPreco).where(
+                ProcedimentoPreco.procedimento_id == proc.id,
+                ProcedimentoPreco.valid_from == valid_from,
+            )
+        )
+        .scalars()
+        .one()
+    )
+
+
+def aplicar_precos_agendados(data: date | None = None) -> int:
+    """Copia para ``valor_padrao`` os preços vigentes em ``data``.
+
+    Um UPDATE ... FROM; só toca procedimentos cujo preço mudou.
+    """
+    data = data or date.today()
+    preco = ProcedimentoPreco
+    try:
+        alterados = db.session.execute(
+            update(Procedimento)
+            .where(
+                preco.procedimento_id == Procedimento.id,
+                _vigente_em(data),
+                Procedimento.valor_padrao != preco.valor,
+            )
+            .values(valor_padrao=preco.valor)
+            .returning(Procedimento.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        raise ValueError(f"Falha ao aplicar preços agendados: {exc}")
+    if alterados:
+        cache_service.invalidate(cache_service.NS_PROCEDIMENTOS)
+    return len(alterados)
+
+
+def aplicar_precos_agendados_job(app) -> None:
+    """Job diário do APScheduler (cada tenant)."""
+    from app.services import tenant_service
+    from app.tenancy import default_schema
+
+    with app.app_context():
+        schemas = {default_schema()}
+        if app.config.get("MULTI_TENANT_ENABLED"):
+            schemas |= tenant_service.get_active_schemas()
+        for schema in sorted(schemas):
+            with tenant_service.use_tenant(schema):
+                try:
+                    aplicar_precos_agendados()
+                except ValueError as exc:
+                    app.logger.error("Preços agendados (%s): %s", schema, exc)
@@ -1,10 +1,51 @@
 from __future__ import annotations
 
-from collections.abc import Mapping
+import os
+from collections.abc import Callable, Mapping
 from typing import Any
+from urllib.parse import urlparse
 
 from flask import render_template
-from weasyprint import HTML as WeasyPrint
+
+
+def _weasyprint():
+    # Lazy import: WeasyPrint pulls native libs (Pango/Cairo) and is optional
+    import weasyprint  # type: ignore
+
+    return weasyprint
+
+
+def _static_url_fetcher(static_root: str) -> Callable[[str], dict]:
+    """Resolve /static/... URLs from disk instead of HTTP self-requests."""
+    weasyprint = _weasyprint()
+
+    def fetcher(url: str) -> dict:
+        path = urlparse(url).path
+        if path.startswith("/static/"):
+            local = os.path.join(static_root, path[len("/static/") :])
+            return weasyprint.default_url_fetcher(f"file://{local}")
+        return weasyprint.default_url_fetcher(url)
+
+    return fetcher
+
+
+def html_to_pdf(
+    html_string: str,
+    base_url: str | None,
+    static_root: str | None = None,
+) -> bytes:
+    """Convert an already-rendered HTML string to PDF bytes (WeasyPrint).
+
+    - static_root: when given, /static/ assets are read from this folder
+    """
+    weasyprint = _weasyprint()
+    kwargs: dict[str, Any] = {"string": html_string, "base_url": base_url}
+    if static_root:
+        kwargs["url_fetcher"] = _static_url_fetcher(static_root)
+    doc = weasyprint.HTML(**kwargs)
+
+    # Generate PDF bytes (ensure bytes fallback to satisfy type checkers)
+    return doc.write_pdf() or b""
 
 
 def generate_pdf(
@@ -19,10 +60,4 @@ def generate_pdf(
     - base_url: Base URL for resolving relative assets (CSS, images)
     """
     html_string = render_template(template_name_or_string, **(context or {}))
-
-    # Instantiate WeasyPrint with the rendered HTML
-    doc = WeasyPrint(string=html_string, base_url=base_url)
-
-    # Generate PDF bytes (ensure bytes fallback to satisfy type checkers)
-    pdf_bytes = doc.write_pdf() or b""
-    return pdf_bytes
+    return html_to_pdf(html_string, base_url)
@@ -4,7 +4,7 @@ Fase 2: Página Tratamentos
 
 CRUD de procedimentos com:
 - Soft-delete (is_active=False)
-- Ajuste de preços em massa
+- Ajuste de preços em massa (UPDATE único no servidor, com desfazer)
 - Log de auditoria obrigatório
 - Atomicidade (try/commit/rollback)
 """
@@ -12,8 +12,18 @@ CRUD de procedimentos com:
 from decimal import Decimal
 
 from flask import current_app
+from sqlalchemy import (
+    Integer,
+    Numeric,
+    column,
+    func,
+    select,
+    update,
+    values,
+)
 
 from app.models import CategoriaEnum, LogAuditoria, Procedimento, db
+from app.services import cache_service, precos_service
 from app.utils.sanitization import sanitizar_input
 
 # Lista de categorias fixas (para UI)
@@ -106,7 +116,12 @@ def create_tratamento(data: dict, user_id: int) -> Procedimento | None:
         )
 
         db.session.add(proc)
+        db.session.flush()
+        precos_service.registrar_precos(
+            [(proc.id, valor_padrao)], None, user_id
+        )
         db.session.commit()
+        cache_service.invalidate(cache_service.NS_PROCEDIMENTOS)
 
         # Log de auditoria
         log = LogAuditoria()
@@ -183,12 +198,17 @@ def update_tratamento(
             novo_valor = Decimal(str(data["valor_padrao"]))
             if novo_valor <= 0:
                 raise ValueError("Valor padrão deve ser maior que zero")
+            if novo_valor != proc.valor_padrao:
+                precos_service.registrar_precos(
+                    [(proc.id, novo_valor)], None, user_id
+                )
             proc.valor_padrao = novo_valor
 
         if "descricao" in data:
             proc.descricao = sanitizar_input(data["descricao"].strip()) or None
 
         db.session.commit()
+        cache_service.invalidate(cache_service.NS_PROCEDIMENTOS)
 
         # Log de auditoria
         log = LogAuditoria()
@@ -243,6 +263,7 @@ def soft_delete_tratamento(proc_id: int, user_id: int) -> bool:
 
         proc.is_active = False
         db.session.commit()
+        cache_service.invalidate(cache_service.NS_PROCEDIMENTOS)
 
         # Log de auditoria
         log = LogAuditoria()
@@ -270,6 +291,75 @@ def soft_delete_tratamento(proc_id: int, user_id: int) -> bool:
         return False
 
 
+OPERACAO_AJUSTE = "ajuste_em_massa"
+OPERACAO_DESFAZER = "desfazer_ajuste"
+
+
+def _fator(percentual: float) -> Decimal:
+    return 1 + Decimal(str(percentual)) / 100
+
+
+def _categoria_enum(categoria: str | None) -> CategoriaEnum | None:
+    if not categoria:
+        return None
+    try:
+        return CategoriaEnum(categoria)
+    except ValueError:
+        raise ValueError(f"Categoria inválida: {categoria}")
+
+
+def _alvos_ajuste(percentual: float, categoria: str | None):
+    """SELECT dos ativos afetados: id, nome, categoria, antigo, novo.
+
+    Mesmo critério do UPDATE: ``round(valor_padrao * fator, 2)`` no
+    servidor, ignorando ajustes que deixariam preço zero/negativo.
+    """
+    novo = func.round(Procedimento.valor_padrao * _fator(percentual), 2)
+    stmt = select(
+        Procedimento.id,
+        Procedimento.nome,
+        Procedimento.categoria,
+        Procedimento.valor_padrao.label("antigo"),
+        novo.label("novo"),
+    ).where(Procedimento.is_active.is_(True), novo > 0)
+    categoria_enum = _categoria_enum(categoria)
+    if categoria_enum is not None:
+        stmt = stmt.where(Procedimento.categoria == categoria_enum)
+    return stmt
+
+
+def _item_preview(nome: str, categoria, antigo, novo) -> dict:
+    return {
+        "nome": nome,
+        "categoria": categoria.value,
+        "preco_antigo": float(antigo),
+        "preco_novo": float(novo),
+    }
+
+
+def previsualizar_ajuste(
+    percentual: float, categoria: str | None = None, limite: int = 10
+) -> dict:
+    """
+    Preview do ajuste em massa calculado no servidor (sem alterar dados).
+
+    Returns:
+        {'total_afetados': int, 'preview': [primeiros ``limite`` itens]}
+    """
+    alvos = _alvos_ajuste(percentual, categoria).subquery()
+    rows = db.session.execute(
+        select(alvos, func.count().over().label("total"))
+        .order_by(alvos.c.categoria, alvos.c.nome)
+        .limit(limite)
+    ).all()
+    return {
+        "total_afetados": rows[0].total if rows else 0,
+        "preview": [
+            _item_preview(r.nome, r.categoria, r.antigo, r.novo) for r in rows
+        ],
+    }
+
+
 def ajustar_precos_em_massa(
     percentual: float,
     categoria: str | None = None,
@@ -278,6 +368,11 @@ def ajustar_precos_em_massa(
     """
     Ajusta preços de tratamentos em massa com percentual.
 
+    Um único ``UPDATE ... FROM (SELECT ...) RETURNING`` no servidor; o
+    before_flush de auditoria não participa (nenhum objeto é carregado) e
+    um único ``LogAuditoria`` compacto guarda os pares antigo/novo, usados
+    por ``desfazer_ajuste_em_massa``.
+
     Args:
         percentual: Percentual (5.0 => +5%, -3.0 => -3%)
         categoria: Filtro opcional por categoria
@@ -291,83 +386,185 @@ def ajustar_precos_em_massa(
                 {'nome': str, 'preco_antigo': float, 'preco_novo': float},
                 ...
             ],
+            'log_id': int (quando auditado),
             'erro': str (opcional)
         }
     """
     try:
-        query = db.session.query(Procedimento).filter_by(is_active=True)
-
-        if categoria:
-            try:
-                categoria_enum = CategoriaEnum(categoria)
-                query = query.filter_by(categoria=categoria_enum)
-            except ValueError:
-                return {
-                    "sucesso": False,
-                    "erro": f"Categoria inválida: {categoria}",
-                }
-
-        tratamentos = query.all()
-        afetados = 0
-        preview = []
-
-        for proc in tratamentos:
-            preco_antigo = proc.valor_padrao
-            preco_novo = preco_antigo * (1 + Decimal(percentual) / 100)
-            preco_novo = preco_novo.quantize(
-                Decimal("0.01")
-            )  # Arredondar para 2 casas
-
-            # Validar que preço novo é positivo
-            if preco_novo <= 0:
-                # Ignorar ajustes que deixariam preço zero/negativo
-                continue
-
-            proc.valor_padrao = preco_novo
-            afetados += 1
-
-            # Preview dos 10 primeiros
-            if len(preview) < 10:
-                preview.append(
-                    {
-                        "nome": proc.nome,
-                        "categoria": proc.categoria.value,
-                        "preco_antigo": float(preco_antigo),
-                        "preco_novo": float(preco_novo),
-                    }
-                )
-
-        db.session.commit()
+        alvos = (
+            _alvos_ajuste(percentual, categoria)
+            .with_for_update(of=Procedimento)
+            .cte("alvos")
+        )
+        stmt = (
+            update(Procedimento)
+            .where(Procedimento.id == alvos.c.id)
+            .values(valor_padrao=alvos.c.novo)
+            .returning(
+                Procedimento.id,
+                Procedimento.nome,
+                Procedimento.categoria,
+                alvos.c.antigo,
+                Procedimento.valor_padrao,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = sorted(
+            db.session.execute(stmt).all(),
+            key=lambda r: (r.categoria.value, r.nome),
+        )
+        preview = [
+            _item_preview(r.nome, r.categoria, r.antigo, r.valor_padrao)
+            for r in rows[:10]
+        ]
+        precos_service.registrar_precos(
+            [(r.id, r.valor_padrao) for r in rows],
+            None,
+            user_id,
+            anteriores={r.id: r.antigo for r in rows},
+        )
 
-        # Log de auditoria (operação em massa)
+        log = None
         if user_id:
+            # Log de auditoria compacto (operação em massa)
             log = LogAuditoria()
             log.user_id = user_id
             log.action = "update"
             log.model_name = "procedimentos"
             log.model_id = 0  # Operação em massa
             log.changes_json = {
+                "operacao": OPERACAO_AJUSTE,
                 "percentual": percentual,
                 "categoria": categoria,
-                "afetados": afetados,
+                "afetados": len(rows),
                 "preview": preview,
+                # [id, antigo, novo] (strings para não perder precisão)
+                "precos": [
+                    [r.id, str(r.antigo), str(r.valor_padrao)] for r in rows
+                ],
             }
             db.session.add(log)
-            db.session.commit()
+
+        db.session.commit()
+        cache_service.invalidate(cache_service.NS_PROCEDIMENTOS)
 
         msg = (
-            f"Ajuste em massa: {afetados} tratamentos ("
+            f"Ajuste em massa: {len(rows)} tratamentos ("
             f"{percentual:+.1f}%) por user {user_id}"
         )
         current_app.logger.info(msg)
 
-        return {
+        resultado = {
             "sucesso": True,
-            "afetados": afetados,
+            "afetados": len(rows),
             "preview": preview,
         }
+        if log is not None:
+            resultado["log_id"] = log.id
+        return resultado
 
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Erro ao ajustar preços: {e}")
         return {"sucesso": False, "erro": str(e)}
+
+
+def _ajustes_desfaziveis():
+    dados = LogAuditoria.changes_json
+    return db.session.query(LogAuditoria).filter(
+        LogAuditoria.model_name == "procedimentos",
+        LogAuditoria.model_id == 0,
+        dados["operacao"].astext == OPERACAO_AJUSTE,
+        ~dados.has_key("desfeito_por"),
+    )
+
+
+def ultimo_ajuste_desfazivel() -> LogAuditoria | None:
+    """Último ajuste em massa auditado que ainda não foi desfeito."""
+    return _ajustes_desfaziveis().order_by(LogAuditoria.id.desc()).first()
+
+
+def desfazer_ajuste_em_massa(log_id: int, user_id: int) -> dict:
+    """
+    Restaura os preços anteriores de um ajuste em massa auditado.
+
+    Só reverte tratamentos cujo preço ainda é o valor aplicado pelo ajuste
+    (``WHERE valor_padrao = novo``); os alterados depois disso são
+    mantidos e listados em 'ignorados'. O log original é marcado com
+    ``desfeito_por`` e não pode ser desfeito novamente.
+
+    Returns:
+        {'sucesso': bool, 'revertidos': int, 'ignorados': [ids],
+         'erro': str (opcional)}
+    """
+    try:
+        log = _ajustes_desfaziveis().filter(LogAuditoria.id == log_id).first()
+        if log is None:
+            raise ValueError("Ajuste não encontrado ou já desfeito")
+
+        precos = log.changes_json.get("precos") or []
+        revertidos: list[int] = []
+        if precos:
+            anteriores = values(
+                column("id", Integer),
+                column("antigo", Numeric(10, 2)),
+                column("novo", Numeric(10, 2)),
+                name="anteriores",
+            ).data(
+                [
+                    (int(pid), Decimal(antigo), Decimal(novo))
+                    for pid, antigo, novo in precos
+                ]
+            )
+            stmt = (
+                update(Procedimento)
+                .where(
+                    Procedimento.id == anteriores.c.id,
+                    Procedimento.valor_padrao == anteriores.c.novo,
+                )
+                .values(valor_padrao=anteriores.c.antigo)
+                .returning(Procedimento.id)
+                .execution_options(synchronize_session=False)
+            )
+            revertidos = list(db.session.execute(stmt).scalars())
+            antigos = {int(pid): antigo for pid, antigo, _ in precos}
+            novos = {int(pid): novo for pid, _, novo in precos}
+            precos_service.registrar_precos(
+                [(pid, antigos[pid]) for pid in revertidos],
+                None,
+                user_id,
+                anteriores={pid: novos[pid] for pid in revertidos},
+            )
+        ignorados = sorted({int(p[0]) for p in precos} - set(revertidos))
+
+        desfazer = LogAuditoria()
+        desfazer.user_id = user_id
+        desfazer.action = "update"
+        desfazer.model_name = "procedimentos"
+        desfazer.model_id = 0
+        desfazer.changes_json = {
+            "operacao": OPERACAO_DESFAZER,
+            "ajuste_log_id": log.id,
+            "revertidos": len(revertidos),
+            "ignorados": ignorados,
+        }
+        db.session.add(desfazer)
+        db.session.flush()
+        log.changes_json = {**log.changes_json, "desfeito_por": desfazer.id}
+
+        db.session.commit()
+        cache_service.invalidate(cache_service.NS_PROCEDIMENTOS)
+        current_app.logger.info(
+            f"Ajuste em massa {log_id} desfeito: {len(revertidos)} "
+            f"tratamentos por user {user_id}"
+        )
+        return {
+            "sucesso": True,
+            "revertidos": len(revertidos),
+            "ignorados": ignorados,
+        }
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erro ao desfazer ajuste: {e}")
+        return {"sucesso": False, "erro": str(e)}
@@ -0,0 +1,278 @@
+"""Expurgo em lotes por faixa de chave primária (logs, auditoria, timeline).
+
+Um ``DELETE ... WHERE timestamp < :corte`` único segura locks e gera WAL
+proporcional à tabela inteira numa transação só. Aqui cada lote:
+
+- cobre a faixa ``(cursor, fim]`` da PK, com ``fim`` escolhido para conter
+  no máximo ``lote`` linhas elegíveis (busca pelo índice da PK);
+- roda na própria transação curta, com ``lock_timeout`` local;
+- opcionalmente move as linhas para uma tabela de arquivo
+  (``DELETE ... RETURNING`` + ``INSERT`` num único comando);
+- é seguido de uma pausa (``pausa_s``) para não monopolizar I/O.
+
+Retomada: o último ``fim`` concluído é gravado em
+``public.purge_checkpoints`` (schema + chave) na mesma transação do lote;
+uma execução interrompida, em qualquer host, continua dali. Ao terminar, o
+checkpoint é removido e a próxima execução recomeça do início (linhas que
+passaram a ser elegíveis abaixo do checkpoint entram nela).
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app import db
+from app.models import PurgeCheckpoint
+from app.tenancy import current_schema
+
+LOTE_PADRAO = 5000
+PAUSA_PADRAO_S = 0.1
+LOCK_TIMEOUT_MS = 2000
+
+
+@dataclass
+class PurgeResult:
+    chave: str
+    removidos: int = 0
+    lotes: int = 0
+    cursor: int | None = None
+    limite: int | None = None
+    concluido: bool = False
+    retomado: bool = False
+    duracao_s: float = 0.0
+
+
+# ----------------------------------
+# Checkpoints
+# ----------------------------------
+
+
+def load_checkpoint(schema: str, chave: str) -> int | None:
+    return db.session.execute(
+        select(PurgeCheckpoint.cursor).where(
+            PurgeCheckpoint.schema_name == schema,
+            PurgeCheckpoint.chave == chave,
+        )
+    ).scalar()
+
+
+def load_checkpoints() -> dict[str, int]:
+    """Checkpoints pendentes como ``{"schema:chave": cursor}``."""
+    linhas = db.session.execute(
+        select(
+            PurgeCheckpoint.schema_name,
+            PurgeCheckpoint.chave,
+            PurgeCheckpoint.cursor,
+        )
+    )
+    return {f"{schema}:{chave}": cursor for schema, chave, cursor in linhas}
+
+
+def _gravar_checkpoint(schema: str, chave: str, cursor: int | None) -> None:
+    """Grava/remove o checkpoint na transação corrente (sem commit)."""
+    if cursor is None:
+        db.session.execute(
+            delete(PurgeCheckpoint).where(
+                PurgeCheckpoint.schema_name == schema,
+                PurgeCheckpoint.chave == chave,
+            )
+        )
+        return
+    stmt = pg_insert(PurgeCheckpoint).values(
+        schema_name=schema, chave=chave, cursor=cursor, updated_at=func.now()
+    )
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[
+                PurgeCheckpoint.schema_name,
+                PurgeCheckpoint.chave,
+            ],
+            set_={"cursor": stmt.excluded.cursor, "updated_at": func.now()},
+        )
+    )
+
+
+def _schema_checkpoint(model) -> str:
+    return model.__table__.schema or current_schema()
+
+
+# ----------------------------------
+# Expurgo
+# ----------------------------------
+
+
+def _remover_lote(model, janela, arquivo) -> int:
+    stmt = delete(model).where(*janela)
+    if arquivo is None:
+        return db.session.execute(
+            stmt.execution_options(synchronize_session=False)
+        ).rowcount
+    colunas = [c.name for c in model.__table__.columns]
+    movidos = stmt.returning(*model.__table__.columns).cte("movidos")
+    # rowcount não é confiável para INSERT ... SELECT via sessão ORM
+    copiados = db.session.execute(
+        insert(arquivo)
+        .from_select(colunas, select(*(movidos.c[nome] for nome in colunas)))
+        .returning(arquivo.__mapper__.primary_key[0])
+    )
+    return len(copiados.all())
+
+
+def purgar_em_lotes(
+    model,
+    criterio=None,
+    *,
+    chave: str,
+    lote: int | None = None,
+    pausa_s: float | None = None,
+    arquivo=None,
+    max_lotes: int | None = None,
+    retomar: bool = True,
+    progress: Callable[[PurgeResult], None] | None = None,
+) -> PurgeResult:
+    """Remove (ou arquiva em ``arquivo``) as linhas de ``model``.
+
+    ``criterio``: expressão SQL das linhas elegíveis (None = todas).
+    ``chave``: identifica o expurgo no checkpoint (ex.: "devlogs").
+    ``max_lotes``: para após N lotes, deixando o checkpoint para a próxima
+    execução. ``progress`` é chamado após cada lote confirmado.
+    ``lote``/``pausa_s`` padrão: ``PURGE_BATCH_SIZE``/``PURGE_PAUSE_S``.
+
+    Levanta ValueError para modelos sem PK inteira simples; erros de banco
+    (ex.: lock_timeout) propagam após rollback, com o checkpoint preservado.
+    """
+    cfg = current_app.config
+    if lote is None:
+        lote = int(cfg.get("PURGE_BATCH_SIZE") or LOTE_PADRAO)
+    if pausa_s is None:
+        pausa_s = float(cfg.get("PURGE_PAUSE_S", PAUSA_PADRAO_S))
+    pks = model.__mapper__.primary_key
+    if len(pks) != 1 or pks[0].type.python_type is not int:
+        raise ValueError(f"{model.__name__}: PK inteira simples exigida.")
+    if lote < 1:
+        raise ValueError("Tamanho de lote inválido.")
+    pk = pks[0]
+    filtros = [] if criterio is None else [criterio]
+    schema = _schema_checkpoint(model)
+    resultado = PurgeResult(chave=f"{schema}:{chave}")
+    inicio = time.monotonic()
+
+    menor, maior = db.session.execute(
+        select(func.min(pk), func.max(pk)).where(*filtros)
+    ).one()
+    if maior is None:
+        _gravar_checkpoint(schema, chave, None)
+        db.session.commit()
+        resultado.concluido = True
+        return resultado
+
+    cursor = load_checkpoint(schema, chave) if retomar else None
+    db.session.rollback()
+    resultado.retomado = cursor is not None
+    if cursor is None or cursor < menor - 1:
+        cursor = menor - 1
+    resultado.cursor, resultado.limite = cursor, maior
+
+    try:
+        while cursor < maior:
+            fim = db.session.execute(
+                select(pk)
+                .where(pk > cursor, pk <= maior, *filtros)
+                .order_by(pk)
+                .offset(lote - 1)
+                .limit(1)
+            ).scalar()
+            if fim is None:
+                fim = maior
+            db.session.execute(
+                text(f"SET LOCAL lock_timeout = {int(LOCK_TIMEOUT_MS)}")
+            )
+            removidos = _remover_lote(
+                model, [pk > cursor, pk <= fim, *filtros], arquivo
+            )
+            # Lote e checkpoint confirmados juntos
+            _gravar_checkpoint(schema, chave, fim if fim < maior else None)
+            db.session.commit()
+
+            cursor = fim
+            resultado.cursor = cursor
+            resultado.removidos += max(removidos, 0)
+            resultado.lotes += 1
+            if progress is not None:
+                progress(resultado)
+            if max_lotes is not None and resultado.lotes >= max_lotes:
+                break
+            if pausa_s and cursor < maior:
+                time.sleep(pausa_s)
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        resultado.duracao_s = time.monotonic() - inicio
+
+    resultado.concluido = cursor >= maior
+    if resultado.concluido and not resultado.lotes:
+        # Checkpoint já no fim da faixa: nada a remover, só limpa
+        _gravar_checkpoint(schema, chave, None)
+        db.session.commit()
+    return resultado
+
+
+# ----------------------------------
+# Job de retenção
+# ----------------------------------
+
+
+def aplicar_retencao_job(app) -> None:
+    """Job diário de retenção.
+
+    Devlogs e histórico de jobs (public); auditoria e timeline (cada tenant).
+    """
+    from app.services import (
+        audit_service,
+        jobs_service,
+        log_service,
+        tenant_service,
+        timeline_service,
+    )
+    from app.tenancy import default_schema
+
+    with app.app_context():
+        log_service.purge_old_logs()
+        try:
+            jobs_service.purgar_historico()
+        except Exception as exc:
+            app.logger.error("Retenção do histórico de jobs: %s", exc)
+
+        schemas = {default_schema()}
+        if app.config.get("MULTI_TENANT_ENABLED"):
+            schemas |= tenant_service.get_active_schemas()
+        for schema in sorted(schemas):
+            with tenant_service.use_tenant(schema):
+                for etapa in (
+                    audit_service.purgar_auditoria_antiga,
+                    timeline_service.arquivar_eventos_antigos,
+                ):
+                    try:
+                        res = etapa()
+                    except Exception as exc:
+                        app.logger.error(
+                            "Retenção %s (%s): %s",
+                            etapa.__name__,
+                            schema,
+                            exc,
+                        )
+                        continue
+                    if res is not None and res.removidos:
+                        app.logger.info(
+                            "Retenção %s: %s linha(s) em %s lote(s)",
+                            res.chave,
+                            res.removidos,
+                            res.lotes,
+                        )
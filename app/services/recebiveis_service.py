@@ -0,0 +1,155 @@
+"""Contas a receber: carnês vencidos e envelhecimento (aging) da clínica.
+
+Mesma regra do ``get_carne_detalhado`` (Regra 4), mas para todos os planos
+de uma vez: o previsto acumulado por plano vem de uma window function
+(``SUM() OVER (PARTITION BY plano_id ORDER BY data_vencimento)``) e é
+comparado ao total pago do plano. O valor vencido de cada parcela é a parte
+do previsto acumulado ainda não coberta pelos pagamentos, limitada ao valor
+da própria parcela.
+
+Pago = ``financeiro_service.valor_pago_expr`` (pagamentos menos estornos de
+pagamentos), a mesma definição do carnê e do saldo do plano.
+Só parcelas com vencimento anterior à data-base entram na consulta, o que
+permite usar o índice de ``parcela_prevista.data_vencimento``; o acumulado
+não muda com o filtro porque a janela é ordenada pelo próprio vencimento.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import Integer, case, cast, literal, select
+from sqlalchemy.sql import func
+
+from app import db
+from app.models import (
+    LancamentoFinanceiro,
+    Paciente,
+    ParcelaPrevista,
+    PlanoTratamento,
+    StatusPlanoEnum,
+)
+from app.services.financeiro_service import valor_pago_expr
+
+# (chave, menor dia, maior dia) — dias de atraso desde o vencimento
+FAIXAS = (
+    ("0-30", 0, 30),
+    ("31-60", 31, 60),
+    ("61-90", 61, 90),
+    ("90+", 91, None),
+)
+STATUS_COBRAVEIS = (StatusPlanoEnum.APROVADO, StatusPlanoEnum.CONCLUIDO)
+
+_ZERO = Decimal("0.00")
+
+
+def _pagos():
+    """Total pago por plano (mesma regra do carnê)."""
+    lanc = LancamentoFinanceiro
+    return (
+        select(
+            lanc.plano_id.label("plano_id"),
+            func.sum(valor_pago_expr()).label("pago"),
+        )
+        .group_by(lanc.plano_id)
+        .cte("pagos")
+    )
+
+
+def _parcelas_vencidas(data_base: date):
+    parcela = ParcelaPrevista
+    previsto_acumulado = func.sum(parcela.valor_previsto).over(
+        partition_by=parcela.plano_id,
+        order_by=(parcela.data_vencimento, parcela.id),
+    )
+    return (
+        select(
+            parcela.plano_id,
+            parcela.data_vencimento,
+            parcela.valor_previsto,
+            previsto_acumulado.label("previsto_acumulado"),
+        )
+        .join(PlanoTratamento, PlanoTratamento.id == parcela.plano_id)
+        .where(
+            parcela.data_vencimento < data_base,
+            PlanoTratamento.status.in_(STATUS_COBRAVEIS),
+        )
+        .cte("parcelas")
+    )
+
+
+def aging(
+    data_base: date | None = None, faixa_minima: str | None = None
+) -> SimpleNamespace:
+    """Planos com parcelas vencidas e não cobertas, por faixa de atraso.
+
+    Uma única consulta para a clínica inteira. ``faixa_minima`` (chave de
+    ``FAIXAS``) descarta planos cujo atraso mais antigo é menor que a faixa.
+
+    Retorno: ``planos`` (maior atraso primeiro) com ``por_faixa`` e
+    ``total_vencido``; ``totais`` por faixa e ``total`` geral.
+    """
+    data_base = data_base or date.today()
+    pagos = _pagos()
+    parcelas = _parcelas_vencidas(data_base)
+
+    pago = func.coalesce(pagos.c.pago, 0)
+    descoberto = parcelas.c.previsto_acumulado - pago
+    vencido = func.least(parcelas.c.valor_previsto, descoberto)
+    dias = cast(literal(data_base) - parcelas.c.data_vencimento, Integer)
+
+    def _soma_faixa(menor: int, maior: int | None):
+        cond = dias >= menor if maior is None else dias.between(menor, maior)
+        return func.sum(case((cond, vencido), else_=0))
+
+    stmt = (
+        select(
+            parcelas.c.plano_id,
+            Paciente.id.label("paciente_id"),
+            Paciente.nome_completo,
+            Paciente.telefone,
+            func.count().label("parcelas"),
+            func.min(parcelas.c.data_vencimento).label("vencimento_antigo"),
+            func.max(dias).label("dias_atraso"),
+            func.sum(vencido).label("total_vencido"),
+            *(
+                _soma_faixa(menor, maior).label(f"faixa_{i}")
+                for i, (_, menor, maior) in enumerate(FAIXAS)
+            ),
+        )
+        .select_from(parcelas)
+        .outerjoin(pagos, pagos.c.plano_id == parcelas.c.plano_id)
+        .join(PlanoTratamento, PlanoTratamento.id == parcelas.c.plano_id)
+        .join(Paciente, Paciente.id == PlanoTratamento.paciente_id)
+        .where(descoberto > 0)
+        .group_by(parcelas.c.plano_id, Paciente.id)
+        .order_by(func.max(dias).desc(), parcelas.c.plano_id)
+    )
+    if faixa_minima is not None:
+        chaves = {chave: menor for chave, menor, _ in FAIXAS}
+        if faixa_minima not in chaves:
+            raise ValueError("Faixa de atraso inválida.")
+        stmt = stmt.having(func.max(dias) >= chaves[faixa_minima])
+
+    planos = []
+    totais = {chave: _ZERO for chave, _, _ in FAIXAS}
+    for row in db.session.execute(stmt):
+        dados = row._asdict()
+        por_faixa = {
+            chave: Decimal(dados.pop(f"faixa_{i}"))
+            for i, (chave, _, _) in enumerate(FAIXAS)
+        }
+        for chave, valor in por_faixa.items():
+            totais[chave] += valor
+        dados["total_vencido"] = Decimal(dados["total_vencido"])
+        planos.append(SimpleNamespace(por_faixa=por_faixa, **dados))
+
+    return SimpleNamespace(
+        data_base=data_base,
+        faixas=[chave for chave, _, _ in FAIXAS],
+        planos=planos,
+        totais=totais,
+        total=sum(totais.values(), _ZERO),
+    )
@@ -0,0 +1,552 @@
+"""Relatório financeiro gerencial (cubo mensal por dentista e categoria).
+
+O cubo fica em ``RelatorioFinanceiroMensal`` e é atualizado de forma
+incremental:
+
+- ``app/events.py`` marca em ``RelatorioMesPendente`` os meses afetados a
+  cada flush de planos, itens e lançamentos (mês de criação do plano,
+  meses dos lançamentos do plano e mês atual/anterior do lançamento);
+- ``atualizar_relatorio`` recalcula só os meses pendentes, em lotes com
+  commit próprio (transações curtas, sem travar tabelas por muito tempo);
+- ``atualizar_relatorios_job`` roda no APScheduler para cada tenant.
+
+Cargas que não passam pelo ORM (``bulk_loader.copy_rows``) exigem
+``atualizar_relatorio(completo=True)`` (``flask relatorio-financeiro
+--completo``).
+
+Exportação CSV/XLSX lê o cubo com cursor no servidor (``yield_per``) e
+escreve em blocos; XLSX requer ``openpyxl`` (opcional).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import tempfile
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, time
+from decimal import ROUND_HALF_UP, Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import (
+    Date,
+    Numeric,
+    String,
+    case,
+    cast,
+    delete,
+    insert,
+    inspect,
+    literal,
+    select,
+    union,
+)
+from sqlalchemy.sql import func
+
+from app import db
+from app.models import (
+    ItemPlano,
+    LancamentoFinanceiro,
+    PlanoTratamento,
+    Procedimento,
+    RelatorioFinanceiroMensal,
+    RelatorioMesPendente,
+    StatusPlanoEnum,
+    Usuario,
+)
+from app.services import financeiro_service
+
+SEM_CATEGORIA = "SEM_CATEGORIA"
+LOTE_MESES = 12
+EXPORT_CHUNK = 1000
+STATUS_FATURADOS = (StatusPlanoEnum.APROVADO, StatusPlanoEnum.CONCLUIDO)
+DIMENSOES = ("mes", "dentista_id", "categoria")
+COLUNAS_EXPORT = (
+    "mes",
+    "dentista_id",
+    "dentista",
+    "categoria",
+    "receita",
+    "faturado",
+    "em_aberto",
+    "qtd_planos",
+    "ticket_medio",
+)
+
+_CENTAVO = Decimal("0.01")
+_ZERO = Decimal("0.00")
+
+
+def _mes(coluna):
+    return cast(func.date_trunc("month", coluna), Date)
+
+
+def _primeiro_dia(valor: date) -> date:
+    return valor.replace(day=1)
+
+
+def _proximo_mes(mes: date) -> date:
+    return date(mes.year + (mes.month == 12), mes.month % 12 + 1, 1)
+
+
+def _inicio(dia: date) -> datetime:
+    # Naive: interpretado no fuso da sessão, como date_trunc/CAST
+    return datetime.combine(dia, time.min)
+
+
+def _centavos(valor) -> Decimal:
+    return Decimal(valor or 0).quantize(_CENTAVO, rounding=ROUND_HALF_UP)
+
+
+# ----------------------------------
+# Cálculo
+# ----------------------------------
+
+
+def _pesos(planos_ids):
+    """CTE (plano_id, categoria, peso) restrita a ``planos_ids``.
+
+    Peso = valor dos itens da categoria / valor dos itens do plano; planos
+    só com itens zerados dividem igualmente entre as categorias.
+    """
+    categoria = func.coalesce(
+        cast(Procedimento.categoria, String), SEM_CATEGORIA
+    )
+    itens = (
+        select(
+            ItemPlano.plano_id,
+            categoria.label("categoria"),
+            func.sum(ItemPlano.valor_cobrado).label("valor"),
+        )
+        .outerjoin(Procedimento, Procedimento.id == ItemPlano.procedimento_id)
+        .where(ItemPlano.plano_id.in_(planos_ids))
+        .group_by(ItemPlano.plano_id, categoria)
+        .cte("itens")
+    )
+    total = func.sum(itens.c.valor).over(partition_by=itens.c.plano_id)
+    qtd = func.count().over(partition_by=itens.c.plano_id)
+    peso = case(
+        (total == 0, cast(literal(1), Numeric) / qtd),
+        else_=itens.c.valor / total,
+    )
+    return select(itens.c.plano_id, itens.c.categoria, peso.label("peso")).cte(
+        "pesos"
+    )
+
+
+def _calcular_meses(meses: list[date]) -> list[dict]:
+    """Linhas do cubo para ``meses`` (primeiros dias), sem gravar."""
+    plano = PlanoTratamento
+    lanc = LancamentoFinanceiro
+    inicio, fim = _inicio(min(meses)), _inicio(_proximo_mes(max(meses)))
+
+    # Receita: pagamentos e estornos de pagamentos lançados nos meses
+    mes_lanc = _mes(lanc.data_lancamento)
+    no_periodo = (
+        lanc.data_lancamento >= inicio,
+        lanc.data_lancamento < fim,
+        mes_lanc.in_(meses),
+    )
+    pesos = _pesos(select(lanc.plano_id).where(*no_periodo))
+    categoria = func.coalesce(pesos.c.categoria, SEM_CATEGORIA)
+    fator = func.coalesce(pesos.c.peso, 1)
+    pago = financeiro_service.valor_pago_expr()
+    receita = (
+        select(
+            mes_lanc,
+            plano.dentista_id,
+            categoria,
+            func.sum(pago * fator),
+        )
+        .select_from(lanc)
+        .join(plano, plano.id == lanc.plano_id)
+        .outerjoin(pesos, pesos.c.plano_id == plano.id)
+        # Ajustes (e estornos de ajustes) não são receita
+        .where(*no_periodo, pago != 0)
+        .group_by(mes_lanc, plano.dentista_id, categoria)
+    )
+
+    # Coorte: planos faturados criados nos meses (saldo atual)
+    mes_plano = _mes(plano.created_at)
+    planos_ids = select(plano.id).where(
+        plano.created_at >= inicio,
+        plano.created_at < fim,
+        mes_plano.in_(meses),
+        plano.status.in_(STATUS_FATURADOS),
+    )
+    pesos = _pesos(planos_ids)
+    categoria = func.coalesce(pesos.c.categoria, SEM_CATEGORIA)
+    fator = func.coalesce(pesos.c.peso, 1)
+    saldos = (
+        select(
+            lanc.plano_id,
+            func.sum(financeiro_service.valor_pago_expr()).label("pago"),
+            func.sum(financeiro_service.valor_ajuste_expr()).label("ajustado"),
+        )
+        .where(lanc.plano_id.in_(planos_ids))
+        .group_by(lanc.plano_id)
+        .cte("saldos")
+    )
+    # Mesma "Soma Burra" de financeiro_service.get_saldo_plano_calculado
+    aberto = (
+        plano.valor_total
+        + func.coalesce(saldos.c.ajustado, 0)
+        - func.coalesce(saldos.c.pago, 0)
+    )
+    coorte = (
+        select(
+            mes_plano,
+            plano.dentista_id,
+            categoria,
+            func.sum(plano.valor_total * fator),
+            func.sum(aberto * fator),
+            func.sum(fator),
+        )
+        .select_from(plano)
+        .outerjoin(pesos, pesos.c.plano_id == plano.id)
+        .outerjoin(saldos, saldos.c.plano_id == plano.id)
+        .where(plano.id.in_(planos_ids))
+        .group_by(mes_plano, plano.dentista_id, categoria)
+    )
+
+    linhas: dict[tuple, dict] = {}
+
+    def _linha(mes, dentista_id, cat) -> dict:
+        chave = (mes, dentista_id, cat)
+        if chave not in linhas:
+            linhas[chave] = {
+                "mes": mes,
+                "dentista_id": dentista_id,
+                "categoria": cat,
+                "receita": _ZERO,
+                "faturado": _ZERO,
+                "em_aberto": _ZERO,
+                "qtd_planos": Decimal(0),
+            }
+        return linhas[chave]
+
+    for mes, dentista_id, cat, valor in db.session.execute(receita):
+        _linha(mes, dentista_id, cat)["receita"] = _centavos(valor)
+    for mes, dentista_id, cat, fat, aberto_v, qtd in db.session.execute(
+        coorte
+    ):
+        linha = _linha(mes, dentista_id, cat)
+        linha["faturado"] = _centavos(fat)
+        linha["em_aberto"] = _centavos(aberto_v)
+        linha["qtd_planos"] = Decimal(qtd).quantize(Decimal("0.0001"))
+    return list(linhas.values())
+
+
+def _recalcular(meses: list[date]) -> int:
+    db.session.execute(
+        delete(RelatorioFinanceiroMensal).where(
+            RelatorioFinanceiroMensal.mes.in_(meses)
+        )
+    )
+    linhas = _calcular_meses(meses)
+    if linhas:
+        db.session.execute(insert(RelatorioFinanceiroMensal), linhas)
+    return len(linhas)
+
+
+def _todos_os_meses() -> list[date]:
+    fontes = union(
+        select(_mes(PlanoTratamento.created_at)),
+        select(_mes(LancamentoFinanceiro.data_lancamento)),
+    )
+    return sorted(db.session.execute(fontes).scalars())
+
+
+def atualizar_relatorio(
+    completo: bool = False, lote_meses: int = LOTE_MESES
+) -> int:
+    """Recalcula os meses pendentes (ou todos); retorna quantos meses.
+
+    Cada lote de ``lote_meses`` é uma transação: a marca de pendência sai
+    junto com o recálculo, então uma falha no meio preserva o restante.
+    """
+    try:
+        if completo:
+            meses = _todos_os_meses()
+        else:
+            meses = list(
+                db.session.execute(
+                    select(RelatorioMesPendente.mes).order_by(
+                        RelatorioMesPendente.mes
+                    )
+                ).scalars()
+            )
+        for i in range(0, len(meses), lote_meses):
+            lote = meses[i : i + lote_meses]
+            db.session.execute(
+                delete(RelatorioMesPendente).where(
+                    RelatorioMesPendente.mes.in_(lote)
+                )
+            )
+            _recalcular(lote)
+            db.session.commit()
+        if completo:
+            # Meses sem nenhum dado (ex.: lançamentos removidos)
+            db.session.execute(
+                delete(RelatorioFinanceiroMensal).where(
+                    RelatorioFinanceiroMensal.mes.notin_(meses)
+                )
+            )
+            db.session.execute(delete(RelatorioMesPendente))
+            db.session.commit()
+        return len(meses)
+    except Exception as exc:
+        db.session.rollback()
+        raise ValueError(f"Falha ao atualizar relatório financeiro: {exc}")
+
+
+def atualizar_relatorios_job(app) -> None:
+    """Job do APScheduler: atualização incremental em cada tenant."""
+    from app.services import tenant_service
+    from app.tenancy import default_schema
+
+    with app.app_context():
+        schemas = {default_schema()}
+        if app.config.get("MULTI_TENANT_ENABLED"):
+            schemas |= tenant_service.get_active_schemas()
+        for schema in sorted(schemas):
+            with tenant_service.use_tenant(schema):
+                try:
+                    atualizar_relatorio()
+                except ValueError as exc:
+                    app.logger.error(
+                        "Relatório financeiro (%s): %s", schema, exc
+                    )
+
+
+# ----------------------------------
+# Marcação incremental (chamada por app/events.py)
+# ----------------------------------
+
+
+def _valores_anteriores(obj, atributo: str) -> list:
+    """Valores de ``atributo`` antes da alteração pendente no flush."""
+    return [
+        v
+        for v in inspect(obj).attrs[atributo].history.deleted
+        if v is not None
+    ]
+
+
+def marcar_alteracoes(session) -> None:
+    """Marca como pendentes os meses afetados pelo flush corrente.
+
+    Roda em ``after_flush``: PKs novas já existem, as listas
+    new/dirty/deleted ainda refletem o flush e o histórico de atributos
+    ainda guarda os valores anteriores.
+
+    - Lançamento: mês atual e, se a data ou o plano mudou, mês anterior e
+      plano anterior.
+    - Plano/item: mês de criação do plano e meses de todos os seus
+      lançamentos (dentista e categoria dos lançamentos vêm do plano).
+    """
+    planos: set[int] = set()
+    planos_alterados: set[int] = set()
+    lancamentos: set[int] = set()
+    meses: set[date] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, LancamentoFinanceiro):
+            planos.add(obj.plano_id)
+            if obj in session.deleted:
+                data = obj.__dict__.get("data_lancamento")
+                if data is not None:
+                    meses.add(_primeiro_dia(data.date()))
+                continue
+            lancamentos.add(obj.id)
+            if obj in session.dirty:
+                for data in _valores_anteriores(obj, "data_lancamento"):
+                    meses.add(_primeiro_dia(data.date()))
+                planos.update(_valores_anteriores(obj, "plano_id"))
+        elif isinstance(obj, ItemPlano):
+            planos_alterados.add(obj.plano_id)
+            if obj in session.dirty:
+                planos_alterados.update(_valores_anteriores(obj, "plano_id"))
+        elif isinstance(obj, PlanoTratamento):
+            if obj in session.deleted:
+                data = obj.__dict__.get("created_at")
+                if data is not None:
+                    meses.add(_primeiro_dia(data.date()))
+            else:
+                planos_alterados.add(obj.id)
+    planos_alterados.discard(None)
+    planos |= planos_alterados
+    planos.discard(None)
+    lancamentos.discard(None)
+    if not (planos or lancamentos or meses):
+        return
+
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+    fontes = [select(literal(m, Date)) for m in sorted(meses)]
+    if planos:
+        fontes.append(
+            select(_mes(PlanoTratamento.created_at)).where(
+                PlanoTratamento.id.in_(planos)
+            )
+        )
+    if planos_alterados:
+        fontes.append(
+            select(_mes(LancamentoFinanceiro.data_lancamento)).where(
+                LancamentoFinanceiro.plano_id.in_(planos_alterados)
+            )
+        )
+    if lancamentos:
+        fontes.append(
+            select(_mes(LancamentoFinanceiro.data_lancamento)).where(
+                LancamentoFinanceiro.id.in_(lancamentos)
+            )
+        )
+    session.execute(
+        pg_insert(RelatorioMesPendente)
+        .from_select(["mes"], union(*fontes))
+        .on_conflict_do_nothing()
+    )
+
+
+# ----------------------------------
+# Consulta e exportação
+# ----------------------------------
+
+
+def _filtros(
+    inicio: date | None,
+    fim: date | None,
+    dentista_id: int | None,
+    categoria: str | None,
+) -> list:
+    cubo = RelatorioFinanceiroMensal
+    filtros = []
+    if inicio is not None:
+        filtros.append(cubo.mes >= _primeiro_dia(inicio))
+    if fim is not None:
+        filtros.append(cubo.mes <= _primeiro_dia(fim))
+    if dentista_id is not None:
+        filtros.append(cubo.dentista_id == dentista_id)
+    if categoria:
+        filtros.append(cubo.categoria == categoria)
+    return filtros
+
+
+def consultar(
+    inicio: date | None = None,
+    fim: date | None = None,
+    dentista_id: int | None = None,
+    categoria: str | None = None,
+    agrupar: Iterable[str] = DIMENSOES,
+) -> list[SimpleNamespace]:
+    """Totais do cubo agrupados por ``agrupar`` (subconjunto de DIMENSOES).
+
+    ``ticket_medio`` = faturado / planos (rateados) do grupo.
+    """
+    cubo = RelatorioFinanceiroMensal
+    dims = [d for d in DIMENSOES if d in set(agrupar)]
+    colunas = [getattr(cubo, d) for d in dims]
+    stmt = (
+        select(
+            *colunas,
+            func.sum(cubo.receita).label("receita"),
+            func.sum(cubo.faturado).label("faturado"),
+            func.sum(cubo.em_aberto).label("em_aberto"),
+            func.sum(cubo.qtd_planos).label("qtd_planos"),
+        )
+        .where(*_filtros(inicio, fim, dentista_id, categoria))
+        .group_by(*colunas)
+        .order_by(*colunas)
+    )
+    resultado = []
+    for row in db.session.execute(stmt):
+        dados = dict.fromkeys(DIMENSOES)
+        dados.update(row._asdict())
+        item = SimpleNamespace(**dados)
+        item.ticket_medio = (
+            _centavos(item.faturado / item.qtd_planos)
+            if item.qtd_planos
+            else None
+        )
+        resultado.append(item)
+    return resultado
+
+
+def iter_linhas(
+    inicio: date | None = None,
+    fim: date | None = None,
+    dentista_id: int | None = None,
+    categoria: str | None = None,
+    chunk: int = EXPORT_CHUNK,
+) -> Iterator[tuple]:
+    """Linhas do cubo (ordem de COLUNAS_EXPORT) via cursor no servidor."""
+    cubo = RelatorioFinanceiroMensal
+    stmt = (
+        select(
+            cubo.mes,
+            cubo.dentista_id,
+            func.coalesce(Usuario.nome_completo, Usuario.username),
+            cubo.categoria,
+            cubo.receita,
+            cubo.faturado,
+            cubo.em_aberto,
+            cubo.qtd_planos,
+        )
+        .outerjoin(Usuario, Usuario.id == cubo.dentista_id)
+        .where(*_filtros(inicio, fim, dentista_id, categoria))
+        .order_by(cubo.mes, cubo.dentista_id, cubo.categoria)
+        .execution_options(yield_per=chunk)
+    )
+    for particao in db.session.execute(stmt).partitions():
+        for row in particao:
+            qtd = row[7]
+            ticket = _centavos(row[5] / qtd) if qtd else None
+            yield (*row, ticket)
+
+
+def _valor_csv(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, Decimal):
+        # Planilhas pt-BR: vírgula decimal
+        return str(valor).replace(".", ",")
+    if isinstance(valor, date):
+        return valor.strftime("%m/%Y")
+    return str(valor)
+
+
+def exportar_csv(
+    linhas: Iterable[tuple], buffer_bytes: int = 64 * 1024
+) -> Iterator[str]:
+    """CSV (``;``, vírgula decimal) em blocos de ~``buffer_bytes``."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=";")
+    writer.writerow(COLUNAS_EXPORT)
+    for linha in linhas:
+        writer.writerow([_valor_csv(v) for v in linha])
+        if buf.tell() >= buffer_bytes:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def exportar_xlsx(linhas: Iterable[tuple]):
+    """Arquivo temporário XLSX (openpyxl write_only, memória constante).
+
+    Retorna o arquivo posicionado no início; o chamador fecha/envia.
+    """
+    try:
+        from openpyxl import Workbook  # type: ignore
+    except ImportError:
+        raise ValueError("Exportação XLSX requer o pacote openpyxl.")
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Relatório financeiro")
+    ws.append(list(COLUNAS_EXPORT))
+    for linha in linhas:
+        ws.append([float(v) if isinstance(v, Decimal) else v for v in linha])
+    tmp = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    wb.save(tmp)
+    tmp.seek(0)
+    return tmp
@@ -3,11 +3,20 @@ from __future__ import annotations
 import re
 from collections.abc import Mapping
 from string import Template
+from types import SimpleNamespace
 from typing import Any
 
 from .. import db
-from ..models import LogEmissao, Paciente, RoleEnum, TemplateDocumento, Usuario
+from ..models import (
+    LogEmissao,
+    Paciente,
+    RoleEnum,
+    TemplateDocumento,
+    TipoDocumento,
+    Usuario,
+)
 from ..utils.sanitization import sanitizar_input
+from . import cache_service
 
 # ------------------------------
 # Parser de variáveis dinâmicas
@@ -27,6 +36,34 @@ GLOBAIS_SUPORTADAS: set[str] = {
 }
 
 
+@cache_service.cached(cache_service.NS_TEMPLATES_DOCUMENTO)
+def list_templates_ativos(tipo_doc: str) -> list[SimpleNamespace]:
+    """Templates ativos de um tipo (snapshot cacheado por tenant).
+
+    Invalidar via invalidate_templates_cache() após editar templates.
+    """
+    rows = (
+        TemplateDocumento.query.filter_by(
+            tipo_doc=TipoDocumento(tipo_doc), is_active=True
+        )
+        .order_by(TemplateDocumento.nome)
+        .all()
+    )
+    return [
+        SimpleNamespace(
+            id=t.id,
+            nome=t.nome,
+            tipo_doc=t.tipo_doc,
+            template_body=t.template_body,
+        )
+        for t in rows
+    ]
+
+
+def invalidate_templates_cache() -> None:
+    cache_service.invalidate(cache_service.NS_TEMPLATES_DOCUMENTO)
+
+
 def parse_campos_dinamicos(template_string: str) -> list[str]:
     """Extrai variáveis $var do template, excluindo as globais conhecidas.
 
@@ -1,10 +1,104 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import tempfile
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from typing import BinaryIO
 
-from flask import current_app
+from flask import Response, current_app, redirect, send_file
+
+# Leitura em blocos: uploads de 50–200 MB nunca ficam inteiros em memória
+CHUNK_SIZE = 1024 * 1024
+# Multipart no S3 a partir de 8 MiB (partes de 8 MiB)
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+# Objetos endereçados por conteúdo nunca mudam: cache de 1 ano no navegador
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Redirects para URLs pré-assinadas: bem abaixo da expiração da assinatura
+PRESIGNED_REDIRECT_MAX_AGE = 300
+# delete_objects aceita no máximo 1000 chaves por chamada
+S3_DELETE_BATCH = 1000
+# URLs pré-assinadas são reaproveitadas até faltar esta fração da validade
+PRESIGNED_REUSE_MARGIN = 0.2
+PRESIGNED_CACHE_MAX = 4096
+
+_EXTENSION_KEY = "echodent_storage"
+_drivers_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """Result of a content-addressed write."""
+
+    relative_path: str
+    sha256: str
+    size_bytes: int
+    content_type: str | None
+    deduplicated: bool
+
+
+def iter_chunks(
+    file_stream: BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Yield the stream in bytes chunks (str chunks are UTF-8 encoded)."""
+    while True:
+        chunk = file_stream.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        yield chunk
+
+
+# Alternate spellings of the same format share one content-addressed key
+CANONICAL_EXTENSIONS = {
+    "jpeg": "jpg",
+    "jpe": "jpg",
+    "jfif": "jpg",
+    "tif": "tiff",
+    "dicom": "dcm",
+    "htm": "html",
+}
+
+
+def canonical_extension(extension: str | None) -> str:
+    """Lowercased extension without the dot, alternate spellings mapped."""
+    ext = (extension or "").lower().lstrip(".")
+    return CANONICAL_EXTENSIONS.get(ext, ext)
+
+
+def content_addressed_path(prefix: str, sha256: str, extension: str) -> str:
+    """Build "<prefix>/<aa>/<sha256><.ext>" (extension canonicalized)."""
+    ext = canonical_extension(extension)
+    name = f"{sha256}.{ext}" if ext else sha256
+    return f"{prefix}/{sha256[:2]}/{name}"
+
+
+def _spool_and_hash(
+    file_stream: BinaryIO, dir: str | None = None
+) -> tuple[str, str, int]:
+    """Copy the stream to a temp file, hashing on the fly.
+
+    Returns (temp_path, sha256_hex, size_bytes); caller owns temp_path.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(prefix="upload-", dir=dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter_chunks(file_stream):
+                digest.update(chunk)
+                size += len(chunk)
+                out.write(chunk)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size
 
 
 class BaseStorageDriver(ABC):
@@ -36,6 +130,48 @@ class BaseStorageDriver(ABC):
         """Delete stored object if supported (no-op by default)."""
         pass
 
+    def delete_many(self, relative_paths: Iterable[str]) -> int:
+        """Delete several objects; returns how many were requested."""
+        count = 0
+        for path in relative_paths:
+            self.delete(path)
+            count += 1
+        return count
+
+    def exists(self, relative_path: str) -> bool:  # optional
+        """Return True if an object is stored under relative_path."""
+        raise NotImplementedError
+
+    def open_file(self, relative_path: str) -> BinaryIO:  # optional
+        """Open the stored object for binary reading."""
+        raise NotImplementedError
+
+    def send_response(
+        self,
+        relative_path: str,
+        etag: str | None = None,
+        mimetype: str | None = None,
+        download_name: str | None = None,
+    ) -> Response:  # optional
+        """Build an HTTP response serving the stored object.
+
+        - etag: strong validator (content hash); when given, the object is
+          treated as immutable and cached long-term by the browser
+        - Conditional GET (304) and byte ranges (206) must be honored
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_content_addressed(
+        self,
+        file_stream: BinaryIO,
+        prefix: str,
+        extension: str = "",
+        content_type: str | None = None,
+    ) -> StoredFile:
+        """Stream-persist under a SHA-256 derived path (deduplicated)."""
+        raise NotImplementedError
+
 
 class LocalStorageDriver(BaseStorageDriver):
     """Stores files under instance/media_storage.
@@ -43,9 +179,17 @@ class LocalStorageDriver(BaseStorageDriver):
     The returned reference is the relative path (e.g., "1/picture.jpg").
     """
 
+    def _base_dir(self) -> str:
+        return os.path.join(current_app.instance_path, "media_storage")
+
     def _abs_path(self, relative_path: str) -> str:
-        base_dir = os.path.join(current_app.instance_path, "media_storage")
-        return os.path.join(base_dir, relative_path)
+        return os.path.join(self._base_dir(), relative_path)
+
+    def _tmp_dir(self) -> str:
+        # Same filesystem as the destination so os.replace is atomic
+        tmp_dir = os.path.join(self._base_dir(), ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        return tmp_dir
 
     def save_file(
         self,
@@ -55,14 +199,37 @@ class LocalStorageDriver(BaseStorageDriver):
     ) -> str:
         abs_path = self._abs_path(relative_path)
         os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-        with open(abs_path, "wb") as f:
-            chunk = file_stream.read()
-            if isinstance(chunk, str):
-                chunk = chunk.encode("utf-8")
-            f.write(chunk or b"")
+        tmp_path, _, _ = _spool_and_hash(file_stream, dir=self._tmp_dir())
+        os.replace(tmp_path, abs_path)
         # Return the relative path; route/controller decides how to build URLs
         return relative_path
 
+    def save_content_addressed(
+        self,
+        file_stream: BinaryIO,
+        prefix: str,
+        extension: str = "",
+        content_type: str | None = None,
+    ) -> StoredFile:
+        tmp_path, sha256, size = _spool_and_hash(
+            file_stream, dir=self._tmp_dir()
+        )
+        relative_path = content_addressed_path(prefix, sha256, extension)
+        abs_path = self._abs_path(relative_path)
+        deduplicated = os.path.isfile(abs_path)
+        if deduplicated:
+            os.unlink(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+            os.replace(tmp_path, abs_path)
+        return StoredFile(
+            relative_path=relative_path,
+            sha256=sha256,
+            size_bytes=size,
+            content_type=content_type,
+            deduplicated=deduplicated,
+        )
+
     def generate_url(self, relative_path: str, expires_in: int = 3600) -> str:
         # For local storage we typically expose via a route that resolves
         # media by id. Since we only have the relative path here, we return
@@ -70,25 +237,111 @@ class LocalStorageDriver(BaseStorageDriver):
         # Callers can adapt or use a dedicated route if needed.
         return f"/instance/media/{relative_path}"
 
+    def send_response(
+        self,
+        relative_path: str,
+        etag: str | None = None,
+        mimetype: str | None = None,
+        download_name: str | None = None,
+    ) -> Response:
+        # send_file(conditional=True) answers If-None-Match/If-Modified-Since
+        # with 304 and Range with 206 from the file on disk. Bodies go out via
+        # wsgi.file_wrapper (sendfile on gunicorn) or, with USE_X_SENDFILE,
+        # are handed to the front server without Python copying at all.
+        resp = send_file(
+            self._abs_path(relative_path),
+            mimetype=mimetype,
+            download_name=download_name,
+            conditional=True,
+            etag=etag if etag else True,
+            max_age=IMMUTABLE_MAX_AGE if etag else 0,
+        )
+        if etag:
+            resp.cache_control.private = True
+            resp.cache_control.immutable = True
+        else:
+            # Legacy path-addressed files may be overwritten: revalidate
+            resp.cache_control.private = True
+            resp.cache_control.no_cache = True
+        return resp
+
+    def delete(self, relative_path: str) -> None:
+        try:
+            os.remove(self._abs_path(relative_path))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, relative_path: str) -> bool:
+        return os.path.isfile(self._abs_path(relative_path))
+
+    def open_file(self, relative_path: str) -> BinaryIO:
+        return open(self._abs_path(relative_path), "rb")
+
 
 class S3StorageDriver(BaseStorageDriver):
+    """Long-lived S3 driver (one per app, see get_storage_service).
+
+    A single boto3 client (thread-safe) and its urllib3 connection pool are
+    shared by all requests; presigned URLs are memoized until near expiry.
+    """
+
     def __init__(self) -> None:
         cfg = current_app.config
         self.bucket = cfg.get("S3_BUCKET")
         self.region = cfg.get("S3_REGION")
         # optional endpoint (e.g., MinIO)
         self.endpoint_url = cfg.get("S3_ENDPOINT_URL")
+        self.max_pool_connections = int(
+            cfg.get("S3_MAX_POOL_CONNECTIONS") or 20
+        )
         if not self.bucket:
             raise RuntimeError("S3_BUCKET not configured")
+        self._client_obj = None
+        self._client_lock = threading.Lock()
+        self._url_cache: OrderedDict[tuple[str, int], tuple[str, float]] = (
+            OrderedDict()
+        )
+        self._url_lock = threading.Lock()
 
     def _client(self):
-        # Lazy import to avoid hard dependency when using Local driver
-        import boto3  # type: ignore
+        if self._client_obj is None:
+            with self._client_lock:
+                if self._client_obj is None:
+                    # Lazy import to avoid hard dependency with Local driver
+                    import boto3  # type: ignore
+                    from botocore.config import Config  # type: ignore
+
+                    self._client_obj = boto3.client(
+                        "s3",
+                        region_name=self.region,
+                        endpoint_url=self.endpoint_url,
+                        config=Config(
+                            max_pool_connections=self.max_pool_connections,
+                            retries={"max_attempts": 3, "mode": "standard"},
+                        ),
+                    )
+        return self._client_obj
 
-        return boto3.client(
-            "s3",
-            region_name=self.region,
-            endpoint_url=self.endpoint_url,
+    def _upload(
+        self,
+        file_obj: BinaryIO,
+        relative_path: str,
+        content_type: str | None = None,
+    ) -> None:
+        # upload_fileobj streams and switches to multipart above threshold
+        from boto3.s3.transfer import TransferConfig  # type: ignore
+
+        transfer_cfg = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_THRESHOLD,
+        )
+        extra_args = {"ContentType": content_type} if content_type else None
+        self._client().upload_fileobj(
+            file_obj,
+            self.bucket,
+            relative_path,
+            ExtraArgs=extra_args,
+            Config=transfer_cfg,
         )
 
     def save_file(
@@ -97,31 +350,129 @@ class S3StorageDriver(BaseStorageDriver):
         relative_path: str,
         content_type: str | None = None,
     ) -> str:
-        data = file_stream.read()
-        if isinstance(data, str):
-            data = data.encode("utf-8")
-        extra_args = {"ContentType": content_type} if content_type else None
-        self._client().put_object(
-            Bucket=self.bucket,
-            Key=relative_path,
-            Body=data or b"",
-            **(extra_args or {}),
-        )
+        tmp_path, _, _ = _spool_and_hash(file_stream)
+        try:
+            with open(tmp_path, "rb") as fh:
+                self._upload(fh, relative_path, content_type)
+        finally:
+            os.unlink(tmp_path)
         return relative_path
 
+    def save_content_addressed(
+        self,
+        file_stream: BinaryIO,
+        prefix: str,
+        extension: str = "",
+        content_type: str | None = None,
+    ) -> StoredFile:
+        # The key depends on the hash, so spool to disk before uploading
+        tmp_path, sha256, size = _spool_and_hash(file_stream)
+        try:
+            relative_path = content_addressed_path(prefix, sha256, extension)
+            deduplicated = self.exists(relative_path)
+            if not deduplicated:
+                with open(tmp_path, "rb") as fh:
+                    self._upload(fh, relative_path, content_type)
+        finally:
+            os.unlink(tmp_path)
+        return StoredFile(
+            relative_path=relative_path,
+            sha256=sha256,
+            size_bytes=size,
+            content_type=content_type,
+            deduplicated=deduplicated,
+        )
+
     def generate_url(self, relative_path: str, expires_in: int = 3600) -> str:
-        return self._client().generate_presigned_url(
+        key = (relative_path, int(expires_in))
+        now = time.monotonic()
+        with self._url_lock:
+            hit = self._url_cache.get(key)
+            if hit is not None and hit[1] > now:
+                self._url_cache.move_to_end(key)
+                return hit[0]
+        url = self._client().generate_presigned_url(
             ClientMethod="get_object",
             Params={"Bucket": self.bucket, "Key": relative_path},
             ExpiresIn=expires_in,
         )
+        reuse_until = now + expires_in * (1 - PRESIGNED_REUSE_MARGIN)
+        with self._url_lock:
+            self._url_cache[key] = (url, reuse_until)
+            self._url_cache.move_to_end(key)
+            while len(self._url_cache) > PRESIGNED_CACHE_MAX:
+                self._url_cache.popitem(last=False)
+        return url
+
+    def _forget_urls(self, relative_paths: Iterable[str]) -> None:
+        paths = set(relative_paths)
+        with self._url_lock:
+            for key in [k for k in self._url_cache if k[0] in paths]:
+                del self._url_cache[key]
+
+    def send_response(
+        self,
+        relative_path: str,
+        etag: str | None = None,
+        mimetype: str | None = None,
+        download_name: str | None = None,
+    ) -> Response:
+        # S3 answers ranges/conditional GETs itself; the app only signs
+        resp = redirect(
+            self.generate_url(
+                relative_path, expires_in=PRESIGNED_REDIRECT_MAX_AGE * 12
+            ),
+            code=302,
+        )
+        resp.cache_control.private = True
+        resp.cache_control.max_age = PRESIGNED_REDIRECT_MAX_AGE
+        return resp
 
     def delete(self, relative_path: str) -> None:
         self._client().delete_object(Bucket=self.bucket, Key=relative_path)
+        self._forget_urls([relative_path])
+
+    def delete_many(self, relative_paths: Iterable[str]) -> int:
+        paths = list(dict.fromkeys(relative_paths))
+        for start in range(0, len(paths), S3_DELETE_BATCH):
+            batch = paths[start : start + S3_DELETE_BATCH]
+            self._client().delete_objects(
+                Bucket=self.bucket,
+                Delete={
+                    "Objects": [{"Key": p} for p in batch],
+                    "Quiet": True,
+                },
+            )
+        self._forget_urls(paths)
+        return len(paths)
+
+    def exists(self, relative_path: str) -> bool:
+        from botocore.exceptions import ClientError  # type: ignore
+
+        try:
+            self._client().head_object(Bucket=self.bucket, Key=relative_path)
+        except ClientError:
+            return False
+        return True
+
+    def open_file(self, relative_path: str) -> BinaryIO:
+        obj = self._client().get_object(Bucket=self.bucket, Key=relative_path)
+        return obj["Body"]
 
 
 def get_storage_service() -> BaseStorageDriver:
+    """Return the app-wide driver for STORAGE_DRIVER (built once per app)."""
     driver = (current_app.config.get("STORAGE_DRIVER") or "LOCAL").upper()
-    if driver == "S3":
-        return S3StorageDriver()
-    return LocalStorageDriver()
+    drivers = current_app.extensions.setdefault(_EXTENSION_KEY, {})
+    instance = drivers.get(driver)
+    if instance is None:
+        with _drivers_lock:
+            instance = drivers.get(driver)
+            if instance is None:
+                instance = (
+                    S3StorageDriver()
+                    if driver == "S3"
+                    else LocalStorageDriver()
+                )
+                drivers[driver] = instance
+    return instance
@@ -0,0 +1,188 @@
+"""Gravação de telemetria (schema public) fora da transação da requisição.
+
+``DeveloperLog`` e demais registros de telemetria não devem competir com
+a requisição que falhou: um banco lento, um lock ou uma sessão em estado
+"failed" não podem deixar o tratamento de erro lento ou quebrado.
+
+- Engine dedicada e pequena (``TELEMETRY_POOL_SIZE``), criada sob demanda a
+  partir da URL do app, com ``lock_timeout``/``statement_timeout`` curtos;
+  nunca usa ``db.session``. A conexão tem ``connect_timeout``
+  (``TELEMETRY_CONNECT_TIMEOUT_S``): banco fora do ar não prende a thread.
+- Trocar de URL descarta a engine anterior; num ``fork`` o filho zera
+  engine, fila e thread (não herda sockets nem uma thread que não existe).
+- Uma thread escritora consome uma fila limitada
+  (``TELEMETRY_QUEUE_SIZE``). ``submit`` nunca bloqueia: com a fila cheia o
+  registro é descartado e contado em ``dropped_count``.
+- Cada item roda na própria transação; falhas são logadas e descartadas.
+- ``TELEMETRY_ASYNC=0`` grava de forma síncrona (ainda na engine dedicada).
+- ``flush()`` aguarda a fila esvaziar (testes e encerramento).
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from flask import current_app
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+_PARAR = object()
+
+_engine: Engine | None = None
+_engine_key: str | None = None
+_engine_lock = threading.Lock()
+
+_queue: queue.Queue | None = None
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+_dropped = 0
+
+
+def _get_engine() -> Engine:
+    """Engine de telemetria para a URL do app atual (requer app context)."""
+    global _engine, _engine_key
+    url = db.engine.url
+    key = url.render_as_string(hide_password=False)
+    with _engine_lock:
+        if _engine is None or _engine_key != key:
+            cfg = current_app.config
+            timeout_ms = int(cfg.get("TELEMETRY_STATEMENT_TIMEOUT_MS", 5000))
+            anterior = _engine
+            _engine = create_engine(
+                url,
+                pool_size=int(cfg.get("TELEMETRY_POOL_SIZE", 1)),
+                max_overflow=0,
+                pool_timeout=2,
+                pool_pre_ping=True,
+                connect_args={
+                    "application_name": "echodent-telemetry",
+                    "connect_timeout": int(
+                        cfg.get("TELEMETRY_CONNECT_TIMEOUT_S", 2)
+                    ),
+                    "options": (
+                        f"-c statement_timeout={timeout_ms} "
+                        f"-c lock_timeout={timeout_ms}"
+                    ),
+                },
+            )
+            _engine_key = key
+            if anterior is not None:
+                # Itens ainda na fila reabrem conexões sob demanda
+                anterior.dispose()
+        return _engine
+
+
+def _execute(engine: Engine, stmt) -> None:
+    try:
+        with engine.begin() as conn:
+            conn.execute(stmt)
+    except Exception as exc:
+        logger.error("Telemetria: falha ao gravar registro: %s", exc)
+
+
+def _run_writer(fila: queue.Queue) -> None:
+    while True:
+        item = fila.get()
+        try:
+            if item is _PARAR:
+                return
+            _execute(*item)
+        finally:
+            fila.task_done()
+
+
+def _get_queue() -> queue.Queue:
+    global _queue, _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            size = int(current_app.config.get("TELEMETRY_QUEUE_SIZE", 1000))
+            _queue = queue.Queue(maxsize=max(1, size))
+            _writer = threading.Thread(
+                target=_run_writer,
+                args=(_queue,),
+                name="telemetry-writer",
+                daemon=True,
+            )
+            _writer.start()
+        return _queue
+
+
+def submit(stmt) -> bool:
+    """Agenda um comando Core de telemetria (requer app context).
+
+    Retorna False se o registro foi descartado (fila cheia ou erro).
+    """
+    global _dropped
+    try:
+        engine = _get_engine()
+        if not current_app.config.get("TELEMETRY_ASYNC", True):
+            _execute(engine, stmt)
+            return True
+        _get_queue().put_nowait((engine, stmt))
+        return True
+    except queue.Full:
+        _dropped += 1
+        return False
+    except Exception as exc:
+        logger.error("Telemetria: registro descartado: %s", exc)
+        _dropped += 1
+        return False
+
+
+def dropped_count() -> int:
+    return _dropped
+
+
+def flush() -> None:
+    """Bloqueia até a thread escritora gravar tudo o que está na fila."""
+    fila = _queue
+    if fila is not None and _writer is not None and _writer.is_alive():
+        fila.join()
+
+
+def shutdown() -> None:
+    """Esvazia a fila, encerra a thread e libera a engine (atexit)."""
+    global _writer, _engine, _engine_key
+    with _writer_lock:
+        if _writer is not None and _writer.is_alive() and _queue is not None:
+            _queue.put(_PARAR)
+            _writer.join(timeout=5)
+        _writer = None
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _engine_key = None
+
+
+def _reset_after_fork() -> None:
+    """No processo filho: descarta o estado herdado do pai.
+
+    A thread escritora não existe no filho e os locks podem ter sido
+    copiados travados; as conexões do pool pertencem ao pai
+    (``dispose(close=False)`` não as fecha).
+    """
+    global _engine, _engine_key, _engine_lock
+    global _queue, _writer, _writer_lock, _dropped
+    if _engine is not None:
+        _engine.dispose(close=False)
+    _engine = None
+    _engine_key = None
+    _engine_lock = threading.Lock()
+    _queue = None
+    _writer = None
+    _writer_lock = threading.Lock()
+    _dropped = 0
+
+
+atexit.register(shutdown)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
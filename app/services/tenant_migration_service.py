@@ -0,0 +1,258 @@
+"""Upgrade paralelo dos schemas de tenant (``flask db upgrade-tenants``).
+
+O contexto do Alembic é global por processo, então cada tenant roda em um
+subprocesso ``flask db upgrade`` com ``ECHODENT_RUN_PHASE=tenants`` e
+``ECHODENT_TENANTS=<schema>`` (filtro honrado por migrations/env.py). Um
+ThreadPoolExecutor limita quantos rodam ao mesmo tempo.
+
+- Exclusão mútua: env.py toma ``pg_try_advisory_xact_lock`` por tenant; um
+  segundo runner (ou deploy concorrente) falha rápido nesse tenant em vez de
+  migrar duas vezes.
+- Retomada: o estado do passe public e de cada tenant é gravado
+  (atomicamente) em ``instance/tenant_migrations.json``; ``resume`` pula os
+  já concluídos na mesma revisão-alvo e ``retry_failed`` reexecuta apenas
+  os que falharam.
+- A revisão-alvo é resolvida para o id concreto (``resolve_revision``):
+  "head" depois de um deploy com migração nova é outra revisão, e o estado
+  antigo não pode ser confundido com ela.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from app import db
+from app.models import Tenant
+
+STATE_FILENAME = "tenant_migrations.json"
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_RUNNING = "running"
+
+# Últimas linhas da saída do subprocesso guardadas no estado
+_ERROR_TAIL_CHARS = 2000
+
+
+@dataclass
+class TenantUpgradeResult:
+    schema: str
+    ok: bool
+    duration_s: float
+    error: str | None = None
+
+
+@dataclass
+class UpgradeSummary:
+    revision: str
+    results: list[TenantUpgradeResult] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+
+    @property
+    def failed(self) -> list[TenantUpgradeResult]:
+        return [r for r in self.results if not r.ok]
+
+
+def state_path() -> str:
+    return os.path.join(current_app.instance_path, STATE_FILENAME)
+
+
+def load_state() -> dict:
+    try:
+        with open(state_path(), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_state(state: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def resolve_revision(revision: str = "head") -> str:
+    """Id concreto da revisão (``head``, prefixo, ...) via ScriptDirectory.
+
+    Requer o Flask-Migrate inicializado (grupo ``flask db``). Levanta
+    ValueError se o alvo não corresponder a exatamente uma revisão.
+    """
+    from alembic.script import ScriptDirectory
+
+    migrate = current_app.extensions["migrate"]
+    script = ScriptDirectory.from_config(
+        migrate.migrate.get_config(migrate.directory)
+    )
+    revisions = script.get_revisions(revision)
+    if len(revisions) != 1:
+        raise ValueError(
+            f"Revisão '{revision}' ambígua ou inexistente: "
+            f"{[r.revision for r in revisions]}"
+        )
+    return revisions[0].revision
+
+
+def public_done(state: dict, revision: str) -> bool:
+    """Passe public já concluído nesta revisão (id concreto)?"""
+    public = (state or {}).get("public") or {}
+    return (
+        public.get("revision") == revision
+        and public.get("status") == STATUS_DONE
+    )
+
+
+def list_active_tenants() -> list[str]:
+    rows = db.session.execute(
+        db.select(Tenant.schema_name)
+        .where(Tenant.is_active.is_(True))
+        .order_by(Tenant.schema_name)
+    ).scalars()
+    return list(rows) or ["tenant_default"]
+
+
+def select_tenants(
+    tenants: Iterable[str],
+    state: dict,
+    revision: str,
+    resume: bool = False,
+    retry_failed: bool = False,
+) -> tuple[list[str], list[str]]:
+    """Aplica resume/retry_failed; retorna (a_executar, pulados)."""
+    previous = state.get("tenants", {}) if state else {}
+    same_target = state.get("revision") == revision if state else False
+    todo: list[str] = []
+    skipped: list[str] = []
+    for schema in tenants:
+        status = (previous.get(schema) or {}).get("status")
+        if same_target and retry_failed and status != STATUS_FAILED:
+            skipped.append(schema)
+        elif same_target and resume and status == STATUS_DONE:
+            skipped.append(schema)
+        else:
+            todo.append(schema)
+    return todo, skipped
+
+
+def _flask_db_upgrade(
+    phase: str,
+    revision: str,
+    tenants: str | None = None,
+    timeout: float | None = None,
+) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env["ECHODENT_RUN_PHASE"] = phase
+    if tenants:
+        env["ECHODENT_TENANTS"] = tenants
+    else:
+        env.pop("ECHODENT_TENANTS", None)
+    # O scheduler não deve subir em subprocessos de migração
+    env["DISABLE_SCHEDULER"] = "1"
+    return subprocess.run(
+        [sys.executable, "-m", "flask", "db", "upgrade", revision],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+
+
+def upgrade_public(revision: str) -> None:
+    """Passe do schema public (serial, antes dos tenants).
+
+    ``revision`` é o id concreto; o resultado fica no estado para que uma
+    retomada não repita o passe.
+    """
+    path = state_path()
+    state = load_state()
+    if state.get("revision") != revision:
+        state = {"revision": revision, "tenants": {}}
+    proc = _flask_db_upgrade("public", revision)
+    ok = proc.returncode == 0
+    state["public"] = {
+        "revision": revision,
+        "status": STATUS_DONE if ok else STATUS_FAILED,
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+    }
+    _write_state(state, path)
+    if not ok:
+        raise RuntimeError(
+            "Falha no upgrade do schema public:\n"
+            + (proc.stderr or proc.stdout)[-_ERROR_TAIL_CHARS:]
+        )
+
+
+def upgrade_tenants(
+    tenants: list[str],
+    revision: str,
+    workers: int = 4,
+    resume: bool = False,
+    retry_failed: bool = False,
+    timeout: float | None = None,
+    progress: Callable[[int, int, TenantUpgradeResult], None] | None = None,
+) -> UpgradeSummary:
+    """Executa o upgrade dos tenants em paralelo (pool limitado).
+
+    ``revision`` deve ser o id concreto (``resolve_revision``).
+    """
+    state = load_state()
+    todo, skipped = select_tenants(
+        tenants, state, revision, resume=resume, retry_failed=retry_failed
+    )
+    if state.get("revision") != revision:
+        state = {"revision": revision, "tenants": {}}
+    state.setdefault("tenants", {})
+    state["started_at"] = datetime.now(timezone.utc).isoformat()
+    state_lock = threading.Lock()
+    # Resolvido aqui: as threads do pool não têm app context
+    path = state_path()
+
+    def _record(schema: str, **entry) -> None:
+        with state_lock:
+            state["tenants"][schema] = entry
+            _write_state(state, path)
+
+    def _run(schema: str) -> TenantUpgradeResult:
+        _record(schema, status=STATUS_RUNNING)
+        t0 = time.perf_counter()
+        try:
+            proc = _flask_db_upgrade("tenants", revision, schema, timeout)
+            ok = proc.returncode == 0
+            error = None if ok else (proc.stderr or proc.stdout or "")
+        except subprocess.TimeoutExpired:
+            ok, error = False, f"timeout após {timeout}s"
+        duration = time.perf_counter() - t0
+        error = error[-_ERROR_TAIL_CHARS:] if error else None
+        _record(
+            schema,
+            status=STATUS_DONE if ok else STATUS_FAILED,
+            duration_s=round(duration, 3),
+            finished_at=datetime.now(timezone.utc).isoformat(),
+            error=error,
+        )
+        return TenantUpgradeResult(schema, ok, duration, error)
+
+    summary = UpgradeSummary(revision=revision, skipped=skipped)
+    total = len(todo)
+    if not total:
+        return summary
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_run, schema) for schema in todo]
+        for done_count, fut in enumerate(as_completed(futures), start=1):
+            result = fut.result()
+            summary.results.append(result)
+            if progress is not None:
+                progress(done_count, total, result)
+    return summary
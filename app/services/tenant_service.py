@@ -0,0 +1,105 @@
+"""Resolução do tenant da requisição.
+
+- ``MULTI_TENANT_ENABLED`` desligado (padrão): toda requisição usa
+  ``TENANT_DEFAULT_SCHEMA`` (instalação de uma clínica só).
+- Ligado: o schema vem do cabeçalho ``TENANT_HEADER`` (padrão
+  ``X-Tenant``) e precisa existir como ``Tenant`` ativo; ausente → padrão;
+  desconhecido/inativo → 404.
+
+A lista de schemas ativos é mantida em memória por ``TENANT_CACHE_TTL``
+segundos para não custar uma consulta por requisição.
+
+O cabeçalho vem do cliente, então o login fica preso ao tenant: o id do
+Flask-Login (sessão e cookie "remember me") é ``<schema>:<id>``
+(``Usuario.get_id``). Requisição autenticada cujo tenant resolvido difere
+do tenant do login → 403; ``load_user`` também recusa ids de outro tenant.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from flask import abort, current_app, g, request, session
+
+from app import db
+from app.models import Tenant, Usuario
+from app.tenancy import current_schema, default_schema, split_login_id
+
+_active_lock = threading.Lock()
+_active_cache: dict[str, tuple[frozenset[str], float]] = {}
+
+
+def get_active_schemas() -> frozenset[str]:
+    """Schemas de tenants ativos (cache por processo com TTL)."""
+    ttl = float(current_app.config.get("TENANT_CACHE_TTL") or 60)
+    key = current_app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    now = time.monotonic()
+    with _active_lock:
+        hit = _active_cache.get(key)
+        if hit is not None and hit[1] > now:
+            return hit[0]
+    rows = db.session.execute(
+        db.select(Tenant.schema_name).where(Tenant.is_active.is_(True))
+    ).scalars()
+    schemas = frozenset(rows)
+    with _active_lock:
+        _active_cache[key] = (schemas, now + ttl)
+    return schemas
+
+
+def invalidate_active_schemas() -> None:
+    """Descarta o cache (chamar após criar/desativar um Tenant)."""
+    with _active_lock:
+        _active_cache.clear()
+
+
+def resolve_request_tenant() -> str:
+    """Hook before_request: define g.tenant_schema para a requisição."""
+    schema = default_schema()
+    if current_app.config.get("MULTI_TENANT_ENABLED"):
+        header = current_app.config.get("TENANT_HEADER") or "X-Tenant"
+        requested = (request.headers.get(header) or "").strip()
+        if requested:
+            if requested not in get_active_schemas():
+                abort(404)
+            schema = requested
+        logado = session.get("_user_id")
+        if logado is not None and split_login_id(logado)[0] != schema:
+            # Sessão de outro tenant (ou anterior ao vínculo)
+            abort(403)
+    g.tenant_schema = schema
+    return schema
+
+
+def load_login_user(value: str):
+    """Usuário de um id do Flask-Login, só no tenant da requisição."""
+    schema, user_id = split_login_id(value)
+    if schema is None:
+        if current_app.config.get("MULTI_TENANT_ENABLED"):
+            return None
+    elif schema != current_schema():
+        return None
+    return db.session.get(Usuario, int(user_id))
+
+
+@contextmanager
+def use_tenant(schema: str) -> Iterator[str]:
+    """Executa um bloco (job, CLI, script) no schema informado.
+
+    Requer app context. A sessão corrente é encerrada na entrada e na saída
+    para que nenhuma transação atravesse tenants.
+    """
+    previous = g.get("tenant_schema")
+    db.session.remove()
+    g.tenant_schema = schema
+    try:
+        yield schema
+    finally:
+        db.session.remove()
+        if previous is None:
+            g.pop("tenant_schema", None)
+        else:
+            g.tenant_schema = previous
@@ -1,9 +1,25 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from flask import current_app
+from sqlalchemy import select, tuple_
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import func
 
 from app import db
-from app.models import Paciente, TimelineContexto, TimelineEvento
+from app.models import (
+    Paciente,
+    TimelineContexto,
+    TimelineEvento,
+    TimelineEventoArquivo,
+    Usuario,
+)
+
+PAGINA_PADRAO = 50
+PAGINA_MAXIMA = 200
 
 
 def create_timeline_evento(
@@ -54,3 +70,97 @@ def create_timeline_evento(
         # Logaria o erro em um serviço de logging estruturado; print para DEV.
         print(f"Erro ao salvar evento na timeline: {e}")  # noqa: T201
         return False
+
+
+def _cursor(evento: TimelineEvento) -> str:
+    return f"{evento.timestamp.isoformat()}_{evento.id}"
+
+
+def _ler_cursor(before: str) -> tuple[datetime, int]:
+    try:
+        ts_raw, _, id_raw = before.rpartition("_")
+        return datetime.fromisoformat(ts_raw), int(id_raw)
+    except ValueError:
+        raise ValueError("Cursor de paginação inválido.")
+
+
+def list_eventos(
+    paciente_id: int,
+    before: str | None = None,
+    tipos: Iterable[str] | None = None,
+    limite: int = PAGINA_PADRAO,
+) -> SimpleNamespace:
+    """Página do histórico do paciente, mais recentes primeiro (keyset).
+
+    ``before`` é o cursor opaco devolvido em ``proximo`` pela página
+    anterior; a consulta continua a partir dele com
+    ``(timestamp, id) < (ts, id)``, servida pelo índice
+    (paciente_id, timestamp DESC, id DESC) sem OFFSET — o custo por página
+    não cresce com o tamanho do histórico.
+
+    Retorno: ``eventos`` (TimelineEvento com ``usuario_nome``) e
+    ``proximo`` (cursor ou None na última página).
+    """
+    limite = max(1, min(int(limite), PAGINA_MAXIMA))
+    usuario_nome = func.coalesce(Usuario.nome_completo, Usuario.username)
+    stmt = (
+        select(TimelineEvento, usuario_nome.label("usuario_nome"))
+        .outerjoin(Usuario, Usuario.id == TimelineEvento.usuario_id)
+        .where(TimelineEvento.paciente_id == int(paciente_id))
+        .order_by(TimelineEvento.timestamp.desc(), TimelineEvento.id.desc())
+        .limit(limite + 1)
+    )
+    if before:
+        ts, evento_id = _ler_cursor(before)
+        stmt = stmt.where(
+            tuple_(TimelineEvento.timestamp, TimelineEvento.id)
+            < tuple_(ts, evento_id)
+        )
+    tipos = [t for t in (tipos or []) if t]
+    if tipos:
+        stmt = stmt.where(TimelineEvento.evento_tipo.in_(tipos))
+
+    rows = db.session.execute(stmt).all()
+    eventos = []
+    for evento, nome in rows[:limite]:
+        evento.usuario_nome = nome
+        eventos.append(evento)
+    tem_mais = len(rows) > limite
+    return SimpleNamespace(
+        eventos=eventos,
+        proximo=_cursor(eventos[-1]) if tem_mais else None,
+    )
+
+
+def list_tipos_evento(paciente_id: int) -> list[str]:
+    """Tipos de evento presentes no histórico (filtros da tela)."""
+    return list(
+        db.session.execute(
+            select(TimelineEvento.evento_tipo)
+            .where(TimelineEvento.paciente_id == int(paciente_id))
+            .distinct()
+            .order_by(TimelineEvento.evento_tipo)
+        ).scalars()
+    )
+
+
+def arquivar_eventos_antigos(dias: int | None = None, progress=None):
+    """Move para ``timeline_evento_arquivo`` eventos com mais de ``dias``.
+
+    Padrão ``TIMELINE_ARCHIVE_DAYS`` (0 = desligado, retorna None). Lotes
+    por faixa de ID via purge_service (DELETE ... RETURNING + INSERT).
+    """
+    from app.services import purge_service
+
+    if dias is None:
+        dias = current_app.config.get("TIMELINE_ARCHIVE_DAYS", 0)
+    if not dias:
+        return None
+    corte = datetime.now(timezone.utc) - timedelta(days=dias)
+    return purge_service.purgar_em_lotes(
+        TimelineEvento,
+        TimelineEvento.timestamp < corte,
+        chave="timeline_arquivo",
+        arquivo=TimelineEventoArquivo,
+        progress=progress,
+    )
@@ -4,6 +4,35 @@ from werkzeug.security import check_password_hash, generate_password_hash
 
 from app import db
 from app.models import RoleEnum, Usuario
+from app.services import cache_service
+
+
+@cache_service.cached(cache_service.NS_DENTISTAS)
+def list_dentistas_ativos() -> list[dict]:
+    """Dentistas ativos (id, nome, color) para agenda e seletores.
+
+    Cacheado por tenant; invalidar via invalidate_usuarios_cache() após
+    criar/alterar/desativar usuários.
+    """
+    rows = (
+        db.session.query(Usuario)
+        .filter(Usuario.role == RoleEnum.DENTISTA)
+        .filter(Usuario.is_active.is_(True))
+        .order_by(Usuario.nome_completo.nullslast())
+        .all()
+    )
+    return [
+        {
+            "id": u.id,
+            "nome": u.nome_completo or u.username,
+            "color": u.color,
+        }
+        for u in rows
+    ]
+
+
+def invalidate_usuarios_cache() -> None:
+    cache_service.invalidate(cache_service.NS_DENTISTAS)
 
 
 def authenticate_user(username: str, password: str) -> Usuario | None:
@@ -40,6 +69,6 @@ def get_or_create_dev_user(role: RoleEnum) -> Usuario:
     user.password_hash = generate_password_hash("devpass")
     db.session.add(user)
     # Use flush() instead of commit() to keep transaction alive
-    # This prevents losing the SET LOCAL search_path from before_request
+    # (caller decides when to commit)
     db.session.flush()
     return user
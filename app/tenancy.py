@@ -0,0 +1,85 @@
+"""Roteamento de tenant por requisição (schema_translate_map).
+
+Modelos de tenant não declaram schema; modelos globais usam
+``{"schema": "public"}``. Em vez de ``SET search_path`` por conexão, cada
+sessão recebe um Engine derivado (``engine.execution_options``) com
+``schema_translate_map={None: <schema do tenant>}``: o SQL já sai com o
+schema qualificado, o pool é único e compartilhado entre tenants, e nenhum
+estado de sessão do Postgres fica "grudado" na conexão devolvida ao pool.
+
+Este módulo não importa ``app`` (é usado na criação de ``db``).
+"""
+
+from __future__ import annotations
+
+import threading
+
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session as _FSASession
+from sqlalchemy.engine import Engine
+
+DEFAULT_TENANT_SCHEMA = "tenant_default"
+PUBLIC_SCHEMA = "public"
+
+_engines: dict[tuple[Engine, str], Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def default_schema() -> str:
+    if has_app_context():
+        return (
+            current_app.config.get("TENANT_DEFAULT_SCHEMA")
+            or DEFAULT_TENANT_SCHEMA
+        )
+    return DEFAULT_TENANT_SCHEMA
+
+
+def current_schema() -> str:
+    """Schema do tenant ativo (g.tenant_schema) ou o padrão."""
+    if has_app_context():
+        schema = g.get("tenant_schema")
+        if schema:
+            return schema
+    return default_schema()
+
+
+def login_id(schema: str, user_id: int) -> str:
+    """Id do Flask-Login com o tenant do login (``<schema>:<id>``)."""
+    return f"{schema}:{user_id}"
+
+
+def split_login_id(value: str) -> tuple[str | None, str]:
+    """(schema, id) de um id do Flask-Login; schema None em ids antigos."""
+    schema, sep, user_id = (value or "").rpartition(":")
+    return (schema if sep else None), user_id
+
+
+def tenant_engine(engine: Engine, schema: str) -> Engine:
+    """Engine derivado (mesmo pool) que qualifica tabelas sem schema.
+
+    O objeto é memoizado por (engine, schema): a Session usa a identidade do
+    bind para reaproveitar a conexão dentro da mesma transação.
+    """
+    key = (engine, schema)
+    routed = _engines.get(key)
+    if routed is None:
+        with _engines_lock:
+            routed = _engines.get(key)
+            if routed is None:
+                routed = engine.execution_options(
+                    schema_translate_map={None: schema}
+                )
+                _engines[key] = routed
+    return routed
+
+
+class TenantSession(_FSASession):
+    """Session do Flask-SQLAlchemy roteada para o schema do tenant atual."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        resolved = super().get_bind(
+            mapper=mapper, clause=clause, bind=bind, **kwargs
+        )
+        if isinstance(resolved, Engine):
+            return tenant_engine(resolved, current_schema())
+        return resolved
@@ -0,0 +1,93 @@
+"""Perfil de tempo de import (``python -X importtime``).
+
+Roda um comando Python num subprocesso limpo com ``-X importtime``,
+interpreta o stderr e agrega por pacote de topo (soma do tempo próprio),
+para apontar o que pesa no cold start (CLI, testes, workers).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+DEFAULT_TARGET = "from app import create_app; create_app()"
+
+
+@dataclass
+class ImportEntry:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    entries: list[ImportEntry]
+    wall_s: float | None = None
+
+    @property
+    def total_us(self) -> int:
+        return sum(e.self_us for e in self.entries)
+
+    def by_package(self) -> list[tuple[str, int, int]]:
+        """(pacote, tempo próprio somado em µs, nº de módulos)."""
+        totals: dict[str, int] = defaultdict(int)
+        counts: dict[str, int] = defaultdict(int)
+        for e in self.entries:
+            pkg = e.module.split(".", 1)[0]
+            totals[pkg] += e.self_us
+            counts[pkg] += 1
+        return sorted(
+            ((p, totals[p], counts[p]) for p in totals),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+    def slowest(self, top: int = 20) -> list[ImportEntry]:
+        return sorted(
+            self.entries, key=lambda e: e.cumulative_us, reverse=True
+        )[:top]
+
+
+def parse_importtime(stderr: str) -> list[ImportEntry]:
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cum_us, indent, module = match.groups()
+            entries.append(
+                ImportEntry(
+                    module, int(self_us), int(cum_us), len(indent) // 2
+                )
+            )
+    return entries
+
+
+def profile_imports(
+    target: str = DEFAULT_TARGET, env: dict[str, str] | None = None
+) -> ImportProfile:
+    """Executa ``python -X importtime -c <target>`` e retorna o perfil."""
+    import time
+
+    run_env = dict(os.environ)
+    run_env.update(env or {})
+    run_env.setdefault("DISABLE_SCHEDULER", "1")
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", target],
+        capture_output=True,
+        text=True,
+        env=run_env,
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-5:]
+        raise RuntimeError("Falha ao executar alvo:\n" + "\n".join(tail))
+    return ImportProfile(parse_importtime(proc.stderr), wall_s=wall)
@@ -0,0 +1,247 @@
+"""Contador de consultas SQL por requisição e detector de N+1.
+
+- Listeners ``before/after_cursor_execute`` (classe Engine, então cobrem os
+  engines roteados por tenant) acumulam, por requisição: número de
+  consultas, tempo total no banco e contagem por *fingerprint* (SQL com
+  literais e listas de parâmetros normalizados).
+- ``after_request`` publica ``Server-Timing: db;dur=…;desc="N queries"`` e
+  agrega por endpoint (painel dev em /settings/admin/queries). Um mesmo
+  fingerprint repetido ``QUERY_STATS_N1_THRESHOLD`` vezes numa requisição é
+  registrado como suspeita de N+1 (log WARNING + painel).
+- Ativo quando ``QUERY_STATS_ENABLED`` ou em debug/testing; desligado, o
+  custo é uma verificação de contexto por consulta.
+- ``add_request_listener`` expõe o resumo de cada requisição (usado pelo
+  plugin de orçamento de consultas dos testes).
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from flask import Flask, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_G_KEY = "_query_stats"
+_EXTENSION_KEY = "echodent_query_stats"
+# Endpoints distintos guardados no agregado do painel
+_MAX_ENDPOINTS = 500
+_MAX_SUSPECTS = 20
+
+_RE_WS = re.compile(r"\s+")
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PARAM_LIST = re.compile(
+    r"\((?:\s*(?:%\([^)]+\)s|\?|\$\d+|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)"
+)
+
+_listeners: list[Callable[[RequestQueryStats], None]] = []
+_listeners_lock = threading.Lock()
+_engine_hooks_installed = False
+
+
+def fingerprint(statement: str) -> str:
+    """Normaliza o SQL para agrupar consultas iguais com valores distintos."""
+    fp = _RE_STRING.sub("?", statement)
+    fp = _RE_PARAM_LIST.sub("(?)", fp)
+    fp = _RE_NUMBER.sub("?", fp)
+    return _RE_WS.sub(" ", fp).strip()
+
+
+@dataclass
+class RequestQueryStats:
+    endpoint: str | None = None
+    count: int = 0
+    total_ms: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Fingerprints executados ``threshold`` vezes ou mais."""
+        return [
+            (fp, n)
+            for fp, n in self.fingerprints.most_common()
+            if n >= threshold
+        ]
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    queries: int = 0
+    max_queries: int = 0
+    db_ms: float = 0.0
+    suspects: Counter = field(default_factory=Counter)
+
+    @property
+    def avg_queries(self) -> float:
+        return self.queries / self.requests if self.requests else 0.0
+
+    @property
+    def avg_db_ms(self) -> float:
+        return self.db_ms / self.requests if self.requests else 0.0
+
+
+# ----------------------------------
+# Coleta
+# ----------------------------------
+
+
+def _collectors() -> list[RequestQueryStats] | None:
+    if not has_app_context():
+        return None
+    return g.get(_G_KEY)
+
+
+def _before_cursor_execute(conn, cursor, statement, params, context, many):
+    if _collectors():
+        conn.info.setdefault("_qs_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, params, context, many):
+    collectors = _collectors()
+    if not collectors:
+        return
+    starts = conn.info.get("_qs_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000.0
+    for stats in collectors:
+        stats.record(statement, elapsed_ms)
+
+
+def _install_engine_hooks() -> None:
+    global _engine_hooks_installed
+    if _engine_hooks_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _engine_hooks_installed = True
+
+
+@contextmanager
+def collect_queries() -> Iterator[RequestQueryStats]:
+    """Coleta as consultas executadas no bloco (requer app context)."""
+    stats = RequestQueryStats()
+    stack = g.setdefault(_G_KEY, [])
+    stack.append(stats)
+    try:
+        yield stats
+    finally:
+        stack.remove(stats)
+
+
+def add_request_listener(
+    callback: Callable[[RequestQueryStats], None],
+) -> None:
+    with _listeners_lock:
+        _listeners.append(callback)
+
+
+def remove_request_listener(
+    callback: Callable[[RequestQueryStats], None],
+) -> None:
+    with _listeners_lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+# ----------------------------------
+# Integração Flask
+# ----------------------------------
+
+
+def is_enabled(app: Flask) -> bool:
+    flag = app.config.get("QUERY_STATS_ENABLED")
+    if flag is not None:
+        return bool(flag)
+    return bool(app.debug or app.testing)
+
+
+def _aggregate(app: Flask) -> dict:
+    return app.extensions.setdefault(
+        _EXTENSION_KEY, {"lock": threading.Lock(), "endpoints": {}}
+    )
+
+
+def get_endpoint_stats() -> dict[str, EndpointStats]:
+    """Cópia do agregado por endpoint (para o painel dev)."""
+    agg = _aggregate(current_app)
+    with agg["lock"]:
+        return dict(agg["endpoints"])
+
+
+def reset_endpoint_stats() -> None:
+    agg = _aggregate(current_app)
+    with agg["lock"]:
+        agg["endpoints"].clear()
+
+
+def _on_request_start() -> None:
+    if is_enabled(current_app):
+        stats = RequestQueryStats(endpoint=request.endpoint)
+        g.setdefault(_G_KEY, []).insert(0, stats)
+        g._query_stats_request = stats
+
+
+def _on_request_end(response):
+    stats = g.pop("_query_stats_request", None)
+    if stats is None:
+        return response
+    stack = g.get(_G_KEY) or []
+    if stats in stack:
+        stack.remove(stats)
+    stats.endpoint = request.endpoint or request.path
+
+    if current_app.config.get("QUERY_STATS_SERVER_TIMING", True):
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"',
+        )
+
+    threshold = int(current_app.config.get("QUERY_STATS_N1_THRESHOLD") or 5)
+    suspects = stats.repeated(threshold)
+    for fp, n in suspects:
+        current_app.logger.warning(
+            f"[query-stats] Possível N+1 em {stats.endpoint}: {n}x {fp[:200]}"
+        )
+
+    agg = _aggregate(current_app)
+    with agg["lock"]:
+        endpoints = agg["endpoints"]
+        ep = endpoints.get(stats.endpoint)
+        if ep is None and len(endpoints) < _MAX_ENDPOINTS:
+            ep = endpoints[stats.endpoint] = EndpointStats()
+        if ep is not None:
+            ep.requests += 1
+            ep.queries += stats.count
+            ep.max_queries = max(ep.max_queries, stats.count)
+            ep.db_ms += stats.total_ms
+            for fp, n in suspects:
+                ep.suspects[fp] = max(ep.suspects[fp], n)
+            if len(ep.suspects) > _MAX_SUSPECTS:
+                ep.suspects = Counter(
+                    dict(ep.suspects.most_common(_MAX_SUSPECTS))
+                )
+
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for callback in listeners:
+        callback(stats)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    _install_engine_hooks()
+    app.before_request(_on_request_start)
+    app.after_request(_on_request_end)
@@ -0,0 +1 @@
+"""Benchmarks de desempenho (dados sintéticos de clínica grande)."""
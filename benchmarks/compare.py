@@ -0,0 +1,85 @@
+"""Compara dois resultados de ``benchmarks.run`` (base x candidato).
+
+Sai com código 1 se algum cenário piorar além de ``--threshold`` (em %) na
+métrica escolhida, para uso em CI ou antes de um merge.
+
+Uso::
+
+    python -m benchmarks.compare base.json novo.json --threshold 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+
+
+def compare(
+    base: dict, new: dict, metric: str = "p50_ms", threshold: float = 10.0
+) -> tuple[list[tuple[str, float | None, float | None, float | None]], bool]:
+    """Linhas (cenário, base, novo, delta%) e se houve regressão."""
+    rows = []
+    regressed = False
+    names = sorted(set(base["results"]) | set(new["results"]))
+    for name in names:
+        b = base["results"].get(name, {}).get(metric)
+        n = new["results"].get(name, {}).get(metric)
+        delta = None
+        if b and n is not None:
+            delta = (n - b) / b * 100.0
+            if delta > threshold:
+                regressed = True
+        rows.append((name, b, n, delta))
+    return rows, regressed
+
+
+def same_dataset(a: dict, b: dict, tolerance: float = 0.05) -> bool:
+    """Tamanhos equivalentes (cenários de escrita fazem o dataset crescer)."""
+    for key in set(a) | set(b):
+        x, y = a.get(key, 0), b.get(key, 0)
+        if abs(x - y) > tolerance * max(x, y, 1):
+            return False
+    return True
+
+
+def _fmt(value: float | None, suffix: str = "") -> str:
+    return "-" if value is None else f"{value:.2f}{suffix}"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding="utf-8") as fh:
+        base = json.load(fh)
+    with open(args.new, encoding="utf-8") as fh:
+        new = json.load(fh)
+
+    for label, doc in (("base", base), ("novo", new)):
+        meta = doc.get("meta", {})
+        commit = (meta.get("git_commit") or "?")[:10]
+        dirty = " (dirty)" if meta.get("git_dirty") else ""
+        print(f"{label}: {commit}{dirty} dataset={meta.get('dataset')}")
+    if not same_dataset(
+        base.get("meta", {}).get("dataset") or {},
+        new.get("meta", {}).get("dataset") or {},
+    ):
+        print("AVISO: datasets diferentes; comparação pode não ser válida.")
+
+    rows, regressed = compare(base, new, args.metric, args.threshold)
+    print(f"\n{'cenário':<28} {'base':>10} {'novo':>10} {'delta':>9}")
+    for name, b, n, delta in rows:
+        flag = "  <-- regressão" if delta and delta > args.threshold else ""
+        print(
+            f"{name:<28} {_fmt(b):>10} {_fmt(n):>10} "
+            f"{_fmt(delta, '%'):>9}{flag}"
+        )
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
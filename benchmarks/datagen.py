@@ -0,0 +1,391 @@
+"""Gerador de dados para benchmarks (clínica grande).
+
+Completa o tenant semeado por ``seed_tenant_default`` até os tamanhos
+pedidos. É incremental: conta o que já existe e insere só a diferença, então
+pode ser interrompido e reexecutado, ou rodado de novo com uma escala maior.
+
+Inserções em lote via ``COPY`` (``app.bulk_loader``), sem ORM e sem os
+eventos de auditoria. Os dados são determinísticos (``--seed``).
+Use um banco dedicado (``DATABASE_URL``): o volume gerado não convive bem
+com a suíte de testes nem com o banco de desenvolvimento.
+
+Uso::
+
+    python -m benchmarks.datagen --scale small
+    python -m benchmarks.datagen --scale large
+    python -m benchmarks.datagen --patients 250000 --timeline 5000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.bulk_loader import copy_rows, reserve_ids
+from app.models import (
+    CalendarEvent,
+    ItemPlano,
+    LancamentoFinanceiro,
+    LogAuditoria,
+    Paciente,
+    PlanoTratamento,
+    Procedimento,
+    RoleEnum,
+    SexoEnum,
+    StatusPlanoEnum,
+    TimelineContexto,
+    TimelineEvento,
+    Usuario,
+)
+
+BATCH_SIZE = 20000
+
+
+@dataclass(frozen=True)
+class Scale:
+    patients: int
+    timeline_events: int
+    lancamentos: int
+    calendar_years: int
+    audit_logs: int
+    # Lançamentos por plano (define quantos planos são criados)
+    lancamentos_per_plano: int = 5
+    # Consultas por dia útil na agenda
+    events_per_day: int = 40
+
+
+SCALES: dict[str, Scale] = {
+    "small": Scale(
+        patients=2_000,
+        timeline_events=40_000,
+        lancamentos=10_000,
+        calendar_years=1,
+        audit_logs=20_000,
+    ),
+    "medium": Scale(
+        patients=20_000,
+        timeline_events=400_000,
+        lancamentos=100_000,
+        calendar_years=2,
+        audit_logs=200_000,
+    ),
+    "large": Scale(
+        patients=100_000,
+        timeline_events=2_000_000,
+        lancamentos=500_000,
+        calendar_years=5,
+        audit_logs=1_000_000,
+    ),
+}
+
+_NOMES = (
+    "Ana Maria João Pedro Paulo Lucas Mariana Beatriz Carlos Fernanda "
+    "Rafael Juliana Gabriel Larissa Bruno Camila Felipe Aline Rodrigo Letícia"
+).split()
+_SOBRENOMES = (
+    "Silva Santos Oliveira Souza Rodrigues Ferreira Alves Pereira Lima "
+    "Gomes Costa Ribeiro Martins Carvalho Almeida Lopes Soares Fernandes"
+).split()
+_EVENTOS = (
+    "ANAMNESE",
+    "PLANO",
+    "FINANCEIRO",
+    "ODONTOGRAMA",
+    "DOCUMENTO",
+    "AGENDA",
+)
+_METODOS = ("PIX", "Dinheiro", "Cartão de Crédito", "Cartão de Débito")
+_MODELOS_AUDIT = ("Paciente", "PlanoTratamento", "LancamentoFinanceiro")
+
+
+def _count(model) -> int:
+    return int(db.session.execute(select(func.count(model.id))).scalar_one())
+
+
+def _ids(model, limit: int | None = None) -> list[int]:
+    stmt = select(model.id).order_by(model.id)
+    if limit:
+        stmt = stmt.limit(limit)
+    return list(db.session.execute(stmt).scalars())
+
+
+def _insert_rows(
+    model,
+    total: int,
+    make_row: Callable[[int], dict],
+    label: str,
+) -> int:
+    """Grava ``total`` linhas em lotes (COPY), com commit por lote."""
+    done = 0
+    t0 = time.perf_counter()
+    while done < total:
+        n = min(BATCH_SIZE, total - done)
+        copy_rows(model, (make_row(done + i) for i in range(n)))
+        db.session.commit()
+        done += n
+        rate = done / max(time.perf_counter() - t0, 1e-9)
+        print(f"  {label}: {done}/{total} ({rate:,.0f} linhas/s)", end="\r")
+    if total:
+        print()
+    return done
+
+
+def _chunks(seq: list, size: int) -> Iterator[list]:
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]
+
+
+def generate(scale: Scale, seed: int = 42) -> dict[str, int]:
+    """Completa o tenant atual até ``scale``. Retorna linhas inseridas."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    inserted: dict[str, int] = {}
+
+    dentistas = list(
+        db.session.execute(
+            select(Usuario.id).where(Usuario.role == RoleEnum.DENTISTA)
+        ).scalars()
+    )
+    usuarios = _ids(Usuario)
+    procedimentos = list(
+        db.session.execute(
+            select(
+                Procedimento.id, Procedimento.nome, Procedimento.valor_padrao
+            )
+        ).all()
+    )
+    if not dentistas or not procedimentos:
+        raise RuntimeError(
+            "Tenant sem dentistas/procedimentos: rode 'flask dev-sync-db'."
+        )
+
+    # Pacientes
+    base = _count(Paciente)
+
+    def _paciente(i: int) -> dict:
+        n = base + i
+        return {
+            "nome_completo": (
+                f"{rng.choice(_NOMES)} {rng.choice(_SOBRENOMES)} "
+                f"{rng.choice(_SOBRENOMES)} {n}"
+            ),
+            "data_nascimento": date(1940, 1, 1)
+            + timedelta(days=rng.randrange(365 * 80)),
+            "cpf": f"{n:011d}"[-11:],
+            "telefone": f"(11) 9{rng.randrange(10**8):08d}",
+            "sexo": rng.choice(list(SexoEnum)),
+            "ultima_interacao_at": now
+            - timedelta(minutes=rng.randrange(60 * 24 * 365 * 3)),
+            "ultima_interacao_desc": rng.choice(_EVENTOS).title(),
+            "cidade": "São Paulo",
+            "estado": "SP",
+        }
+
+    inserted["pacientes"] = _insert_rows(
+        Paciente, max(0, scale.patients - base), _paciente, "pacientes"
+    )
+    pacientes = _ids(Paciente)
+
+    # Planos + itens + lançamentos
+    n_lanc = max(0, scale.lancamentos - _count(LancamentoFinanceiro))
+    n_planos = -(-n_lanc // scale.lancamentos_per_plano) if n_lanc else 0
+    planos_inseridos = 0
+    for batch in _chunks(list(range(n_planos)), BATCH_SIZE):
+        planos, itens_por_plano = [], []
+        for _ in batch:
+            itens = rng.sample(procedimentos, k=min(2, len(procedimentos)))
+            subtotal = sum((Decimal(p.valor_padrao) for p in itens), Decimal())
+            planos.append(
+                {
+                    "paciente_id": rng.choice(pacientes),
+                    "dentista_id": rng.choice(dentistas),
+                    "status": rng.choice(
+                        [StatusPlanoEnum.APROVADO, StatusPlanoEnum.CONCLUIDO]
+                    ),
+                    "subtotal": subtotal,
+                    "desconto": Decimal("0"),
+                    "valor_total": subtotal,
+                    "created_at": now
+                    - timedelta(
+                        days=rng.randrange(365 * scale.calendar_years)
+                    ),
+                }
+            )
+            itens_por_plano.append(itens)
+        plano_ids = reserve_ids(PlanoTratamento, len(planos))
+        for pid, plano in zip(plano_ids, planos, strict=True):
+            plano["id"] = pid
+        copy_rows(PlanoTratamento, planos)
+        copy_rows(
+            ItemPlano,
+            [
+                {
+                    "plano_id": pid,
+                    "procedimento_id": p.id,
+                    "procedimento_nome_historico": p.nome,
+                    "valor_cobrado": p.valor_padrao,
+                }
+                for pid, itens in zip(plano_ids, itens_por_plano, strict=True)
+                for p in itens
+            ],
+        )
+        lancs = []
+        for pid, plano in zip(plano_ids, planos, strict=True):
+            parcela = (
+                plano["valor_total"] / scale.lancamentos_per_plano
+            ).quantize(Decimal("0.01"))
+            for k in range(scale.lancamentos_per_plano):
+                if len(lancs) >= n_lanc:
+                    break
+                lancs.append(
+                    {
+                        "plano_id": pid,
+                        "valor": parcela,
+                        "metodo_pagamento": rng.choice(_METODOS),
+                        "tipo_lancamento": (
+                            LancamentoFinanceiro.LancamentoTipo.PAGAMENTO
+                        ),
+                        "data_lancamento": plano["created_at"]
+                        + timedelta(days=30 * k),
+                    }
+                )
+        copy_rows(LancamentoFinanceiro, lancs)
+        db.session.commit()
+        planos_inseridos += len(plano_ids)
+        n_lanc -= len(lancs)
+        print(f"  planos: {planos_inseridos}/{n_planos}", end="\r")
+    if n_planos:
+        print()
+    inserted["planos"] = planos_inseridos
+
+    # Timeline
+    def _evento(i: int) -> dict:
+        tipo = rng.choice(_EVENTOS)
+        return {
+            "paciente_id": rng.choice(pacientes),
+            "usuario_id": rng.choice(usuarios),
+            "timestamp": now
+            - timedelta(minutes=rng.randrange(60 * 24 * 1825)),
+            "evento_tipo": tipo,
+            "descricao": f"Evento {tipo.lower()} #{i}",
+            "evento_contexto": TimelineContexto.PACIENTE,
+        }
+
+    inserted["timeline_evento"] = _insert_rows(
+        TimelineEvento,
+        max(0, scale.timeline_events - _count(TimelineEvento)),
+        _evento,
+        "timeline",
+    )
+
+    # Auditoria
+    def _audit(i: int) -> dict:
+        return {
+            "timestamp": now
+            - timedelta(minutes=rng.randrange(60 * 24 * 1825)),
+            "user_id": rng.choice(usuarios),
+            "action": rng.choice(("create", "update", "update", "delete")),
+            "model_name": rng.choice(_MODELOS_AUDIT),
+            "model_id": rng.randrange(1, max(2, len(pacientes))),
+            "changes_json": {"campo": {"old": i, "new": i + 1}},
+        }
+
+    inserted["log_auditoria"] = _insert_rows(
+        LogAuditoria,
+        max(0, scale.audit_logs - _count(LogAuditoria)),
+        _audit,
+        "auditoria",
+    )
+
+    # Agenda: N consultas por dia útil nos últimos anos (e 60 dias adiante)
+    hoje = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    dias = [
+        hoje - timedelta(days=d)
+        for d in range(-60, 365 * scale.calendar_years)
+        if (hoje - timedelta(days=d)).weekday() < 5
+    ]
+    alvo = len(dias) * scale.events_per_day
+
+    def _consulta(i: int) -> dict:
+        dia = dias[i // scale.events_per_day]
+        slot = i % scale.events_per_day
+        inicio = dia + timedelta(
+            hours=11 + (slot % 10), minutes=30 * (slot % 2)
+        )
+        return {
+            "title": f"Consulta {i}",
+            "start": inicio,
+            "end": inicio + timedelta(minutes=30),
+            "all_day": False,
+            "dentista_id": dentistas[slot % len(dentistas)],
+            "paciente_id": rng.choice(pacientes),
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    existentes = _count(CalendarEvent)
+    inserted["calendar_events"] = _insert_rows(
+        CalendarEvent,
+        max(0, alvo - existentes),
+        lambda i: _consulta(existentes + i),
+        "agenda",
+    )
+    return inserted
+
+
+def dataset_counts() -> dict[str, int]:
+    """Tamanho atual do dataset (registrado junto aos resultados)."""
+    return {
+        "pacientes": _count(Paciente),
+        "planos": _count(PlanoTratamento),
+        "lancamentos": _count(LancamentoFinanceiro),
+        "timeline_evento": _count(TimelineEvento),
+        "log_auditoria": _count(LogAuditoria),
+        "calendar_events": _count(CalendarEvent),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--patients", type=int)
+    parser.add_argument("--timeline", type=int)
+    parser.add_argument("--lancamentos", type=int)
+    parser.add_argument("--calendar-years", type=int)
+    parser.add_argument("--audit-logs", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    overrides = {
+        "patients": args.patients,
+        "timeline_events": args.timeline,
+        "lancamentos": args.lancamentos,
+        "calendar_years": args.calendar_years,
+        "audit_logs": args.audit_logs,
+    }
+    scale = Scale(
+        **{
+            **asdict(SCALES[args.scale]),
+            **{k: v for k, v in overrides.items() if v is not None},
+        }
+    )
+    app = create_app()
+    with app.app_context():
+        t0 = time.perf_counter()
+        inserted = generate(scale, seed=args.seed)
+        print(f"Inseridos: {inserted}")
+        print(f"Dataset: {dataset_counts()}")
+        print(f"Tempo: {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,442 @@
+"""Teste de carga HTTP com sessões realistas (recepção e dentista).
+
+Cada usuário virtual (thread + ``httpx.Client`` próprio, com cookies) faz
+login e repete um roteiro com pausas de "tempo de pensar" até o fim da
+duração:
+
+- recepção: busca global tecla a tecla, abre a ficha, navega na agenda,
+  registra pagamento (``--writes``) e abre um documento para impressão;
+- dentista: agenda do dia, ficha, odontograma, planejamento, histórico e
+  financeiro do paciente.
+
+IDs de pacientes/planos/documentos são lidos do banco (``DATABASE_URL``,
+mesmo banco do servidor) ou informados via ``--paciente-ids``. Rotas são
+agregadas pelo padrão (``GET /pacientes/<id>/ficha``) e o relatório traz
+p50/p95/p99, taxa de erro e vazão por rota.
+
+Exemplo (clínica de 20 cadeiras: 20 dentistas + 5 na recepção)::
+
+    python -m benchmarks.loadtest_http --base-url http://127.0.0.1:5000 \\
+        --dentists 20 --reception 5 --duration 300 --ramp-up 30 \\
+        --writes --target-p95-ms 500 --output carga.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from benchmarks.run import git_output, percentile
+
+_ID_RE = re.compile(r"/\d+(?=/|$)")
+_NOMES_BUSCA = ("Maria", "Ana", "João", "Silva", "Pedro", "Souza")
+
+
+@dataclass
+class Fixtures:
+    paciente_ids: list[int]
+    plano_ids: list[int] = field(default_factory=list)
+    documento_ids: list[int] = field(default_factory=list)
+    dentista_ids: list[int] = field(default_factory=list)
+
+
+def load_fixtures_from_db(limit: int = 500) -> Fixtures:
+    """Amostra IDs reais do tenant padrão (requer DATABASE_URL)."""
+    from sqlalchemy import select
+
+    from app import create_app, db
+    from app.models import (
+        LogEmissao,
+        Paciente,
+        PlanoTratamento,
+        RoleEnum,
+        Usuario,
+    )
+
+    app = create_app()
+    with app.app_context():
+
+        def ids(stmt) -> list[int]:
+            return list(db.session.execute(stmt.limit(limit)).scalars())
+
+        return Fixtures(
+            paciente_ids=ids(select(Paciente.id).order_by(Paciente.id.desc())),
+            plano_ids=ids(
+                select(PlanoTratamento.id).order_by(PlanoTratamento.id.desc())
+            ),
+            documento_ids=ids(
+                select(LogEmissao.id).order_by(LogEmissao.id.desc())
+            ),
+            dentista_ids=ids(
+                select(Usuario.id).where(Usuario.role == RoleEnum.DENTISTA)
+            ),
+        )
+
+
+class Recorder:
+    """Latências e erros por rota (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.error_samples: dict[str, str] = {}
+
+    def record(
+        self, route: str, elapsed_ms: float, error: str | None = None
+    ) -> None:
+        with self._lock:
+            self.latencies[route].append(elapsed_ms)
+            if error:
+                self.errors[route] += 1
+                self.error_samples.setdefault(route, error)
+
+    def report(self, wall_s: float) -> dict[str, dict]:
+        routes: dict[str, dict] = {}
+        with self._lock:
+            items = {k: sorted(v) for k, v in self.latencies.items()}
+            errors = dict(self.errors)
+        for route, ordered in sorted(items.items()):
+            n = len(ordered)
+            routes[route] = {
+                "requests": n,
+                "errors": errors.get(route, 0),
+                "error_rate": round(errors.get(route, 0) / n, 4),
+                "rps": round(n / wall_s, 2) if wall_s else 0.0,
+                "p50_ms": round(percentile(ordered, 0.50), 2),
+                "p95_ms": round(percentile(ordered, 0.95), 2),
+                "p99_ms": round(percentile(ordered, 0.99), 2),
+                "max_ms": round(ordered[-1], 2),
+            }
+        return routes
+
+
+def route_label(method: str, path: str) -> str:
+    return f"{method} {_ID_RE.sub('/<id>', path.split('?', 1)[0])}"
+
+
+class VirtualUser:
+    def __init__(
+        self,
+        base_url: str,
+        username: str,
+        password: str,
+        fixtures: Fixtures,
+        recorder: Recorder,
+        rng: random.Random,
+        think_time: float,
+        writes: bool,
+    ) -> None:
+        self.client = httpx.Client(
+            base_url=base_url, timeout=30.0, follow_redirects=False
+        )
+        self.username = username
+        self.password = password
+        self.fx = fixtures
+        self.rec = recorder
+        self.rng = rng
+        self.think_time = think_time
+        self.writes = writes
+
+    def close(self) -> None:
+        self.client.close()
+
+    def request(self, method: str, path: str, **kwargs) -> None:
+        label = kwargs.pop("label", None) or route_label(method, path)
+        t0 = time.perf_counter()
+        error = None
+        try:
+            resp = self.client.request(method, path, **kwargs)
+            if resp.status_code >= 400:
+                error = f"HTTP {resp.status_code}"
+            elif resp.status_code in (301, 302) and "/login" in (
+                resp.headers.get("location") or ""
+            ):
+                error = "sessão expirada (redirect para /login)"
+        except httpx.HTTPError as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        self.rec.record(label, (time.perf_counter() - t0) * 1000.0, error)
+
+    def think(self, scale: float = 1.0) -> None:
+        if self.think_time > 0:
+            time.sleep(self.rng.expovariate(1.0 / (self.think_time * scale)))
+
+    def login(self) -> None:
+        self.request(
+            "POST",
+            "/login",
+            data={"username": self.username, "password": self.password},
+        )
+
+    # Passos compartilhados
+
+    def paciente(self) -> int:
+        return self.rng.choice(self.fx.paciente_ids)
+
+    def busca_global(self) -> None:
+        termo = self.rng.choice(_NOMES_BUSCA)
+        for i in range(1, len(termo) + 1):
+            self.request(
+                "GET",
+                "/pacientes/busca_global",
+                params={"q": termo[:i]},
+                headers={"HX-Request": "true"},
+            )
+            # Digitação: ~150 ms entre teclas (debounce do HTMX)
+            self.think(scale=0.05)
+
+    def agenda(self, days: int) -> None:
+        self.request("GET", "/agenda")
+        inicio = datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) + timedelta(days=self.rng.randint(-7, 7))
+        self.request(
+            "GET",
+            "/api/agenda/events",
+            params={
+                "start": inicio.isoformat(),
+                "end": (inicio + timedelta(days=days)).isoformat(),
+                "dentists": ",".join(map(str, self.fx.dentista_ids)),
+                "include_unassigned": "1",
+            },
+        )
+
+    # Roteiros
+
+    def reception_session(self) -> None:
+        self.busca_global()
+        self.think()
+        pid = self.paciente()
+        self.request("GET", f"/pacientes/{pid}/ficha")
+        self.think()
+        self.agenda(days=7)
+        self.think()
+        if self.fx.plano_ids:
+            plano_id = self.rng.choice(self.fx.plano_ids)
+            self.request("GET", f"/financeiro/plano/{plano_id}")
+            if self.writes:
+                self.request(
+                    "POST",
+                    f"/financeiro/plano/{plano_id}/pagar",
+                    data={"valor": "1.00", "metodo_pagamento": "PIX"},
+                )
+            self.think()
+        if self.fx.documento_ids:
+            log_id = self.rng.choice(self.fx.documento_ids)
+            self.request("GET", f"/imprimir/log/{log_id}")
+            self.think()
+
+    def dentist_session(self) -> None:
+        self.agenda(days=1)
+        self.think()
+        pid = self.paciente()
+        for aba in ("ficha", "odontograma", "planejamento", "historico"):
+            self.request("GET", f"/pacientes/{pid}/{aba}")
+            self.think(scale=0.5)
+        self.request("GET", f"/pacientes/{pid}/financeiro")
+        self.think()
+
+
+def _run_user(
+    user: VirtualUser,
+    session: Callable[[], None],
+    start_at: float,
+    stop_at: float,
+) -> None:
+    delay = start_at - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    try:
+        user.login()
+        while time.monotonic() < stop_at:
+            session()
+    finally:
+        user.close()
+
+
+def run_load(
+    base_url: str,
+    fixtures: Fixtures,
+    reception: int = 2,
+    dentists: int = 4,
+    duration: float = 60.0,
+    ramp_up: float = 10.0,
+    think_time: float = 3.0,
+    writes: bool = False,
+    password: str = "dev123",
+    seed: int = 42,
+) -> dict:
+    """Dispara os usuários virtuais e retorna o relatório."""
+    if not fixtures.paciente_ids:
+        raise ValueError("Nenhum paciente disponível para o teste de carga.")
+    recorder = Recorder()
+    total = reception + dentists
+    t_start = time.monotonic()
+    stop_at = t_start + ramp_up + duration
+    threads = []
+    for i in range(total):
+        is_reception = i < reception
+        user = VirtualUser(
+            base_url,
+            "secretaria" if is_reception else "dentista",
+            password,
+            fixtures,
+            recorder,
+            random.Random(seed + i),
+            think_time,
+            writes,
+        )
+        session = (
+            user.reception_session if is_reception else (user.dentist_session)
+        )
+        start_at = t_start + (ramp_up * i / total if total else 0)
+        t = threading.Thread(
+            target=_run_user,
+            args=(user, session, start_at, stop_at),
+            name=f"vu-{i}",
+            daemon=True,
+        )
+        t.start()
+        threads.append(t)
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - t_start
+    routes = recorder.report(wall)
+    total_requests = sum(r["requests"] for r in routes.values())
+    total_errors = sum(r["errors"] for r in routes.values())
+    return {
+        "meta": {
+            "git_commit": git_output("rev-parse", "HEAD"),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "base_url": base_url,
+            "reception_users": reception,
+            "dentist_users": dentists,
+            "duration_s": duration,
+            "ramp_up_s": ramp_up,
+            "think_time_s": think_time,
+            "writes": writes,
+        },
+        "summary": {
+            "wall_s": round(wall, 2),
+            "requests": total_requests,
+            "errors": total_errors,
+            "error_rate": (
+                round(total_errors / total_requests, 4)
+                if total_requests
+                else 0.0
+            ),
+            "rps": round(total_requests / wall, 2) if wall else 0.0,
+        },
+        "routes": routes,
+        "error_samples": dict(recorder.error_samples),
+    }
+
+
+def check_targets(
+    report: dict, target_p95_ms: float | None, max_error_rate: float
+) -> list[str]:
+    """Violações das metas (lista vazia = aprovado)."""
+    problems = []
+    for route, stats in report["routes"].items():
+        if target_p95_ms is not None and stats["p95_ms"] > target_p95_ms:
+            problems.append(
+                f"{route}: p95 {stats['p95_ms']:.0f}ms > {target_p95_ms:.0f}ms"
+            )
+        if stats["error_rate"] > max_error_rate:
+            problems.append(
+                f"{route}: erros {stats['error_rate']:.1%} > "
+                f"{max_error_rate:.1%}"
+            )
+    return problems
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\n{'rota':<42} {'req':>6} {'err%':>6} {'rps':>7} "
+        f"{'p50':>8} {'p95':>8} {'p99':>8}"
+    )
+    for route, s in report["routes"].items():
+        print(
+            f"{route:<42} {s['requests']:>6} {s['error_rate']:>6.1%} "
+            f"{s['rps']:>7.2f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+            f"{s['p99_ms']:>8.1f}"
+        )
+    summary = report["summary"]
+    print(
+        f"\nTotal: {summary['requests']} requisições em {summary['wall_s']}s"
+        f" ({summary['rps']} rps), erros {summary['error_rate']:.2%}"
+    )
+    for route, sample in report["error_samples"].items():
+        print(f"  exemplo de erro em {route}: {sample}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--reception", type=int, default=2)
+    parser.add_argument("--dentists", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--ramp-up", type=float, default=10.0)
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=3.0,
+        help="Pausa média entre ações (s, distribuição exponencial)",
+    )
+    parser.add_argument(
+        "--writes",
+        action="store_true",
+        help="Registra pagamentos de R$ 1,00 (altera o banco!)",
+    )
+    parser.add_argument("--password", default="dev123")
+    parser.add_argument(
+        "--paciente-ids", help="IDs separados por vírgula (sem ler o banco)"
+    )
+    parser.add_argument("--target-p95-ms", type=float)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", "-o")
+    args = parser.parse_args(argv)
+
+    if args.paciente_ids:
+        fixtures = Fixtures(
+            paciente_ids=[int(x) for x in args.paciente_ids.split(",") if x]
+        )
+    else:
+        fixtures = load_fixtures_from_db()
+
+    report = run_load(
+        args.base_url,
+        fixtures,
+        reception=args.reception,
+        dentists=args.dentists,
+        duration=args.duration,
+        ramp_up=args.ramp_up,
+        think_time=args.think_time,
+        writes=args.writes,
+        password=args.password,
+        seed=args.seed,
+    )
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+    problems = check_targets(report, args.target_p95_ms, args.max_error_rate)
+    for problem in problems:
+        print(f"META NÃO ATINGIDA: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,259 @@
+"""Mede os caminhos quentes e grava resultados em JSON.
+
+Roda contra o banco de ``DATABASE_URL`` (popule antes com
+``python -m benchmarks.datagen``). Rotas HTTP passam pelo test client do
+Flask (controller + template), sem servidor nem rede.
+
+Uso::
+
+    python -m benchmarks.run --output bench-$(git rev-parse --short HEAD).json
+    python -m benchmarks.run --only busca_global --repeat 50
+    python -m benchmarks.compare base.json novo.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+import sqlalchemy
+from sqlalchemy import func, select, text
+
+from app import create_app, db
+from app.models import (
+    CalendarEvent,
+    Paciente,
+    PlanoTratamento,
+    RoleEnum,
+    StatusPlanoEnum,
+    Usuario,
+)
+from app.services import audit_service, financeiro_service
+from app.services.odontograma_service import update_odontograma_bulk
+from benchmarks.datagen import dataset_counts
+
+_TEETH = [f"{q}{n}" for q in (1, 2, 3, 4) for n in range(1, 9)]
+
+
+@dataclass
+class Case:
+    name: str
+    func: Callable[[int], object]
+
+
+def git_output(*args: str) -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def percentile(sorted_ms: list[float], pct: float) -> float:
+    if len(sorted_ms) == 1:
+        return sorted_ms[0]
+    k = (len(sorted_ms) - 1) * pct
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_ms) - 1)
+    return sorted_ms[lo] + (sorted_ms[hi] - sorted_ms[lo]) * (k - lo)
+
+
+def summarize(samples_ms: list[float]) -> dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def _build_cases(client) -> list[Case]:
+    paciente_ids = list(
+        db.session.execute(
+            select(PlanoTratamento.paciente_id)
+            .group_by(PlanoTratamento.paciente_id)
+            .order_by(func.count().desc())
+            .limit(50)
+        ).scalars()
+    ) or list(db.session.execute(select(Paciente.id).limit(50)).scalars())
+    if not paciente_ids:
+        raise RuntimeError("Sem pacientes: rode python -m benchmarks.datagen")
+    admin_id = db.session.execute(
+        select(Usuario.id).where(Usuario.username == "admin")
+    ).scalar_one()
+    plano_orto_id = db.session.execute(
+        select(PlanoTratamento.id)
+        .where(PlanoTratamento.status == StatusPlanoEnum.APROVADO)
+        .order_by(PlanoTratamento.valor_total.desc())
+        .limit(1)
+    ).scalar()
+
+    dentistas = ",".join(
+        str(i)
+        for i in db.session.execute(
+            select(Usuario.id).where(Usuario.role == RoleEnum.DENTISTA)
+        ).scalars()
+    )
+    ultimo = db.session.execute(select(func.max(CalendarEvent.start))).scalar()
+    fim = (ultimo or datetime.now(timezone.utc)) - timedelta(days=60)
+
+    def _events(days: int) -> Callable[[int], object]:
+        start = (fim - timedelta(days=days)).isoformat()
+        end = fim.isoformat()
+
+        def run(_i: int):
+            resp = client.get(
+                "/api/agenda/events",
+                query_string={
+                    "start": start,
+                    "end": end,
+                    "dentists": dentistas,
+                    "include_unassigned": "1",
+                },
+            )
+            assert resp.status_code == 200, resp.status_code
+            return resp
+
+        return run
+
+    teclas = ["", "M", "Ma", "Mar", "Mari", "Maria", "Maria S"]
+
+    def busca(i: int):
+        resp = client.get(
+            "/pacientes/busca_global",
+            query_string={"q": teclas[i % len(teclas)]},
+        )
+        assert resp.status_code == 200, resp.status_code
+        return resp
+
+    def planos(i: int):
+        result = financeiro_service.get_planos_by_paciente(
+            paciente_ids[i % len(paciente_ids)]
+        )
+        db.session.remove()
+        return result
+
+    def audit(page: int, **filters) -> Callable[[int], object]:
+        def run(_i: int):
+            result = audit_service.list_audit_logs(page=page, **filters)
+            db.session.remove()
+            return result
+
+        return run
+
+    def odontograma(i: int):
+        estado = {"status": "cariado" if i % 2 else "higido", "faces": {}}
+        ok = update_odontograma_bulk(
+            paciente_ids[i % len(paciente_ids)],
+            {tooth: estado for tooth in _TEETH},
+            admin_id,
+        )
+        db.session.remove()
+        return ok
+
+    def carne_120(i: int):
+        # Carnê de ortodontia: 120 parcelas mensais
+        ok = financeiro_service.gerar_parcelamento_previsto(
+            plano_orto_id, 120, date(2024, 1, 1 + i % 28), admin_id
+        )
+        db.session.remove()
+        return ok
+
+    cases = [
+        Case("get_planos_by_paciente", planos),
+        Case("api_list_events_week", _events(7)),
+        Case("api_list_events_month", _events(31)),
+        Case("busca_global", busca),
+        Case("list_audit_logs_page1", audit(1)),
+        Case("list_audit_logs_page50", audit(50)),
+        Case(
+            "list_audit_logs_filtered",
+            audit(1, model_name="PlanoTratamento", action="update"),
+        ),
+        Case("odontograma_bulk_save", odontograma),
+    ]
+    if plano_orto_id is not None:
+        cases.append(Case("gerar_carne_120_parcelas", carne_120))
+    return cases
+
+
+def run_benchmarks(
+    repeat: int = 20, warmup: int = 3, only: list[str] | None = None
+) -> dict:
+    """Executa os cenários e retorna o documento de resultados."""
+    app = create_app("testing")
+    # Medir o caminho de produção, sem instrumentação de desenvolvimento
+    app.config["QUERY_STATS_ENABLED"] = False
+    results: dict[str, dict[str, float]] = {}
+    with app.app_context():
+        client = app.test_client()
+        client.get("/__dev/login_as/admin")
+        pg_version = db.session.execute(text("SHOW server_version")).scalar()
+        counts = dataset_counts()
+        for case in _build_cases(client):
+            if only and case.name not in only:
+                continue
+            for i in range(warmup):
+                case.func(i)
+            samples = []
+            for i in range(repeat):
+                t0 = time.perf_counter()
+                case.func(i)
+                samples.append((time.perf_counter() - t0) * 1000.0)
+            results[case.name] = summarize(samples)
+            print(
+                f"{case.name:<28} p50={results[case.name]['p50_ms']:>9.2f}ms"
+                f"  p95={results[case.name]['p95_ms']:>9.2f}ms"
+            )
+    return {
+        "meta": {
+            "git_commit": git_output("rev-parse", "HEAD"),
+            "git_dirty": bool(
+                git_output("status", "--porcelain", "--untracked=no")
+            ),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "postgres": pg_version,
+            "repeat": repeat,
+            "warmup": warmup,
+            "dataset": counts,
+        },
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", action="append")
+    parser.add_argument("--output", "-o", help="Arquivo JSON de saída")
+    args = parser.parse_args(argv)
+
+    doc = run_benchmarks(args.repeat, args.warmup, args.only)
+    payload = json.dumps(doc, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+        print(f"Resultados gravados em {args.output}")
+    else:
+        sys.stdout.write(payload + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -158,7 +158,7 @@ def run_migrations_online():
         # Use a fresh connection/transaction for the public pass
         with engine.begin() as connection:
             try:
-                connection.execute(sa.text("SET search_path TO public"))
+                connection.execute(sa.text("SET LOCAL search_path TO public"))
             except Exception:
                 pass
 
@@ -177,7 +177,6 @@ def run_migrations_online():
         tenants_local = []
         with engine.connect() as connection:
             try:
-                connection.execute(sa.text("SET search_path TO public"))
                 res = connection.execute(
                     sa.text(
                         "SELECT schema_name FROM public.tenants "
@@ -189,6 +188,11 @@ def run_migrations_online():
                 tenants_local = []
         if not tenants_local:
             tenants_local = ["tenant_default"]
+        # Optional filter (used by `flask db upgrade-tenants` workers)
+        only = os.environ.get("ECHODENT_TENANTS")
+        if only:
+            wanted = [t.strip() for t in only.split(",") if t.strip()]
+            tenants_local = wanted
         return tenants_local
 
     def run_tenant_pass(tenants_list):
@@ -206,12 +210,26 @@ def run_migrations_online():
                     pass
             # Run migrations for this tenant with isolated connection
             with engine.begin() as connection:
-                try:
-                    connection.execute(
-                        sa.text(f"SET search_path TO {tenant_schema}, public")
+                # One migrator per tenant: a concurrent runner fails fast
+                # here instead of applying the same revision twice
+                locked = connection.execute(
+                    sa.text(
+                        "SELECT pg_try_advisory_xact_lock("
+                        "hashtext('echodent-migrate:' || :s))"
+                    ),
+                    {"s": tenant_schema},
+                ).scalar()
+                if not locked:
+                    raise RuntimeError(
+                        f"Tenant {tenant_schema} is being migrated by "
+                        "another process"
                     )
-                except Exception:
-                    pass
+                # SET LOCAL: reverts at commit, nothing leaks to the pool
+                connection.execute(
+                    sa.text(
+                        f"SET LOCAL search_path TO {tenant_schema}, public"
+                    )
+                )
 
                 context.configure(
                     connection=connection,
@@ -0,0 +1,108 @@
+"""DeveloperLog: deduplicação por fingerprint de exceção
+
+Revision ID: 03c21572fa40
+Revises: a3415216927e
+Create Date: 2026-10-19 06:49:39.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "03c21572fa40"
+down_revision = "a3415216927e"
+branch_labels = None
+depends_on = None
+
+
+def _public_pass() -> bool:
+    # env.py: o passe public grava a versão em public; tenants, no schema
+    return op.get_context().version_table_schema == "public"
+
+
+def _tem_developer_log() -> bool:
+    # Bancos antigos criaram developer_log fora das migrações (create_all)
+    return sa.inspect(op.get_bind()).has_table(
+        "developer_log", schema="public"
+    )
+
+
+def upgrade():
+    if not _public_pass() or not _tem_developer_log():
+        return
+    with op.batch_alter_table("developer_log", schema="public") as batch_op:
+        batch_op.add_column(
+            sa.Column("fingerprint", sa.String(length=40), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column(
+                "occurrence_count",
+                sa.Integer(),
+                server_default="1",
+                nullable=False,
+            )
+        )
+        batch_op.add_column(
+            sa.Column("last_seen", sa.DateTime(timezone=True), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column(
+                "samples",
+                postgresql.JSONB(astext_type=sa.Text()),
+                server_default="[]",
+                nullable=False,
+            )
+        )
+
+    # Linhas legadas não têm os frames para o fingerprint real: cada uma
+    # vira seu próprio grupo (md5 tem 32 caracteres, nunca colide com os
+    # sha1 de 40 gravados pelo log_service), com uma amostra da requisição
+    op.execute("""
+        UPDATE public.developer_log
+        SET fingerprint = md5('legado:' || id),
+            last_seen = timestamp,
+            samples = jsonb_build_array(
+                jsonb_build_object(
+                    'ts', timestamp,
+                    'url', request_url,
+                    'method', request_method,
+                    'user_id', user_id,
+                    'message', NULL,
+                    'body', request_body
+                )
+            )
+        """)
+
+    with op.batch_alter_table("developer_log", schema="public") as batch_op:
+        batch_op.alter_column(
+            "fingerprint", existing_type=sa.String(length=40), nullable=False
+        )
+        batch_op.alter_column(
+            "last_seen",
+            existing_type=sa.DateTime(timezone=True),
+            nullable=False,
+        )
+        batch_op.create_unique_constraint(
+            "developer_log_fingerprint_key", ["fingerprint"]
+        )
+        batch_op.create_index(
+            batch_op.f("ix_public_developer_log_last_seen"),
+            ["last_seen"],
+            unique=False,
+        )
+
+
+def downgrade():
+    if not _public_pass() or not _tem_developer_log():
+        return
+    with op.batch_alter_table("developer_log", schema="public") as batch_op:
+        batch_op.drop_index(batch_op.f("ix_public_developer_log_last_seen"))
+        batch_op.drop_constraint(
+            "developer_log_fingerprint_key", type_="unique"
+        )
+        batch_op.drop_column("samples")
+        batch_op.drop_column("last_seen")
+        batch_op.drop_column("occurrence_count")
+        batch_op.drop_column("fingerprint")
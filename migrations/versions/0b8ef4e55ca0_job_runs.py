@@ -0,0 +1,52 @@
+"""Histórico de execuções dos jobs agendados (public.job_runs)
+
+Revision ID: 0b8ef4e55ca0
+Revises: 55b5a4782b44
+Create Date: 2026-10-19 06:55:56.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0b8ef4e55ca0"
+down_revision = "55b5a4782b44"
+branch_labels = None
+depends_on = None
+
+
+def _public_pass() -> bool:
+    # env.py: o passe public grava a versão em public; tenants, no schema
+    return op.get_context().version_table_schema == "public"
+
+
+def upgrade():
+    if not _public_pass():
+        return
+    op.create_table(
+        "job_runs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", sa.String(length=100), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("duration_ms", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("hostname", sa.String(length=255), nullable=True),
+        sa.Column("pid", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        schema="public",
+    )
+    with op.batch_alter_table("job_runs", schema="public") as batch_op:
+        batch_op.create_index(
+            "ix_job_runs_job_started", ["job_id", "started_at"], unique=False
+        )
+
+
+def downgrade():
+    if not _public_pass():
+        return
+    with op.batch_alter_table("job_runs", schema="public") as batch_op:
+        batch_op.drop_index("ix_job_runs_job_started")
+    op.drop_table("job_runs", schema="public")
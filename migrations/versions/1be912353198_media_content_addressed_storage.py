@@ -0,0 +1,58 @@
+"""MediaPaciente: metadados do armazenamento endereçado por conteúdo
+
+Revision ID: 1be912353198
+Revises: 1bbe8ad76a77
+Create Date: 2026-10-19 05:53:02.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "1be912353198"
+down_revision = "1bbe8ad76a77"
+branch_labels = None
+depends_on = None
+
+
+def _public_pass() -> bool:
+    # env.py: o passe public grava a versão em public; tenants, no schema
+    return op.get_context().version_table_schema == "public"
+
+
+def upgrade():
+    if _public_pass():
+        return
+    # Registros legados ficam com NULL (caminho antigo, sem hash)
+    with op.batch_alter_table("media_pacientes", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "original_filename", sa.String(length=255), nullable=True
+            )
+        )
+        batch_op.add_column(
+            sa.Column("content_sha256", sa.String(length=64), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("size_bytes", sa.BigInteger(), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("content_type", sa.String(length=120), nullable=True)
+        )
+        batch_op.create_index(
+            batch_op.f("ix_media_pacientes_content_sha256"),
+            ["content_sha256"],
+            unique=False,
+        )
+
+
+def downgrade():
+    if _public_pass():
+        return
+    with op.batch_alter_table("media_pacientes", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_media_pacientes_content_sha256"))
+        batch_op.drop_column("content_type")
+        batch_op.drop_column("size_bytes")
+        batch_op.drop_column("content_sha256")
+        batch_op.drop_column("original_filename")
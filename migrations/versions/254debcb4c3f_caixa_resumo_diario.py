@@ -0,0 +1,81 @@
+"""Caixa: saldo esperado e resumo diário por método de pagamento
+
+Revision ID: 254debcb4c3f
+Revises: 1be912353198
+Create Date: 2026-10-19 06:31:31.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "254debcb4c3f"
+down_revision = "1be912353198"
+branch_labels = None
+depends_on = None
+
+
+def _public_pass() -> bool:
+    # env.py: o passe public grava a versão em public; tenants, no schema
+    return op.get_context().version_table_schema == "public"
+
+
+def upgrade():
+    if _public_pass():
+        return
+    # Dias já fechados ficam com NULL: caixa_service agrega ao vivo
+    with op.batch_alter_table("fechamento_caixa", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "saldo_esperado",
+                sa.Numeric(precision=12, scale=2),
+                nullable=True,
+            )
+        )
+    op.create_table(
+        "resumo_caixa_diario",
+        sa.Column("data", sa.Date(), nullable=False),
+        sa.Column("metodo_pagamento", sa.String(length=50), nullable=False),
+        sa.Column("quantidade", sa.Integer(), nullable=False),
+        sa.Column(
+            "total_pagamentos",
+            sa.Numeric(precision=12, scale=2),
+            nullable=False,
+        ),
+        sa.Column(
+            "total_estornos", sa.Numeric(precision=12, scale=2), nullable=False
+        ),
+        sa.Column(
+            "total_ajustes", sa.Numeric(precision=12, scale=2), nullable=False
+        ),
+        sa.Column("gerado_em", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["data"],
+            ["fechamento_caixa.data_fechamento"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("data", "metodo_pagamento"),
+    )
+    with op.batch_alter_table(
+        "lancamentos_financeiros", schema=None
+    ) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_lancamentos_financeiros_data_lancamento"),
+            ["data_lancamento"],
+            unique=False,
+        )
+
+
+def downgrade():
+    if _public_pass():
+        return
+    with op.batch_alter_table(
+        "lancamentos_financeiros", schema=None
+    ) as batch_op:
+        batch_op.drop_index(
+            batch_op.f("ix_lancamentos_financeiros_data_lancamento")
+        )
+    op.drop_table("resumo_caixa_diario")
+    with op.batch_alter_table("fechamento_caixa", schema=None) as batch_op:
+        batch_op.drop_column("saldo_esperado")
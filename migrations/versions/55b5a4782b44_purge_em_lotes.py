@@ -0,0 +1,96 @@
+"""Expurgo em lotes: arquivo da timeline, checkpoints e índice da auditoria
+
+Revision ID: 55b5a4782b44
+Revises: 03c21572fa40
+Create Date: 2026-10-19 06:53:47.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "55b5a4782b44"
+down_revision = "03c21572fa40"
+branch_labels = None
+depends_on = None
+
+
+def _public_pass() -> bool:
+    # env.py: o passe public grava a versão em public; tenants, no schema
+    return op.get_context().version_table_schema == "public"
+
+
+def upgrade():
+    if _public_pass():
+        op.create_table(
+            "purge_checkpoints",
+            sa.Column("schema_name", sa.String(length=63), nullable=False),
+            sa.Column("chave", sa.String(length=100), nullable=False),
+            sa.Column("cursor", sa.BigInteger(), nullable=False),
+            sa.Column(
+                "updated_at", sa.DateTime(timezone=True), nullable=False
+            ),
+            sa.PrimaryKeyConstraint("schema_name", "chave"),
+            schema="public",
+        )
+        return
+
+    with op.batch_alter_table("log_auditoria", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_log_auditoria_timestamp"),
+            ["timestamp"],
+            unique=False,
+        )
+    op.create_table(
+        "timeline_evento_arquivo",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("paciente_id", sa.Integer(), nullable=True),
+        sa.Column("usuario_id", sa.Integer(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("evento_tipo", sa.String(length=50), nullable=False),
+        sa.Column("descricao", sa.Text(), nullable=False),
+        sa.Column(
+            "evento_contexto",
+            # Tipo já criado com timeline_evento
+            postgresql.ENUM(
+                "PACIENTE",
+                "SISTEMA",
+                name="timeline_contexto_enum",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column(
+            "arquivado_em",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table(
+        "timeline_evento_arquivo", schema=None
+    ) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_timeline_evento_arquivo_paciente_id"),
+            ["paciente_id"],
+            unique=False,
+        )
+
+
+def downgrade():
+    if _public_pass():
+        op.drop_table("purge_checkpoints", schema="public")
+        return
+
+    with op.batch_alter_table(
+        "timeline_evento_arquivo", schema=None
+    ) as batch_op:
+        batch_op.drop_index(
+            batch_op.f("ix_timeline_evento_arquivo_paciente_id")
+        )
+    op.drop_table("timeline_evento_arquivo")
+    with op.batch_alter_table("log_auditoria", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_log_auditoria_timestamp"))
@@ -0,0 +1,96 @@
+"""Relatório financeiro: cubo mensal e fila de meses pendentes
+
+Revision ID: 7dbdf62d5736
+Revises: 254debcb4c3f
+Create Date: 2026-10-19 06:36:37.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7dbdf62d5736"
+down_revision = "254debcb4c3f"
+branch_labels = None
+depends_on = None
+
+
+def _public_pass() -> bool:
+    # env.py: o passe public grava a versão em public; tenants, no schema
+    return op.get_context().version_table_schema == "public"
+
+
+def upgrade():
+    if _public_pass():
+        return
+    op.create_table(
+        "relatorio_financeiro_mensal",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("mes", sa.Date(), nullable=False),
+        sa.Column("dentista_id", sa.Integer(), nullable=True),
+        sa.Column("categoria", sa.String(length=50), nullable=False),
+        sa.Column(
+            "receita", sa.Numeric(precision=14, scale=2), nullable=False
+        ),
+        sa.Column(
+            "faturado", sa.Numeric(precision=14, scale=2), nullable=False
+        ),
+        sa.Column(
+            "em_aberto", sa.Numeric(precision=14, scale=2), nullable=False
+        ),
+        sa.Column(
+            "qtd_planos", sa.Numeric(precision=12, scale=4), nullable=False
+        ),
+        sa.Column("atualizado_em", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table(
+        "relatorio_financeiro_mensal", schema=None
+    ) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_relatorio_financeiro_mensal_dentista_id"),
+            ["dentista_id"],
+            unique=False,
+        )
+        batch_op.create_index(
+            batch_op.f("ix_relatorio_financeiro_mensal_mes"),
+            ["mes"],
+            unique=False,
+        )
+    op.create_table(
+        "relatorio_mes_pendente",
+        sa.Column("mes", sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint("mes"),
+    )
+    with op.batch_alter_table("planos_tratamento", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_planos_tratamento_created_at"),
+            ["created_at"],
+            unique=False,
+        )
+    # Cubo nasce vazio: marca todos os meses com dados para o job calcular
+    op.execute("""
+        INSERT INTO relatorio_mes_pendente (mes)
+        SELECT CAST(date_trunc('month', created_at) AS DATE)
+        FROM planos_tratamento
+        UNION
+        SELECT CAST(date_trunc('month', data_lancamento) AS DATE)
+        FROM lancamentos_financeiros
+        """)
+
+
+def downgrade():
+    if _public_pass():
+        return
+    with op.batch_alter_table("planos_tratamento", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_planos_tratamento_created_at"))
+    op.drop_table("relatorio_mes_pendente")
+    with op.batch_alter_table(
+        "relatorio_financeiro_mensal", schema=None
+    ) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_relatorio_financeiro_mensal_mes"))
+        batch_op.drop_index(
+            batch_op.f("ix_relatorio_financeiro_mensal_dentista_id")
+        )
+    op.drop_table("relatorio_financeiro_mensal")
@@ -0,0 +1,46 @@
+"""Timeline: índice da paginação keyset (paciente, timestamp, id)
+
+Revision ID: a3415216927e
+Revises: a93057d83f16
+Create Date: 2026-10-19 06:47:48.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a3415216927e"
+down_revision = "a93057d83f16"
+branch_labels = None
+depends_on = None
+
+
+def _public_pass() -> bool:
+    # env.py: o passe public grava a versão em public; tenants, no schema
+    return op.get_context().version_table_schema == "public"
+
+
+def upgrade():
+    if _public_pass():
+        return
+    # O novo índice cobre buscas só por paciente_id (prefixo)
+    with op.batch_alter_table("timeline_evento", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_timeline_evento_paciente_timestamp_id",
+            ["paciente_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+            unique=False,
+        )
+        batch_op.drop_index(batch_op.f("ix_timeline_evento_paciente_id"))
+
+
+def downgrade():
+    if _public_pass():
+        return
+    with op.batch_alter_table("timeline_evento", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_timeline_evento_paciente_id"),
+            ["paciente_id"],
+            unique=False,
+        )
+        batch_op.drop_index("ix_timeline_evento_paciente_timestamp_id")
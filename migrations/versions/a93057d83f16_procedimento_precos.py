@@ -0,0 +1,94 @@
+"""Tabela de preços versionada (procedimento_precos)
+
+Revision ID: a93057d83f16
+Revises: c6a1cf54496e
+Create Date: 2026-10-19 06:45:13.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "a93057d83f16"
+down_revision = "c6a1cf54496e"
+branch_labels = None
+depends_on = None
+
+
+def _public_pass() -> bool:
+    # env.py: o passe public grava a versão em public; tenants, no schema
+    return op.get_context().version_table_schema == "public"
+
+
+def upgrade():
+    if _public_pass():
+        return
+    op.create_table(
+        "procedimento_precos",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("procedimento_id", sa.Integer(), nullable=False),
+        sa.Column("valor", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column("valid_from", sa.Date(), nullable=False),
+        sa.Column("valid_to", sa.Date(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.CheckConstraint(
+            "valid_to IS NULL OR valid_to > valid_from",
+            name="ck_procedimento_precos_intervalo",
+        ),
+        postgresql.ExcludeConstraint(
+            (
+                sa.text("int4range(procedimento_id, procedimento_id, '[]')"),
+                "=",
+            ),
+            (sa.text("daterange(valid_from, valid_to)"), "&&"),
+            using="gist",
+            name="ex_procedimento_precos_vigencia",
+        ),
+        sa.ForeignKeyConstraint(
+            ["procedimento_id"], ["procedimentos.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["usuarios.id"], ondelete="SET NULL"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("procedimento_precos", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_procedimento_precos_procedimento_id"),
+            ["procedimento_id"],
+            unique=False,
+        )
+
+    # Catálogo existente: preço atual vigente desde a criação (ou desde
+    # sempre, em bancos anteriores à coluna created_at)
+    colunas = {
+        c["name"]
+        for c in sa.inspect(op.get_bind()).get_columns("procedimentos")
+    }
+    desde = (
+        "CAST(created_at AS DATE)"
+        if "created_at" in colunas
+        else "DATE '0001-01-01'"
+    )
+    op.execute(
+        "INSERT INTO procedimento_precos (procedimento_id, valor, valid_from)"
+        f" SELECT id, valor_padrao, {desde} FROM procedimentos"
+    )
+
+
+def downgrade():
+    if _public_pass():
+        return
+    with op.batch_alter_table("procedimento_precos", schema=None) as batch_op:
+        batch_op.drop_index(
+            batch_op.f("ix_procedimento_precos_procedimento_id")
+        )
+    op.drop_table("procedimento_precos")
@@ -0,0 +1,38 @@
+"""Índice em parcela_prevista.data_vencimento (aging de recebíveis)
+
+Revision ID: c6a1cf54496e
+Revises: 7dbdf62d5736
+Create Date: 2026-10-19 06:38:14.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c6a1cf54496e"
+down_revision = "7dbdf62d5736"
+branch_labels = None
+depends_on = None
+
+
+def _public_pass() -> bool:
+    # env.py: o passe public grava a versão em public; tenants, no schema
+    return op.get_context().version_table_schema == "public"
+
+
+def upgrade():
+    if _public_pass():
+        return
+    with op.batch_alter_table("parcela_prevista", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_parcela_prevista_data_vencimento"),
+            ["data_vencimento"],
+            unique=False,
+        )
+
+
+def downgrade():
+    if _public_pass():
+        return
+    with op.batch_alter_table("parcela_prevista", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_parcela_prevista_data_vencimento"))
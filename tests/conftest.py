@@ -1,16 +1,15 @@
 import pytest
 from dotenv import load_dotenv
-from sqlalchemy import event
 
-from app import create_app, db
+from app import create_app
 
 
 @pytest.fixture
 def app():
     """Application fixture for pytest-flask 'client' support.
 
-    Provides an app configured for testing and ensures search_path
-    is set on all pooled connections.
+    Provides an app configured for testing. Tenant tables are routed by the
+    session (schema_translate_map), so no per-connection search_path.
     """
     try:
         load_dotenv()
@@ -18,19 +17,6 @@ def app():
         pass
 
     app = create_app("testing")
-    with app.app_context():
-        try:
-
-            @event.listens_for(db.engine, "connect")
-            def _set_search_path_2(dbapi_connection, _):  # noqa: ANN001
-                try:
-                    cur = dbapi_connection.cursor()
-                    cur.execute("SET search_path TO tenant_default, public")
-                    cur.close()
-                except Exception:
-                    pass
-        except Exception:
-            pass
     return app
 
 
@@ -0,0 +1,67 @@
+"""Plugin pytest: orçamento de consultas SQL por rota.
+
+Uso::
+
+    @pytest.mark.query_budget(10)
+    def test_lista(client): ...
+
+    @pytest.mark.query_budget(3, endpoint="agenda_bp.api_list_dentists")
+    def test_api(client): ...
+
+Cada requisição atendida durante o teste (filtrada por ``endpoint`` quando
+informado) precisa executar no máximo ``max_queries`` consultas; caso
+contrário o teste falha com o resumo dos SQLs mais repetidos.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from app.utils import query_stats
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries, endpoint=None): falha se uma requisição "
+        "exceder o número de consultas SQL",
+    )
+
+
+def _format(stats: query_stats.RequestQueryStats) -> str:
+    lines = [f"{stats.endpoint}: {stats.count} consultas"]
+    for fp, n in stats.fingerprints.most_common(5):
+        lines.append(f"  {n}x {fp[:160]}")
+    return "\n".join(lines)
+
+
+@pytest.fixture(autouse=True)
+def _query_budget(request):
+    markers = list(request.node.iter_markers("query_budget"))
+    if not markers:
+        yield
+        return
+
+    budgets = []
+    for marker in markers:
+        limit = marker.args[0] if marker.args else marker.kwargs["max_queries"]
+        budgets.append((int(limit), marker.kwargs.get("endpoint")))
+    violations: list[str] = []
+
+    def _check(stats: query_stats.RequestQueryStats) -> None:
+        for limit, endpoint in budgets:
+            if endpoint and stats.endpoint != endpoint:
+                continue
+            if stats.count > limit:
+                violations.append(f"[limite {limit}] " + _format(stats))
+
+    query_stats.add_request_listener(_check)
+    try:
+        yield
+    finally:
+        query_stats.remove_request_listener(_check)
+    if violations:
+        pytest.fail(
+            "Orçamento de consultas excedido:\n" + "\n".join(violations),
+            pytrace=False,
+        )
@@ -0,0 +1,46 @@
+from benchmarks.compare import compare, same_dataset
+from benchmarks.run import summarize
+
+
+def test_summarize_percentis():
+    stats = summarize([float(x) for x in range(1, 101)])
+    assert stats["n"] == 100
+    assert stats["min_ms"] == 1.0 and stats["max_ms"] == 100.0
+    assert stats["p50_ms"] == 50.5
+    assert stats["p95_ms"] == 95.05
+
+
+def test_compare_sinaliza_regressao():
+    base = {"results": {"a": {"p50_ms": 10.0}, "b": {"p50_ms": 10.0}}}
+    novo = {"results": {"a": {"p50_ms": 10.5}, "c": {"p50_ms": 1.0}}}
+    rows, regressed = compare(base, novo, threshold=10.0)
+    assert not regressed
+    assert dict((r[0], r[3]) for r in rows)["a"] == 5.0
+
+    novo["results"]["a"]["p50_ms"] = 12.0
+    _, regressed = compare(base, novo, threshold=10.0)
+    assert regressed
+    assert same_dataset({"pacientes": 1000}, {"pacientes": 1020})
+    assert not same_dataset({"pacientes": 1000}, {"pacientes": 2000})
+
+
+def test_loadtest_rotas_agregadas_e_metas():
+    from benchmarks.loadtest_http import Recorder, check_targets, route_label
+
+    assert route_label("GET", "/pacientes/42/ficha?x=1") == (
+        "GET /pacientes/<id>/ficha"
+    )
+    assert route_label("POST", "/financeiro/plano/7/pagar") == (
+        "POST /financeiro/plano/<id>/pagar"
+    )
+
+    rec = Recorder()
+    for ms in range(1, 101):
+        rec.record("GET /agenda", float(ms), "HTTP 500" if ms == 100 else None)
+    report = {"routes": rec.report(wall_s=10.0)}
+    stats = report["routes"]["GET /agenda"]
+    assert stats["requests"] == 100 and stats["rps"] == 10.0
+    assert stats["error_rate"] == 0.01
+    assert stats["p99_ms"] == 99.01
+    assert check_targets(report, target_p95_ms=200, max_error_rate=0.01) == []
+    assert len(check_targets(report, target_p95_ms=50, max_error_rate=0)) == 2
@@ -0,0 +1,104 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app import db
+from app.bulk_loader import (
+    copy_rows,
+    create_snapshot,
+    drop_snapshot,
+    list_snapshots,
+    reserve_ids,
+    restore_snapshot,
+)
+from app.models import LogAuditoria, Paciente, SexoEnum
+
+
+def test_copy_rows_enum_json_e_ids_reservados(app_ctx):
+    ids = reserve_ids(Paciente, 2)
+    assert ids[1] == ids[0] + 1
+    n = copy_rows(
+        Paciente,
+        [
+            {
+                "id": ids[0],
+                "nome_completo": "Copy Um",
+                "sexo": SexoEnum.FEMININO,
+                "data_nascimento": date(1990, 5, 1),
+            },
+            {
+                "id": ids[1],
+                "nome_completo": "Copy Dois",
+                "sexo": None,
+                "data_nascimento": None,
+            },
+        ],
+    )
+    copy_rows(
+        LogAuditoria,
+        [("create", "Paciente", ids[0], {"nome": {"new": "Copy Um"}})],
+        columns=["action", "model_name", "model_id", "changes_json"],
+    )
+    db.session.commit()
+    assert n == 2
+
+    p = db.session.get(Paciente, ids[0])
+    assert p.sexo is SexoEnum.FEMININO
+    assert p.data_nascimento == date(1990, 5, 1)
+    log = (
+        db.session.query(LogAuditoria)
+        .filter_by(model_name="Paciente", model_id=ids[0])
+        .one()
+    )
+    assert log.changes_json == {"nome": {"new": "Copy Um"}}
+    assert log.timestamp is not None  # default Python aplicado no COPY
+
+    db.session.delete(log)
+    Paciente.query.filter(Paciente.id.in_(ids)).delete()
+    db.session.commit()
+
+    with pytest.raises(ValueError):
+        copy_rows(Paciente, [{"inexistente": 1}])
+
+
+@pytest.fixture
+def scratch_url(app):
+    url = make_url(app.config["SQLALCHEMY_DATABASE_URI"]).set(
+        database="echodent_bulk_scratch"
+    )
+    admin = create_engine(
+        url.set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+    with admin.connect() as conn:
+        conn.execute(text('DROP DATABASE IF EXISTS "echodent_bulk_scratch"'))
+        conn.execute(text('CREATE DATABASE "echodent_bulk_scratch"'))
+    yield url
+    drop_snapshot("t", url=url)
+    with admin.connect() as conn:
+        conn.execute(text('DROP DATABASE IF EXISTS "echodent_bulk_scratch"'))
+    admin.dispose()
+
+
+def test_snapshot_create_restore(scratch_url):
+    engine = create_engine(scratch_url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (v int)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+    engine.dispose()
+
+    create_snapshot("t", url=scratch_url, replace=True)
+    assert "t" in list_snapshots(url=scratch_url)
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO t VALUES (2)"))
+    engine.dispose()
+
+    restore_snapshot("t", url=scratch_url)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT array_agg(v) FROM t")).scalar() == [1]
+    engine.dispose()
+
+    with pytest.raises(ValueError):
+        restore_snapshot("inexistente", url=scratch_url)
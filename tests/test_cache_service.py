@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from flask import g
+
+from app import db
+from app.models import CategoriaEnum, Procedimento
+from app.services import (
+    cache_service,
+    financeiro_service,
+    procedimentos_service,
+)
+
+
+def test_cache_hit_miss_e_chave_por_tenant(app_ctx):
+    chamadas = []
+
+    @cache_service.cached("teste")
+    def _fonte(x):
+        chamadas.append(x)
+        return {"x": x}
+
+    assert _fonte(1) == {"x": 1}
+    assert _fonte(1) == {"x": 1}
+    assert chamadas == [1]
+
+    g.tenant_schema = "tenant_outro"
+    _fonte(1)
+    assert chamadas == [1, 1]
+
+    stats = cache_service.get_stats()["teste"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_invalidacao_no_service_de_escrita(app_ctx):
+    antes = financeiro_service.get_all_procedimentos()
+    hits = cache_service.get_stats()[cache_service.NS_PROCEDIMENTOS]["hits"]
+    assert financeiro_service.get_all_procedimentos() == antes
+    stats = cache_service.get_stats()[cache_service.NS_PROCEDIMENTOS]
+    assert stats["hits"] == hits + 1
+
+    novo = procedimentos_service.create_tratamento(
+        {
+            "nome": "Proc Cache Teste",
+            "categoria": CategoriaEnum.CLINICA_GERAL.value,
+            "valor_padrao": "123.45",
+        },
+        user_id=1,
+    )
+    assert novo is not None
+
+    depois = financeiro_service.get_all_procedimentos()
+    assert depois != antes
+    snap = next(p for p in depois if p.id == novo.id)
+    assert snap.valor_padrao == Decimal("123.45")
+    assert not isinstance(snap, Procedimento)
+    db.session.rollback()
+
+
+def test_mutar_resultado_nao_corrompe_cache(app_ctx):
+    @cache_service.cached("teste_copia")
+    def _fonte():
+        return {"itens": [3, 1, 2]}
+
+    primeiro = _fonte()
+    primeiro["itens"].sort()
+    primeiro["extra"] = True
+    assert _fonte() == {"itens": [3, 1, 2]}
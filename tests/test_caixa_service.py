@@ -0,0 +1,162 @@
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import (
+    FechamentoCaixa,
+    LancamentoFinanceiro,
+    Paciente,
+    Procedimento,
+    ResumoCaixaDiario,
+    RoleEnum,
+    Usuario,
+)
+from app.services import caixa_service, financeiro_service
+
+
+def _dia_livre() -> date:
+    """Dia no passado sem fechamento nem lançamentos (banco compartilhado)."""
+    while True:
+        dia = date(1990, 1, 1) + timedelta(days=random.randint(0, 9000))
+        fechado = db.session.get(FechamentoCaixa, dia) is not None
+        seguinte = dia + timedelta(days=1)
+        if not fechado and not caixa_service.agregar_lancamentos(
+            dia, seguinte
+        ):
+            return dia
+
+
+def _mover_para(lanc: LancamentoFinanceiro, dia: date) -> None:
+    lanc.data_lancamento = datetime.combine(dia, datetime.min.time()).replace(
+        hour=10
+    )
+    db.session.commit()
+
+
+@pytest.fixture
+def dia_com_movimento(app_ctx):
+    """PIX 100, DINHEIRO 50 estornado e ajuste +20 no mesmo dia."""
+    paciente = db.session.query(Paciente).first()
+    dentista = (
+        db.session.query(Usuario).filter(Usuario.role == RoleEnum.DENTISTA)
+    ).first()
+    proc = Procedimento(
+        nome="Caixa teste", valor_padrao=Decimal("300.00"), is_active=True
+    )
+    db.session.add(proc)
+    db.session.commit()
+    plano = financeiro_service.create_plano(
+        paciente_id=paciente.id,
+        dentista_id=dentista.id,
+        itens_data=[{"procedimento_id": proc.id}],
+        usuario_id=1,
+    )
+    financeiro_service.approve_plano(
+        plano_id=plano.id, desconto=0, usuario_id=1
+    )
+
+    dia = _dia_livre()
+    pix = financeiro_service.add_lancamento(plano.id, "100.00", "PIX", 1)
+    dinheiro = financeiro_service.add_lancamento(
+        plano.id, "50.00", "DINHEIRO", 1
+    )
+    ajuste = financeiro_service.add_lancamento_ajuste(
+        plano.id, "20.00", "Correção", 1
+    )
+    for lanc in (pix, dinheiro, ajuste):
+        _mover_para(lanc, dia)
+    estorno = financeiro_service.add_lancamento_estorno(dinheiro.id, "x", 1)
+    _mover_para(estorno, dia)
+    return dia
+
+
+def test_previa_agrupa_por_metodo_com_estorno_e_ajuste(dia_com_movimento):
+    previa = caixa_service.previa_fechamento(
+        dia_com_movimento, Decimal("95.00")
+    )
+    linhas = {linha.metodo_pagamento: linha for linha in previa.linhas}
+
+    assert set(linhas) == {"PIX", "DINHEIRO", "AJUSTE"}
+    assert linhas["PIX"].total_caixa == Decimal("100.00")
+    assert linhas["DINHEIRO"].quantidade == 2
+    assert linhas["DINHEIRO"].total_estornos == Decimal("-50.00")
+    assert linhas["DINHEIRO"].total_caixa == Decimal("0.00")
+    assert linhas["AJUSTE"].total_ajustes == Decimal("20.00")
+    assert previa.total_esperado == Decimal("100.00")
+    assert previa.diferenca == Decimal("-5.00")
+    assert not previa.fechado
+
+
+def test_estorno_de_ajuste_nao_sai_do_caixa(dia_com_movimento):
+    ajuste = (
+        db.session.query(LancamentoFinanceiro)
+        .filter(
+            LancamentoFinanceiro.tipo_lancamento
+            == LancamentoFinanceiro.LancamentoTipo.AJUSTE,
+            LancamentoFinanceiro.lancamento_estornado_id.is_(None),
+            LancamentoFinanceiro.data_lancamento
+            >= caixa_service._inicio(dia_com_movimento),
+            LancamentoFinanceiro.data_lancamento
+            < caixa_service._inicio(dia_com_movimento + timedelta(days=1)),
+        )
+        .one()
+    )
+    estorno = financeiro_service.add_lancamento_estorno(ajuste.id, "x", 1)
+    _mover_para(estorno, dia_com_movimento)
+
+    previa = caixa_service.previa_fechamento(dia_com_movimento)
+    linhas = {linha.metodo_pagamento: linha for linha in previa.linhas}
+    assert linhas["AJUSTE"].total_ajustes == Decimal("0.00")
+    assert linhas["AJUSTE"].total_estornos == Decimal("0.00")
+    assert linhas["DINHEIRO"].total_estornos == Decimal("-50.00")
+    assert previa.total_esperado == Decimal("100.00")
+
+
+def test_fechamento_grava_resumo_e_visao_mensal_le_resumo(dia_com_movimento):
+    dia = dia_com_movimento
+    fech = financeiro_service.fechar_caixa_dia(dia, Decimal("95.00"), 1)
+    assert fech.saldo_esperado == Decimal("100.00")
+    assert fech.diferenca == Decimal("-5.00")
+
+    gravados = (
+        db.session.query(ResumoCaixaDiario)
+        .filter(ResumoCaixaDiario.data == dia)
+        .all()
+    )
+    assert {r.metodo_pagamento for r in gravados} == {
+        "PIX",
+        "DINHEIRO",
+        "AJUSTE",
+    }
+
+    # Visão mensal usa o resumo gravado, não os lançamentos
+    pix = next(r for r in gravados if r.metodo_pagamento == "PIX")
+    pix.total_pagamentos = Decimal("111.00")
+    db.session.commit()
+    mensal = caixa_service.resumo_mensal(dia.year, dia.month)
+    linha_dia = next(d for d in mensal.dias if d.data == dia)
+    assert linha_dia.fechado
+    assert linha_dia.metodos["PIX"].total_caixa == Decimal("111.00")
+    assert linha_dia.total_ajustes == Decimal("20.00")
+    assert linha_dia.diferenca == Decimal("95.00") - Decimal("111.00")
+
+
+def test_rotas_previa_e_mensal(client, dia_com_movimento):
+    client.get("/__dev/login_as/admin")
+    dia = dia_com_movimento
+    resp = client.get(
+        "/admin/caixa/previa",
+        query_string={"data_caixa": dia.isoformat(), "saldo_apurado": "100"},
+    )
+    assert resp.status_code == 200
+    html = resp.get_data(as_text=True)
+    assert "PIX" in html and "R$ 100,00" in html
+
+    resp = client.get(
+        "/admin/caixa/mensal", query_string={"ano": dia.year, "mes": dia.month}
+    )
+    assert resp.status_code == 200
+    assert "DINHEIRO" in resp.get_data(as_text=True)
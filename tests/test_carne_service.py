@@ -0,0 +1,157 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import (
+    Paciente,
+    ParcelaPrevista,
+    Procedimento,
+    RoleEnum,
+    Usuario,
+)
+from app.services import carne_service, financeiro_service
+
+
+def _plano_aprovado(valor: str) -> int:
+    dentista = (
+        db.session.query(Usuario).filter(Usuario.role == RoleEnum.DENTISTA)
+    ).first()
+    proc = Procedimento(nome="Ortodontia", valor_padrao=Decimal(valor))
+    db.session.add(proc)
+    db.session.commit()
+    plano = financeiro_service.create_plano(
+        paciente_id=db.session.query(Paciente).first().id,
+        dentista_id=dentista.id,
+        itens_data=[{"procedimento_id": proc.id}],
+        usuario_id=1,
+    )
+    financeiro_service.approve_plano(
+        plano_id=plano.id, desconto=0, usuario_id=1
+    )
+    return plano.id
+
+
+def test_calcular_parcelas_distribui_resto_e_fim_de_mes():
+    parcelas = carne_service.calcular_parcelas(
+        Decimal("10000.07"), 120, date(2024, 1, 31)
+    )
+    valores = [valor for _, valor in parcelas]
+    assert len(parcelas) == 120
+    assert sum(valores) == Decimal("10000.07")
+    # 1.000.007 centavos / 120 = 8333 resto 47
+    assert valores[:47] == [Decimal("83.34")] * 47
+    assert valores[47:] == [Decimal("83.33")] * 73
+    assert [venc for venc, _ in parcelas[:3]] == [
+        date(2024, 1, 31),
+        date(2024, 2, 29),
+        date(2024, 3, 31),
+    ]
+    assert parcelas[-1][0] == date(2033, 12, 31)
+
+    with pytest.raises(ValueError):
+        carne_service.calcular_parcelas(Decimal("100"), 0, date.today())
+
+
+def test_carne_120_parcelas_em_um_insert(app_ctx):
+    plano_id = _plano_aprovado("18000.01")
+    inserts = []
+
+    def _conta(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO"):
+            if "parcela_prevista" in statement:
+                inserts.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", _conta)
+    try:
+        financeiro_service.gerar_parcelamento_previsto(
+            plano_id, 120, date(2025, 3, 10), usuario_id=1
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", _conta)
+
+    assert len(inserts) == 1
+    valores = [
+        Decimal(v)
+        for (v,) in db.session.query(ParcelaPrevista.valor_previsto).filter(
+            ParcelaPrevista.plano_id == plano_id
+        )
+    ]
+    assert len(valores) == 120
+    assert sum(valores) == Decimal("18000.01")
+
+
+def test_regerar_a_partir_do_saldo_preserva_pagas(app_ctx):
+    plano_id = _plano_aprovado("1000.00")
+    financeiro_service.gerar_parcelamento_previsto(
+        plano_id, 4, date(2025, 1, 10), usuario_id=1
+    )
+    financeiro_service.add_lancamento(plano_id, "300.00", "PIX", 1)
+
+    financeiro_service.regerar_parcelamento_saldo(
+        plano_id, 3, date(2025, 6, 10), usuario_id=1
+    )
+    carne = financeiro_service.get_carne_detalhado(plano_id)
+    assert [item["status"] for item in carne] == [
+        "Paga",
+        "Paga",
+        "Pendente",
+        "Pendente",
+        "Pendente",
+    ]
+    parcelas = [item["parcela"] for item in carne]
+    assert [p.valor_previsto for p in parcelas] == [
+        Decimal("250.00"),
+        Decimal("50.00"),
+        Decimal("233.34"),
+        Decimal("233.33"),
+        Decimal("233.33"),
+    ]
+    assert parcelas[1].observacao == carne_service.OBS_PARCIAL
+    assert parcelas[2].data_vencimento == date(2025, 6, 10)
+    assert carne[-1]["previsto_cumulativo"] == Decimal("1000.00")
+
+    financeiro_service.add_lancamento(plano_id, "700.00", "PIX", 1)
+    with pytest.raises(ValueError):
+        financeiro_service.regerar_parcelamento_saldo(
+            plano_id, 2, date(2025, 6, 10), usuario_id=1
+        )
+
+
+def test_regerar_exige_inicio_apos_ultima_parcela_paga(app_ctx):
+    plano_id = _plano_aprovado("1000.00")
+    financeiro_service.gerar_parcelamento_previsto(
+        plano_id, 4, date(2025, 1, 10), usuario_id=1
+    )
+    # Pagamento antecipado: cobre até a parcela de março
+    financeiro_service.add_lancamento(plano_id, "600.00", "PIX", 1)
+
+    for inicio in (date(2024, 12, 10), date(2025, 3, 10)):
+        with pytest.raises(ValueError, match="10/03/2025"):
+            financeiro_service.regerar_parcelamento_saldo(
+                plano_id, 2, inicio, usuario_id=1
+            )
+    # Cronograma original intacto após a recusa
+    db.session.expire_all()
+    assert (
+        db.session.query(ParcelaPrevista)
+        .filter(ParcelaPrevista.plano_id == plano_id)
+        .count()
+        == 4
+    )
+
+    financeiro_service.regerar_parcelamento_saldo(
+        plano_id, 2, date(2025, 3, 11), usuario_id=1
+    )
+    carne = financeiro_service.get_carne_detalhado(plano_id)
+    assert [item["status"] for item in carne] == [
+        "Paga",
+        "Paga",
+        "Paga",
+        "Pendente",
+        "Pendente",
+    ]
+    assert carne[2]["parcela"].observacao == carne_service.OBS_PARCIAL
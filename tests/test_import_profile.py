@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+from app import create_app
+from app.utils.import_profile import ImportProfile, parse_importtime
+
+_PESADOS = ("httpx", "apscheduler", "flask_apscheduler", "alembic", "mako")
+
+
+def test_create_app_nao_importa_dependencias_pesadas():
+    code = (
+        "import sys; from app import create_app; create_app('testing'); "
+        f"print(','.join(m for m in {_PESADOS!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip() == ""
+
+
+def test_grupo_db_carrega_flask_migrate_sob_demanda():
+    app = create_app("testing")
+    result = app.test_cli_runner().invoke(args=["db", "--help"])
+    assert result.exit_code == 0, result.output
+    assert "upgrade-tenants" in result.output
+    assert "migrate" in app.extensions
+
+
+def test_parse_importtime_agrega_por_pacote():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |     httpx._api\n"
+        "import time:        50 |        150 |   httpx\n"
+        "import time:        30 |         30 | app.models\n"
+        "ruído qualquer\n"
+    )
+    profile = ImportProfile(parse_importtime(stderr))
+    assert profile.total_us == 180
+    assert profile.by_package()[0] == ("httpx", 150, 2)
+    assert profile.slowest(1)[0].module == "httpx"
+    assert [e.depth for e in profile.entries] == [2, 1, 0]
@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.models import JobRun
+from app.services import jobs_service
+
+
+@pytest.fixture
+def job_teste(app_ctx):
+    chamadas = []
+
+    def _func(app):
+        chamadas.append(app)
+        if getattr(_func, "falhar", False):
+            raise RuntimeError("falha proposital")
+
+    spec = jobs_service.registrar_job(
+        jobs_service.JobSpec(
+            id="teste_execucao_unica",
+            func=_func,
+            descricao="Job de teste",
+            trigger={"trigger": "interval", "minutes": 5},
+            deduplicar_s=0,
+        )
+    )
+    db.session.query(JobRun).filter_by(job_id=spec.id).delete()
+    db.session.commit()
+    yield spec, chamadas
+    jobs_service.remover_job(spec.id)
+
+
+def _runs(job_id):
+    db.session.expire_all()
+    return (
+        db.session.query(JobRun)
+        .filter_by(job_id=job_id)
+        .order_by(JobRun.id)
+        .all()
+    )
+
+
+def test_registro_padrao_tem_jobs_de_manutencao(app_ctx):
+    ids = {spec.id for spec in jobs_service.job_registry()}
+    assert {
+        "retencao_dados",
+        "relatorio_financeiro",
+        "precos_agendados",
+        "feriados_prefetch",
+    } <= ids
+
+
+def test_executa_e_grava_historico(app, job_teste):
+    spec, chamadas = job_teste
+    assert jobs_service.executar_job(app, spec.id) == jobs_service.STATUS_OK
+    assert len(chamadas) == 1
+
+    spec.func.falhar = True
+    assert jobs_service.executar_job(app, spec.id) == "error"
+    ok, erro = _runs(spec.id)
+    assert ok.status == "ok" and ok.duration_ms is not None
+    assert ok.finished_at >= ok.started_at
+    assert erro.status == "error" and "falha proposital" in erro.error
+
+
+def test_lock_de_outro_processo_e_disparo_repetido(app, job_teste):
+    spec, chamadas = job_teste
+    chave = jobs_service.lock_key(spec.id)
+    # Outro "processo" segurando o lock do job
+    with db.engine.connect() as outro:
+        outro.execute(text("SELECT pg_advisory_lock(:k)"), {"k": chave})
+        try:
+            status = jobs_service.executar_job(app, spec.id)
+        finally:
+            outro.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": chave})
+    assert status == jobs_service.SKIPPED_LOCKED
+    assert chamadas == [] and _runs(spec.id) == []
+
+    # Mesmo disparo executado por dois workers em sequência: roda uma vez
+    spec.deduplicar_s = 3600
+    assert jobs_service.executar_job(app, spec.id) == "ok"
+    assert (
+        jobs_service.executar_job(app, spec.id) == jobs_service.SKIPPED_RECENT
+    )
+    assert len(chamadas) == 1 and len(_runs(spec.id)) == 1
+
+
+def test_tela_admin_jobs(client, job_teste, app):
+    spec, _ = job_teste
+    jobs_service.executar_job(app, spec.id)
+    client.get("/__dev/login_as/admin")
+    html = client.get("/admin/jobs").get_data(as_text=True)
+    assert "retencao_dados" in html and spec.id in html
@@ -0,0 +1,128 @@
+import os
+
+import pytest
+from flask import request
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from app import db
+from app.models import DeveloperLog
+from app.services import log_service, telemetry_service
+
+
+class FalhaRecorrente(Exception):
+    pass
+
+
+def _falha(tipo=FalhaRecorrente, mensagem="x"):
+    try:
+        raise tipo(mensagem)
+    except Exception as exc:
+        return exc
+
+
+@pytest.fixture
+def fingerprint(app_ctx):
+    fp = log_service.fingerprint_exception(_falha())
+    db.session.query(DeveloperLog).filter_by(fingerprint=fp).delete()
+    db.session.commit()
+    return fp
+
+
+def test_fingerprint_ignora_mensagem_e_distingue_tipo(app_ctx):
+    a = log_service.fingerprint_exception(_falha(mensagem="paciente 1"))
+    b = log_service.fingerprint_exception(_falha(mensagem="paciente 2"))
+    c = log_service.fingerprint_exception(_falha(tipo=KeyError))
+    assert a == b
+    assert a != c
+
+
+def test_ocorrencias_repetidas_viram_contador(app, fingerprint, monkeypatch):
+    monkeypatch.setattr(log_service, "MAX_SAMPLES", 3)
+    for i in range(5):
+        with app.test_request_context(f"/agenda/feed?i={i}"):
+            log_service.record_exception(
+                _falha(mensagem=f"ocorrência {i}"), request, user_id=1
+            )
+    telemetry_service.flush()
+
+    logs = (
+        db.session.query(DeveloperLog).filter_by(fingerprint=fingerprint)
+    ).all()
+    assert len(logs) == 1
+    log = logs[0]
+    assert log.occurrence_count == 5
+    assert log.last_seen >= log.timestamp
+    # Anel limitado: só as amostras mais recentes
+    assert [s["message"] for s in log.samples] == [
+        "ocorrência 2",
+        "ocorrência 3",
+        "ocorrência 4",
+    ]
+    assert "FalhaRecorrente" in log.traceback
+
+
+def test_tela_devlogs_agrupa_por_fingerprint(app, client, fingerprint):
+    with app.test_request_context("/agenda/feed"):
+        for _ in range(2):
+            log_service.record_exception(_falha(), request, user_id=None)
+    telemetry_service.flush()
+    log_id = (
+        db.session.query(DeveloperLog.id)
+        .filter_by(fingerprint=fingerprint)
+        .scalar()
+    )
+
+    client.get("/__dev/login_as/admin")
+    html = client.get("/settings/admin/devlogs").get_data(as_text=True)
+    assert f"/settings/admin/devlogs/{log_id}" in html
+    html = client.get(f"/settings/admin/devlogs/{log_id}").get_data(
+        as_text=True
+    )
+    assert fingerprint in html and "Amostras recentes" in html
+
+
+def test_gravacao_fora_da_sessao_da_requisicao(app, fingerprint):
+    # Sessão da requisição em transação abortada (ex.: erro de SQL)
+    with pytest.raises(ProgrammingError):
+        db.session.execute(text("SELECT * FROM tabela_inexistente"))
+    with app.test_request_context("/agenda/feed"):
+        log_service.record_exception(_falha(), request, user_id=None)
+    telemetry_service.flush()
+
+    # A sessão não foi tocada: continua abortada até o rollback do handler
+    with pytest.raises(Exception, match="InFailedSqlTransaction|aborted"):
+        db.session.execute(text("SELECT 1"))
+    db.session.rollback()
+    assert (
+        db.session.query(DeveloperLog.occurrence_count)
+        .filter_by(fingerprint=fingerprint)
+        .scalar()
+    ) == 1
+
+
+def test_engine_de_telemetria_descartada_e_zerada_no_fork(
+    app_ctx, monkeypatch
+):
+    engine = telemetry_service._get_engine()
+    assert engine is telemetry_service._get_engine()
+    descartadas = []
+    monkeypatch.setattr(
+        engine, "dispose", lambda *a, **k: descartadas.append(engine)
+    )
+    # Outra URL (ex.: troca de app nos testes): a engine anterior é liberada
+    monkeypatch.setattr(telemetry_service, "_engine_key", "outra")
+    nova = telemetry_service._get_engine()
+    assert nova is not engine and descartadas == [engine]
+
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - processo filho
+        ok = (
+            telemetry_service._engine is None
+            and telemetry_service._writer is None
+            and not telemetry_service._engine_lock.locked()
+        )
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert telemetry_service._engine is nova
@@ -0,0 +1,87 @@
+import io
+
+import pytest
+from flask import g
+from werkzeug.datastructures import FileStorage
+
+from app import db
+from app.models import MediaPaciente, Paciente
+from app.services import media_derivatives_service
+from app.services.paciente_service import save_media_file
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def media_png(app, app_ctx, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "instance_path", str(tmp_path))
+    # Geração síncrona no teste (sem corrida com o pool)
+    monkeypatch.setattr(
+        media_derivatives_service, "schedule_derivatives", lambda _id: True
+    )
+    buf = io.BytesIO()
+    Image.new("RGB", (3000, 1500), (200, 180, 160)).save(buf, "PNG")
+    buf.seek(0)
+    p = Paciente(nome_completo="Paciente Radiografia")
+    db.session.add(p)
+    db.session.commit()
+    return save_media_file(
+        p.id,
+        FileStorage(buf, filename="panoramica.png", content_type="image/png"),
+        None,
+        usuario_id=1,
+    )
+
+
+def test_gera_thumb_e_preview(app_ctx, media_png, tmp_path):
+    assert (
+        media_derivatives_service.get_cached_derivative(media_png, "thumb")
+        is None
+    )
+
+    gerados = media_derivatives_service.generate_derivatives(media_png.id)
+
+    assert set(gerados) == {"thumb", "preview"}
+    base = tmp_path / "media_storage"
+    with Image.open(base / gerados["thumb"]) as thumb:
+        assert thumb.format == "JPEG"
+        assert max(thumb.size) == 256
+    with Image.open(base / gerados["preview"]) as preview:
+        assert max(preview.size) == 1600
+    assert (
+        media_derivatives_service.get_cached_derivative(media_png, "thumb")
+        == gerados["thumb"]
+    )
+
+
+def test_tamanho_invalido(app_ctx, media_png):
+    with pytest.raises(ValueError):
+        media_derivatives_service.get_cached_derivative(media_png, "huge")
+
+
+def test_derivados_nao_vazam_entre_tenants(app_ctx, media_png):
+    media_derivatives_service.generate_derivatives(media_png.id)
+
+    # Outro tenant: mesmo id de mídia (sequência do próprio schema),
+    # conteúdo diferente
+    g.tenant_schema = "tenant_outro"
+    try:
+        alheia = MediaPaciente(
+            id=media_png.id,
+            file_path="media/ff/outro.png",
+            content_sha256="f" * 64,
+        )
+        assert (
+            media_derivatives_service.get_cached_derivative(alheia, "thumb")
+            is None
+        )
+        # Legadas (sem hash): chave inclui o schema
+        legada = MediaPaciente(id=media_png.id, file_path="legado.png")
+        caminho_outro = media_derivatives_service.derivative_path(
+            legada, "thumb"
+        )
+    finally:
+        g.pop("tenant_schema")
+    assert caminho_outro != media_derivatives_service.derivative_path(
+        legada, "thumb"
+    )
@@ -0,0 +1,91 @@
+import re
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.services import cache_service, timeline_service  # noqa: E402
+
+
+@pytest.fixture
+def metrics_app(monkeypatch):
+    monkeypatch.setattr(Config, "METRICS_ENABLED", True)
+    monkeypatch.setattr(Config, "METRICS_TOKEN", None)
+    return create_app("testing")
+
+
+def _sample(body: str, name: str, **labels) -> float:
+    """Valor de uma série no texto de exposição (0 se ausente)."""
+    for line in body.splitlines():
+        if not line.startswith(name + "{") and not line.startswith(name + " "):
+            continue
+        if all(f'{k}="{v}"' in line for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_expoe_requisicoes_pool_cache_e_historico(metrics_app):
+    client = metrics_app.test_client()
+    before = client.get("/metrics").get_data(as_text=True)
+
+    client.get("/__dev/login_as/admin")
+    with metrics_app.app_context():
+
+        @cache_service.cached("metrics_teste")
+        def _fonte():
+            return 1
+
+        _fonte()
+        _fonte()
+        assert timeline_service.create_timeline_evento(
+            "SISTEMA", "evento de métrica", None
+        )
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    body = resp.get_data(as_text=True)
+
+    def delta(name, **labels):
+        return _sample(body, name, **labels) - _sample(before, name, **labels)
+
+    assert (
+        delta(
+            "echodent_request_duration_seconds_count",
+            endpoint="auth_bp.dev_login_as",
+            method="GET",
+        )
+        == 1
+    )
+    assert delta("echodent_db_pool_checkout_wait_seconds_count") >= 1
+    assert re.search(r"^echodent_db_pool_size \d", body, re.M)
+    assert (
+        delta(
+            "echodent_cache_requests_total",
+            namespace="metrics_teste",
+            result="hit",
+        )
+        == 1
+    )
+    assert (
+        delta(
+            "echodent_cache_requests_total",
+            namespace="metrics_teste",
+            result="miss",
+        )
+        == 1
+    )
+    assert delta("echodent_rows_written_total") >= 1
+
+
+def test_metrics_token_e_desligado(metrics_app, app):
+    metrics_app.config["METRICS_TOKEN"] = "segredo"
+    client = metrics_app.test_client()
+    assert client.get("/metrics").status_code == 401
+    ok = client.get("/metrics", headers={"Authorization": "Bearer segredo"})
+    assert ok.status_code == 200
+
+    # App padrão (METRICS_ENABLED desligado): rota oculta
+    assert app.test_client().get("/metrics").status_code == 404
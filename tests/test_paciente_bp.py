@@ -30,6 +30,7 @@ def test_post_atualizar_ficha_atomic(client, paciente_ficha):
     assert p_db.anamnese.alergias == "Aspirina"
 
 
+@pytest.mark.query_budget(6, endpoint="paciente_bp.ficha")
 def test_get_ficha_returns_html(client, paciente_ficha):
     # Autenticar para acessar rota protegida
     client.get("/__dev/login_as/admin")
@@ -42,3 +43,60 @@ def test_get_ficha_returns_html(client, paciente_ficha):
         or b"Anamnese PENDENTE" in resp.data
         or b"Anamnese DESATUALIZADA" in resp.data
     )
+
+
+@pytest.fixture
+def media_salva(app, paciente_ficha, tmp_path, monkeypatch):
+    import io
+
+    from werkzeug.datastructures import FileStorage
+
+    from app.services import media_derivatives_service
+    from app.services.paciente_service import save_media_file
+
+    monkeypatch.setattr(app, "instance_path", str(tmp_path))
+    monkeypatch.setattr(
+        media_derivatives_service, "schedule_derivatives", lambda _id: True
+    )
+    conteudo = bytes(range(256)) * 64
+    media = save_media_file(
+        paciente_ficha.id,
+        FileStorage(io.BytesIO(conteudo), filename="scan.bin"),
+        None,
+        usuario_id=1,
+    )
+    return media, conteudo
+
+
+def test_media_etag_304_e_range_206(client, media_salva):
+    media, conteudo = media_salva
+    client.get("/__dev/login_as/admin")
+    url = f"/pacientes/media/{media.id}"
+
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp.get_etag()[0] == media.content_sha256
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert resp.headers.get("Last-Modified")
+    assert resp.headers.get("Accept-Ranges") == "bytes"
+
+    resp = client.get(url, headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+    assert resp.data == b""
+
+    resp = client.get(url, headers={"Range": "bytes=100-199"})
+    assert resp.status_code == 206
+    assert resp.data == conteudo[100:200]
+    assert resp.headers["Content-Range"] == f"bytes 100-199/{len(conteudo)}"
+
+
+def test_media_size_sem_derivado_nao_fica_em_cache(client, media_salva):
+    media, conteudo = media_salva
+    client.get("/__dev/login_as/admin")
+
+    resp = client.get(f"/pacientes/media/{media.id}?size=thumb")
+    assert resp.status_code == 200
+    assert resp.data == conteudo
+    assert "no-store" in resp.headers["Cache-Control"]
+    assert "immutable" not in resp.headers["Cache-Control"]
+    assert "ETag" not in resp.headers
@@ -75,3 +75,52 @@ def test_update_ficha_anamnese_atomic_sanitiza(app_ctx):
     # confirmação de status concluída e data atual
     assert a.status == AnamneseStatus.CONCLUIDA
     assert a.data_atualizacao is not None
+
+
+def test_save_media_file_streaming_dedup(app, app_ctx, tmp_path, monkeypatch):
+    """Mesmo conteúdo em pacientes distintos gera um único arquivo."""
+    import hashlib
+    import io
+    import os
+
+    from werkzeug.datastructures import FileStorage
+
+    from app.services.paciente_service import save_media_file
+
+    monkeypatch.setattr(app, "instance_path", str(tmp_path))
+    conteudo = os.urandom(3 * 1024 * 1024 + 17)  # > 1 chunk
+    p1 = Paciente(nome_completo="Media Um")
+    p2 = Paciente(nome_completo="Media Dois")
+    db.session.add_all([p1, p2])
+    db.session.commit()
+
+    m1 = save_media_file(
+        p1.id,
+        FileStorage(io.BytesIO(conteudo), filename="Panoramica.JPG"),
+        None,
+        usuario_id=1,
+    )
+    m2 = save_media_file(
+        p2.id,
+        FileStorage(io.BytesIO(conteudo), filename="copia.jpg"),
+        "Cópia",
+        usuario_id=1,
+    )
+
+    m3 = save_media_file(
+        p2.id,
+        FileStorage(io.BytesIO(conteudo), filename="outra.JPEG"),
+        None,
+        usuario_id=1,
+    )
+
+    sha = hashlib.sha256(conteudo).hexdigest()
+    assert m1.content_sha256 == m2.content_sha256 == sha
+    # .JPG, .jpg e .JPEG: uma única cópia no storage
+    assert m1.file_path == m2.file_path == m3.file_path
+    assert m1.file_path == f"media/{sha[:2]}/{sha}.jpg"
+    assert m1.size_bytes == len(conteudo)
+    assert m1.original_filename == "Panoramica.JPG"
+    stored = tmp_path / "media_storage" / m1.file_path
+    assert stored.read_bytes() == conteudo
+    assert os.listdir(tmp_path / "media_storage" / ".tmp") == []
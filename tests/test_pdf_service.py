@@ -0,0 +1,135 @@
+import io
+import time
+
+from app import db
+from app.models import Paciente, RoleEnum, TemplateDocumento, Usuario
+from app.services import pdf_service, servico_emissao, storage_service
+
+
+def _criar_log_emissao() -> int:
+    pac = db.session.query(Paciente).first()
+    dent = (
+        db.session.query(Usuario)
+        .filter(Usuario.role == RoleEnum.DENTISTA)
+        .first()
+    )
+    tpl = db.session.query(TemplateDocumento).first()
+    assert pac and dent and tpl, "Seeder didn't create base data."
+    return servico_emissao.criar_log_emissao(
+        paciente_id=pac.id,
+        usuario_id=dent.id,
+        template_id=tpl.id,
+        dados_chave={"dias_repouso": "2"},
+        dentista_responsavel_id=dent.id,
+    )
+
+
+def test_pdf_cache_hit_nao_agenda_job(app, app_ctx, tmp_path, monkeypatch):
+    """Reimpressão com PDF já em cache devolve o mesmo handle sem pool."""
+    monkeypatch.setattr(app, "instance_path", str(tmp_path))
+    log_id = _criar_log_emissao()
+
+    with app.test_request_context("/"):
+        handle = pdf_service.content_hash(pdf_service.render_log_html(log_id))
+        storage_service.get_storage_service().save_file(
+            io.BytesIO(b"%PDF-1.7 cached"),
+            relative_path=pdf_service.cache_path(handle),
+        )
+
+        def _sem_pool():
+            raise AssertionError("cache hit não deve criar o pool")
+
+        monkeypatch.setattr(pdf_service, "_get_executor", _sem_pool)
+        assert pdf_service.submit_pdf_job(log_id) == handle
+
+    assert pdf_service.get_pdf_job_status(handle) == pdf_service.JOB_DONE
+    fh = pdf_service.open_cached_pdf(handle)
+    assert fh is not None
+    with fh:
+        assert fh.read() == b"%PDF-1.7 cached"
+
+
+def test_pdf_handle_invalido(app_ctx):
+    assert pdf_service.get_pdf_job_status("../etc") == pdf_service.JOB_UNKNOWN
+    assert pdf_service.open_cached_pdf("x" * 64) is None
+
+
+def test_pdf_falha_ao_gravar_vira_erro_e_reenvio_agenda(
+    app, app_ctx, tmp_path, monkeypatch
+):
+    """Falha no storage não deixa o job 'pending' para sempre."""
+    from concurrent.futures import Future
+
+    monkeypatch.setattr(app, "instance_path", str(tmp_path))
+    handle = "ab" * 32
+    storage = storage_service.get_storage_service()
+    monkeypatch.setattr(pdf_service, "render_log_html", lambda _id: "<p/>")
+    monkeypatch.setattr(pdf_service, "content_hash", lambda _html: handle)
+    futuros = []
+
+    class _Pool:
+        def submit(self, *args):
+            futuros.append(Future())
+            return futuros[-1]
+
+    monkeypatch.setattr(pdf_service, "_get_executor", lambda: _Pool())
+    with app.test_request_context("/"):
+        assert pdf_service.submit_pdf_job(1) == handle
+    assert pdf_service.get_pdf_job_status(handle) == pdf_service.JOB_PENDING
+
+    salvar = storage.save_file
+
+    def _disco_cheio(stream, relative_path, content_type=None):
+        if relative_path.endswith(".pdf"):
+            raise OSError("disco cheio")
+        return salvar(stream, relative_path, content_type)
+
+    monkeypatch.setattr(storage, "save_file", _disco_cheio)
+    futuros[0].set_result(b"%PDF-1.7")
+    monkeypatch.setattr(storage, "save_file", salvar)
+
+    assert handle not in pdf_service._jobs
+    assert pdf_service.get_pdf_job_status(handle) == pdf_service.JOB_ERROR
+
+    # Reenvio do mesmo documento agenda um job novo
+    with app.test_request_context("/"):
+        assert pdf_service.submit_pdf_job(1) == handle
+    assert len(futuros) == 2
+    assert pdf_service.get_pdf_job_status(handle) == pdf_service.JOB_PENDING
+    futuros[1].set_result(b"%PDF-1.7 ok")
+    assert pdf_service.get_pdf_job_status(handle) == pdf_service.JOB_DONE
+
+
+def test_pdf_estado_compartilhado_entre_workers(
+    app, app_ctx, tmp_path, monkeypatch
+):
+    """Outro worker (sem o Future em memória) enxerga o job pelo storage."""
+    monkeypatch.setattr(app, "instance_path", str(tmp_path))
+    handle = "cd" * 32
+    storage = storage_service.get_storage_service()
+    monkeypatch.setattr(pdf_service, "render_log_html", lambda _id: "<p/>")
+    monkeypatch.setattr(pdf_service, "content_hash", lambda _html: handle)
+
+    def _sem_pool():
+        raise AssertionError("job em andamento em outro worker")
+
+    monkeypatch.setattr(pdf_service, "_get_executor", _sem_pool)
+
+    # Job agendado por outro worker
+    pdf_service._write_marker(
+        storage, handle, pdf_service.MARKER_PENDING, str(time.time())
+    )
+    assert handle not in pdf_service._jobs
+    assert pdf_service.get_pdf_job_status(handle) == pdf_service.JOB_PENDING
+    with app.test_request_context("/"):
+        assert pdf_service.submit_pdf_job(1) == handle
+
+    # Worker morreu no meio do job: vira erro após PDF_JOB_TIMEOUT_S
+    monkeypatch.setitem(app.config, "PDF_JOB_TIMEOUT_S", 0)
+    assert pdf_service.get_pdf_job_status(handle) == pdf_service.JOB_ERROR
+
+    client = app.test_client()
+    client.get("/__dev/login_as/admin")
+    monkeypatch.setitem(app.config, "PDF_SERVER_RENDER", True)
+    resp = client.get(f"/imprimir/pdf/{handle}")
+    assert resp.status_code == 500
@@ -0,0 +1,169 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import (
+    CategoriaEnum,
+    Paciente,
+    Procedimento,
+    ProcedimentoPreco,
+    RoleEnum,
+    Usuario,
+)
+from app.services import (
+    financeiro_service,
+    precos_service,
+    procedimentos_service,
+)
+
+HOJE = date.today()
+
+
+@pytest.fixture
+def proc_id(app_ctx):
+    proc = procedimentos_service.create_tratamento(
+        {
+            "nome": "Clareamento versionado",
+            "categoria": CategoriaEnum.ESTETICA.value,
+            "valor_padrao": "100.00",
+        },
+        user_id=1,
+    )
+    return proc.id
+
+
+def _vigencias(pid):
+    return [
+        (p.valor, p.valid_from, p.valid_to)
+        for p in precos_service.get_historico(pid)
+    ]
+
+
+def test_agendamento_divide_vigencias_e_lookup(proc_id):
+    assert _vigencias(proc_id) == [(Decimal("100.00"), HOJE, None)]
+
+    d10, d30 = HOJE + timedelta(days=10), HOJE + timedelta(days=30)
+    precos_service.agendar_preco(proc_id, "150.00", d30, user_id=1)
+    precos_service.agendar_preco(proc_id, "120.00", d10, user_id=1)
+    assert _vigencias(proc_id) == [
+        (Decimal("100.00"), HOJE, d10),
+        (Decimal("120.00"), d10, d30),
+        (Decimal("150.00"), d30, None),
+    ]
+    assert precos_service.get_preco_vigente(proc_id) == Decimal("100.00")
+    assert precos_service.get_preco_vigente(proc_id, d30) == Decimal("150")
+    assert precos_service.get_preco_vigente(-1) is None
+
+    # Edição de hoje encerra só a vigência atual
+    procedimentos_service.update_tratamento(
+        proc_id, {"valor_padrao": "110.00"}, user_id=1
+    )
+    assert _vigencias(proc_id)[0] == (Decimal("110.00"), HOJE, d10)
+
+    assert precos_service.aplicar_precos_agendados(d10) >= 1
+    db.session.expire_all()
+    assert db.session.get(Procedimento, proc_id).valor_padrao == Decimal(
+        "120.00"
+    )
+
+
+@pytest.fixture
+def procs_legados(app_ctx):
+    """Procedimentos anteriores à tabela de preços (sem histórico)."""
+    criado = datetime(2020, 1, 15, tzinfo=timezone.utc)
+    procs = [
+        Procedimento(
+            nome=f"Legado preço {i}",
+            valor_padrao=Decimal("80.00"),
+            categoria=CategoriaEnum.ENDODONTIA,
+            created_at=criado,
+        )
+        for i in range(2)
+    ]
+    db.session.add_all(procs)
+    db.session.commit()
+    return [p.id for p in procs]
+
+
+def test_mudanca_sem_historico_preserva_preco_anterior(procs_legados):
+    edicao, massa = procs_legados
+    ontem = HOJE - timedelta(days=1)
+    procedimentos_service.update_tratamento(
+        edicao, {"valor_padrao": "95.00"}, user_id=1
+    )
+    assert _vigencias(edicao) == [
+        (Decimal("80.00"), date(2020, 1, 15), HOJE),
+        (Decimal("95.00"), HOJE, None),
+    ]
+    assert precos_service.get_preco_vigente(edicao, ontem) == Decimal("80")
+
+    # Ajuste em massa grava o valor_padrao antes do histórico
+    procedimentos_service.ajustar_precos_em_massa(
+        10.0, CategoriaEnum.ENDODONTIA.value, user_id=1
+    )
+    assert precos_service.get_preco_vigente(massa, ontem) == Decimal("80")
+    assert precos_service.get_preco_vigente(massa) == Decimal("88.00")
+
+
+def test_constraint_de_exclusao_impede_sobreposicao(proc_id):
+    db.session.add(
+        ProcedimentoPreco(
+            procedimento_id=proc_id,
+            valor=Decimal("1.00"),
+            valid_from=HOJE + timedelta(days=5),
+        )
+    )
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_create_plano_resolve_precos_em_uma_consulta(app_ctx):
+    procs = [
+        Procedimento(nome=f"Plano preço {i}", valor_padrao=Decimal("200"))
+        for i in range(3)
+    ]
+    db.session.add_all(procs)
+    db.session.commit()
+    # Preço vigente diferente do valor_padrao (sem job aplicado)
+    db.session.add(
+        ProcedimentoPreco(
+            procedimento_id=procs[0].id,
+            valor=Decimal("250.00"),
+            valid_from=HOJE - timedelta(days=1),
+        )
+    )
+    db.session.commit()
+    dentista = (
+        db.session.query(Usuario).filter(Usuario.role == RoleEnum.DENTISTA)
+    ).first()
+    paciente_id = db.session.query(Paciente.id).first()[0]
+    itens = [{"procedimento_id": p.id} for p in procs]
+
+    consultas = []
+
+    def _conta(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().startswith("SELECT") and (
+            "procedimentos" in statement
+        ):
+            consultas.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _conta)
+    try:
+        plano = financeiro_service.create_plano(
+            paciente_id=paciente_id,
+            dentista_id=dentista.id,
+            itens_data=itens,
+            usuario_id=1,
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _conta)
+
+    assert len(consultas) == 1
+    valores = sorted(item.valor_cobrado for item in plano.itens)
+    assert valores == [Decimal("200"), Decimal("200"), Decimal("250.00")]
+    assert plano.valor_total == Decimal("650.00")
@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import CategoriaEnum, LogAuditoria, Procedimento
+from app.services import procedimentos_service
+
+CATEGORIA = CategoriaEnum.OUTROS.value
+
+
+@pytest.fixture
+def dois_procs(app_ctx):
+    procs = [
+        Procedimento(
+            nome=f"Ajuste massa {valor}",
+            valor_padrao=Decimal(valor),
+            categoria=CategoriaEnum.OUTROS,
+        )
+        for valor in ("100.00", "33.33")
+    ]
+    db.session.add_all(procs)
+    db.session.commit()
+    return [p.id for p in procs]
+
+
+def _precos(ids) -> list[Decimal]:
+    return [db.session.get(Procedimento, pid).valor_padrao for pid in ids]
+
+
+def test_preview_nao_altera_e_ajuste_gera_um_log(dois_procs):
+    preview = procedimentos_service.previsualizar_ajuste(10, CATEGORIA)
+    assert preview["total_afetados"] >= 2
+    assert _precos(dois_procs) == [Decimal("100.00"), Decimal("33.33")]
+
+    logs_antes = db.session.query(LogAuditoria).count()
+    resultado = procedimentos_service.ajustar_precos_em_massa(
+        10, CATEGORIA, user_id=1
+    )
+    assert resultado["sucesso"]
+    assert resultado["afetados"] == preview["total_afetados"]
+    db.session.expire_all()
+    assert _precos(dois_procs) == [Decimal("110.00"), Decimal("36.66")]
+
+    # Um único registro compacto, sem um log por procedimento
+    assert db.session.query(LogAuditoria).count() == logs_antes + 1
+    log = db.session.get(LogAuditoria, resultado["log_id"])
+    precos = {pid: (a, n) for pid, a, n in log.changes_json["precos"]}
+    assert precos[dois_procs[1]] == ("33.33", "36.66")
+
+    assert procedimentos_service.desfazer_ajuste_em_massa(log.id, 1)["sucesso"]
+
+
+def test_desfazer_restaura_e_preserva_alterados_depois(dois_procs):
+    resultado = procedimentos_service.ajustar_precos_em_massa(
+        -50, CATEGORIA, user_id=1
+    )
+    log_id = resultado["log_id"]
+    assert procedimentos_service.ultimo_ajuste_desfazivel().id == log_id
+
+    alterado = db.session.get(Procedimento, dois_procs[1])
+    alterado.valor_padrao = Decimal("99.99")
+    db.session.commit()
+
+    desfeito = procedimentos_service.desfazer_ajuste_em_massa(log_id, 1)
+    assert desfeito["sucesso"]
+    assert desfeito["ignorados"] == [dois_procs[1]]
+    db.session.expire_all()
+    assert _precos(dois_procs) == [Decimal("100.00"), Decimal("99.99")]
+
+    log = db.session.get(LogAuditoria, log_id)
+    assert "desfeito_por" in log.changes_json
+    ultimo = procedimentos_service.ultimo_ajuste_desfazivel()
+    assert ultimo is None or ultimo.id != log_id
+    again = procedimentos_service.desfazer_ajuste_em_massa(log_id, 1)
+    assert not again["sucesso"]
+
+
+def test_categoria_invalida_e_rota_desfazer(client, dois_procs):
+    assert not procedimentos_service.ajustar_precos_em_massa(
+        5, "Inexistente", user_id=1
+    )["sucesso"]
+
+    client.get("/__dev/login_as/admin")
+    log_id = procedimentos_service.ajustar_precos_em_massa(
+        5, CATEGORIA, user_id=1
+    )["log_id"]
+    resp = client.get("/tratamentos/")
+    assert f"/tratamentos/ajustar-precos/{log_id}/desfazer" in (
+        resp.get_data(as_text=True)
+    )
+    resp = client.post(f"/tratamentos/ajustar-precos/{log_id}/desfazer")
+    assert resp.status_code == 302
+    db.session.expire_all()
+    assert _precos(dois_procs) == [Decimal("100.00"), Decimal("33.33")]
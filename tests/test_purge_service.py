@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import and_, select
+
+from app import db
+from app.models import (
+    LogAuditoria,
+    Paciente,
+    PurgeCheckpoint,
+    TimelineEvento,
+    TimelineEventoArquivo,
+)
+from app.services import purge_service
+
+ANTIGO = datetime(1981, 5, 1, tzinfo=timezone.utc)
+CORTE = datetime(1990, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def checkpoints(app_ctx):
+    """Remove checkpoints de execuções de teste interrompidas."""
+    db.session.query(PurgeCheckpoint).filter(
+        PurgeCheckpoint.chave.like("teste%")
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+
+@pytest.fixture
+def auditoria(app_ctx):
+    """5 logs antigos e 1 recente, isolados por model_name."""
+    nome = f"purge_teste_{datetime.now().timestamp()}"
+    for ts in [ANTIGO] * 5 + [datetime.now(timezone.utc)]:
+        db.session.add(
+            LogAuditoria(
+                user_id=None,
+                action="update",
+                model_name=nome,
+                model_id=1,
+                changes_json={},
+                timestamp=ts,
+            )
+        )
+    db.session.commit()
+    return nome
+
+
+def _restantes(nome):
+    return db.session.query(LogAuditoria).filter_by(model_name=nome).count()
+
+
+def test_purga_em_lotes_por_faixa_de_pk(auditoria):
+    progresso = []
+    res = purge_service.purgar_em_lotes(
+        LogAuditoria,
+        and_(
+            LogAuditoria.model_name == auditoria,
+            LogAuditoria.timestamp < CORTE,
+        ),
+        chave="teste",
+        lote=2,
+        pausa_s=0,
+        progress=lambda r: progresso.append(r.removidos),
+    )
+    assert res.concluido and res.removidos == 5 and res.lotes == 3
+    assert progresso == [2, 4, 5]
+    assert _restantes(auditoria) == 1
+
+
+def test_interrompido_retoma_do_checkpoint(auditoria):
+    criterio = and_(
+        LogAuditoria.model_name == auditoria,
+        LogAuditoria.timestamp < CORTE,
+    )
+    opcoes = dict(chave="teste_retomada", lote=2, pausa_s=0)
+
+    parcial = purge_service.purgar_em_lotes(
+        LogAuditoria, criterio, max_lotes=1, **opcoes
+    )
+    assert not parcial.concluido and parcial.removidos == 2
+    chave = parcial.chave
+    assert purge_service.load_checkpoints()[chave] == parcial.cursor
+    # Persistido no banco: visível para qualquer processo/host
+    schema, _ = chave.split(":")
+    with db.engine.connect() as outra:
+        cursor = outra.execute(
+            select(PurgeCheckpoint.cursor).where(
+                PurgeCheckpoint.schema_name == schema,
+                PurgeCheckpoint.chave == "teste_retomada",
+            )
+        ).scalar()
+    assert cursor == parcial.cursor
+
+    final = purge_service.purgar_em_lotes(LogAuditoria, criterio, **opcoes)
+    assert final.retomado and final.concluido
+    assert final.removidos == 3
+    assert chave not in purge_service.load_checkpoints()
+    assert _restantes(auditoria) == 1
+
+
+def test_arquivamento_da_timeline(app_ctx):
+    paciente = Paciente(nome_completo="Paciente Arquivo Timeline")
+    db.session.add(paciente)
+    db.session.commit()
+    for i, ts in enumerate([ANTIGO, ANTIGO + timedelta(days=1), CORTE]):
+        db.session.add(
+            TimelineEvento(
+                paciente_id=paciente.id,
+                evento_tipo="CLINICO",
+                descricao=f"Arquivo {i}",
+                timestamp=ts,
+            )
+        )
+    db.session.commit()
+
+    res = purge_service.purgar_em_lotes(
+        TimelineEvento,
+        and_(
+            TimelineEvento.paciente_id == paciente.id,
+            TimelineEvento.timestamp < CORTE,
+        ),
+        chave="teste_timeline",
+        arquivo=TimelineEventoArquivo,
+        lote=1,
+        pausa_s=0,
+    )
+    assert res.removidos == 2 and res.lotes == 2
+    ativos = db.session.query(TimelineEvento.descricao).filter_by(
+        paciente_id=paciente.id
+    )
+    assert [d for (d,) in ativos] == ["Arquivo 2"]
+    arquivados = (
+        db.session.query(TimelineEventoArquivo)
+        .filter_by(paciente_id=paciente.id)
+        .order_by(TimelineEventoArquivo.id)
+        .all()
+    )
+    assert [a.descricao for a in arquivados] == ["Arquivo 0", "Arquivo 1"]
+    assert all(a.arquivado_em is not None for a in arquivados)
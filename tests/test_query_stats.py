@@ -0,0 +1,60 @@
+import pytest
+
+from app import db
+from app.models import Paciente
+from app.utils import query_stats
+
+
+def test_fingerprint_normaliza_literais_e_listas():
+    a = query_stats.fingerprint(
+        "SELECT * FROM p WHERE id = 10 AND nome = 'Ana'"
+    )
+    b = query_stats.fingerprint(
+        "SELECT *  FROM p\n WHERE id = 42 AND nome = 'O''Neil'"
+    )
+    assert a == b == "SELECT * FROM p WHERE id = ? AND nome = ?"
+    assert query_stats.fingerprint(
+        "SELECT 1 WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s)"
+    ) == query_stats.fingerprint("SELECT 1 WHERE id IN (%(id_1)s)")
+
+
+def test_collect_queries_detecta_repeticao(app_ctx):
+    ids = []
+    for i in range(3):
+        p = Paciente(nome_completo=f"N+1 {i}")
+        db.session.add(p)
+        db.session.commit()
+        ids.append(p.id)
+    db.session.expire_all()
+
+    with query_stats.collect_queries() as stats:
+        for pid in ids:
+            db.session.execute(
+                db.select(Paciente.nome_completo).where(Paciente.id == pid)
+            ).scalar_one()
+    assert stats.count == 3
+    assert stats.total_ms > 0
+    [(fp, n)] = stats.repeated(3)
+    assert n == 3 and "pacientes" in fp
+
+
+@pytest.mark.query_budget(10)
+def test_server_timing_e_agregado_por_endpoint(app, client):
+    client.get("/__dev/login_as/admin")
+    resp = client.get("/settings/admin/queries")
+    assert resp.status_code == 200
+    timing = resp.headers["Server-Timing"]
+    assert timing.startswith("db;dur=") and "queries" in timing
+
+    with app.app_context():
+        endpoints = query_stats.get_endpoint_stats()
+    assert endpoints["settings_bp.query_stats_panel"].requests == 1
+    assert endpoints["auth_bp.dev_login_as"].queries >= 1
+
+
+def test_desligado_sem_header(app, client):
+    app.config["QUERY_STATS_ENABLED"] = False
+    client.get("/__dev/login_as/admin")
+    resp = client.get("/settings/admin/queries")
+    assert resp.status_code == 404
+    assert "Server-Timing" not in resp.headers
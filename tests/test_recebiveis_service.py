@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import (
+    Paciente,
+    ParcelaPrevista,
+    Procedimento,
+    RoleEnum,
+    Usuario,
+)
+from app.services import financeiro_service, recebiveis_service
+
+
+@pytest.fixture
+def plano_carne(app_ctx):
+    """Plano 500 em 5 parcelas de 100 (4 vencidas), pago 100 + 50."""
+    dentista = (
+        db.session.query(Usuario).filter(Usuario.role == RoleEnum.DENTISTA)
+    ).first()
+    proc = Procedimento(nome="Carnê teste", valor_padrao=Decimal("500.00"))
+    db.session.add(proc)
+    db.session.commit()
+    plano = financeiro_service.create_plano(
+        paciente_id=db.session.query(Paciente).first().id,
+        dentista_id=dentista.id,
+        itens_data=[{"procedimento_id": proc.id}],
+        usuario_id=1,
+    )
+    financeiro_service.approve_plano(
+        plano_id=plano.id, desconto=0, usuario_id=1
+    )
+    hoje = date.today()
+    for dias in (100, 70, 40, 10, -20):
+        db.session.add(
+            ParcelaPrevista(
+                plano_id=plano.id,
+                data_vencimento=hoje - timedelta(days=dias),
+                valor_previsto=Decimal("100.00"),
+            )
+        )
+    db.session.commit()
+    financeiro_service.add_lancamento(plano.id, "100.00", "PIX", 1)
+    parcial = financeiro_service.add_lancamento(plano.id, "50.00", "PIX", 1)
+    return plano.id, parcial.id
+
+
+def _do_plano(resultado, plano_id):
+    return next(p for p in resultado.planos if p.plano_id == plano_id)
+
+
+def test_aging_distribui_valor_descoberto_por_faixa(plano_carne):
+    plano_id, _ = plano_carne
+    resultado = recebiveis_service.aging()
+    linha = _do_plano(resultado, plano_id)
+
+    # 1ª parcela coberta; 2ª coberta pela metade
+    assert linha.parcelas == 3
+    assert linha.dias_atraso == 70
+    assert linha.vencimento_antigo == date.today() - timedelta(days=70)
+    assert linha.por_faixa == {
+        "0-30": Decimal("100.00"),
+        "31-60": Decimal("100.00"),
+        "61-90": Decimal("50.00"),
+        "90+": Decimal("0.00"),
+    }
+    assert linha.total_vencido == Decimal("250.00")
+    assert resultado.total == sum(resultado.totais.values())
+
+    # Data-base antiga: só a 1ª parcela venceu, e está paga
+    antes = recebiveis_service.aging(date.today() - timedelta(days=90))
+    assert all(p.plano_id != plano_id for p in antes.planos)
+
+
+def test_aging_estorno_reabre_parcela_e_filtra_faixa(plano_carne):
+    plano_id, parcial_id = plano_carne
+    financeiro_service.add_lancamento_estorno(parcial_id, "chargeback", 1)
+
+    linha = _do_plano(recebiveis_service.aging(), plano_id)
+    assert linha.por_faixa["61-90"] == Decimal("100.00")
+    assert linha.total_vencido == Decimal("300.00")
+
+    # Carnê e saldo usam a mesma definição de pago
+    comp = financeiro_service.get_saldo_plano_calculado(plano_id)
+    assert comp["total_pago"] == Decimal("100.00")
+    assert comp["total_ajustado"] == Decimal("0.00")
+    assert comp["saldo_devedor"] == Decimal("400.00")
+    carne = financeiro_service.get_carne_detalhado(plano_id)
+    assert [p["status"] for p in carne[:2]] == ["Paga", "Pendente"]
+
+    acima_90 = recebiveis_service.aging(faixa_minima="90+")
+    assert all(p.plano_id != plano_id for p in acima_90.planos)
+    with pytest.raises(ValueError):
+        recebiveis_service.aging(faixa_minima="45")
+
+
+def test_rota_recebiveis(client, plano_carne):
+    client.get("/__dev/login_as/admin")
+    resp = client.get("/admin/recebiveis", query_string={"faixa": "61-90"})
+    assert resp.status_code == 200
+    assert f"#{plano_carne[0]}" in resp.get_data(as_text=True)
+    assert client.get("/admin/recebiveis?faixa=x").status_code == 400
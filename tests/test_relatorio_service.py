@@ -0,0 +1,168 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import (
+    CategoriaEnum,
+    LancamentoFinanceiro,
+    Paciente,
+    PlanoTratamento,
+    Procedimento,
+    RelatorioMesPendente,
+    RoleEnum,
+    Usuario,
+)
+from app.services import financeiro_service, relatorio_service
+
+
+@pytest.fixture
+def plano_rateado(app_ctx):
+    """Dentista exclusivo; plano 400 (orto 300 + endo 100), pago 200."""
+    dentista = Usuario(
+        username=f"rel_{uuid.uuid4().hex[:8]}",
+        password_hash="x",
+        role=RoleEnum.DENTISTA,
+    )
+    orto = Procedimento(
+        nome="Aparelho",
+        valor_padrao=Decimal("300.00"),
+        categoria=CategoriaEnum.ORTODONTIA,
+    )
+    endo = Procedimento(
+        nome="Canal",
+        valor_padrao=Decimal("100.00"),
+        categoria=CategoriaEnum.ENDODONTIA,
+    )
+    db.session.add_all([dentista, orto, endo])
+    db.session.commit()
+
+    plano = financeiro_service.create_plano(
+        paciente_id=db.session.query(Paciente).first().id,
+        dentista_id=dentista.id,
+        itens_data=[
+            {"procedimento_id": orto.id},
+            {"procedimento_id": endo.id},
+        ],
+        usuario_id=1,
+    )
+    financeiro_service.approve_plano(
+        plano_id=plano.id, desconto=0, usuario_id=1
+    )
+    financeiro_service.add_lancamento(plano.id, "200.00", "PIX", 1)
+    return dentista.id
+
+
+def test_flush_marca_mes_e_atualizacao_rateia_por_categoria(plano_rateado):
+    mes = date.today().replace(day=1)
+    assert db.session.get(RelatorioMesPendente, mes) is not None
+
+    assert relatorio_service.atualizar_relatorio() >= 1
+    assert db.session.get(RelatorioMesPendente, mes) is None
+
+    linhas = {
+        linha.categoria: linha
+        for linha in relatorio_service.consultar(dentista_id=plano_rateado)
+    }
+    orto, endo = linhas["ORTODONTIA"], linhas["ENDODONTIA"]
+    assert orto.mes == mes
+    assert orto.receita == Decimal("150.00")
+    assert orto.faturado == Decimal("300.00")
+    assert orto.em_aberto == Decimal("150.00")
+    assert orto.qtd_planos == Decimal("0.75")
+    assert endo.receita == Decimal("50.00")
+    assert endo.em_aberto == Decimal("50.00")
+
+    # Sem a dimensão categoria: 1 plano, ticket = valor do plano
+    (total,) = relatorio_service.consultar(
+        dentista_id=plano_rateado, agrupar=("dentista_id",)
+    )
+    assert total.qtd_planos == Decimal("1")
+    assert total.ticket_medio == Decimal("400.00")
+    assert total.mes is None
+
+
+def test_marca_mes_anterior_e_meses_dos_lancamentos_do_plano(plano_rateado):
+    plano = (
+        db.session.query(PlanoTratamento)
+        .filter_by(dentista_id=plano_rateado)
+        .one()
+    )
+    lanc = (
+        db.session.query(LancamentoFinanceiro)
+        .filter_by(plano_id=plano.id)
+        .one()
+    )
+    hoje = date.today().replace(day=1)
+    antigo = date(1995, 3, 1)
+
+    # Lançamento movido para outro mês: os dois meses ficam pendentes
+    relatorio_service.atualizar_relatorio()
+    lanc.data_lancamento = datetime(1995, 3, 10, 12)
+    db.session.commit()
+    assert db.session.get(RelatorioMesPendente, hoje) is not None
+    assert db.session.get(RelatorioMesPendente, antigo) is not None
+
+    # Plano alterado: meses dos seus lançamentos, não só o de criação
+    relatorio_service.atualizar_relatorio()
+    item = plano.itens[0]
+    item.descricao_dente_face = "11 V"
+    db.session.commit()
+    assert db.session.get(RelatorioMesPendente, antigo) is not None
+
+
+def test_estornos_seguem_o_saldo_do_plano(plano_rateado):
+    plano = (
+        db.session.query(PlanoTratamento)
+        .filter_by(dentista_id=plano_rateado)
+        .one()
+    )
+    pagamento = financeiro_service.add_lancamento(plano.id, "100.00", "PIX", 1)
+    ajuste = financeiro_service.add_lancamento_ajuste(
+        plano.id, "50.00", "Material extra", 1
+    )
+    financeiro_service.add_lancamento_estorno(pagamento.id, "chargeback", 1)
+    financeiro_service.add_lancamento_estorno(ajuste.id, "lançado errado", 1)
+
+    relatorio_service.atualizar_relatorio()
+    (total,) = relatorio_service.consultar(
+        dentista_id=plano_rateado, agrupar=("dentista_id",)
+    )
+    saldo = financeiro_service.get_saldo_plano_calculado(plano.id)
+    # Estorno do pagamento volta ao aberto uma vez; o do ajuste não é receita
+    assert saldo["saldo_devedor"] == Decimal("200.00")
+    assert total.em_aberto == saldo["saldo_devedor"]
+    assert total.receita == Decimal("200.00")
+
+
+def test_exportacao_csv_em_blocos(plano_rateado):
+    relatorio_service.atualizar_relatorio()
+    linhas = relatorio_service.iter_linhas(dentista_id=plano_rateado, chunk=1)
+    blocos = list(relatorio_service.exportar_csv(linhas, buffer_bytes=1))
+    assert len(blocos) >= 3
+    csv_txt = "".join(blocos)
+    assert csv_txt.startswith("mes;dentista_id;dentista;categoria;receita")
+    assert "ORTODONTIA;150,00;300,00;150,00;0,7500;400,00" in csv_txt
+
+
+def test_rotas_relatorio_e_export(client, plano_rateado):
+    client.get("/__dev/login_as/admin")
+    resp = client.post("/admin/relatorios/financeiro/atualizar")
+    assert resp.status_code == 302
+
+    resp = client.get(
+        "/admin/relatorios/financeiro",
+        query_string={"dentista_id": plano_rateado},
+    )
+    assert resp.status_code == 200
+    assert "Ortodontia" in resp.get_data(as_text=True)
+
+    resp = client.get(
+        "/admin/relatorios/financeiro/export.csv",
+        query_string={"dentista_id": plano_rateado},
+    )
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/csv"
+    assert "ENDODONTIA" in resp.get_data(as_text=True)
@@ -4,6 +4,7 @@ import pytest
 
 from app import db
 from app.models import (
+    FechamentoCaixa,
     ItemPlano,
     LancamentoFinanceiro,
     Paciente,
@@ -168,6 +169,7 @@ def test_regra_trava_de_caixa_estorno(app_ctx):
     dia = lanc_db.data_lancamento.date()
 
     # Fechar o caixa do dia (idempotente para testes): ignorar segunda chamada
+    criado = db.session.get(FechamentoCaixa, dia) is None
     try:
         financeiro_service.fechar_caixa_dia(
             data_caixa=dia,
@@ -177,12 +179,20 @@ def test_regra_trava_de_caixa_estorno(app_ctx):
     except ValueError:
         pass
 
-    with pytest.raises(ValueError):
-        financeiro_service.add_lancamento_estorno(
-            lancamento_original_id=lanc.id,
-            motivo_estorno="Teste",
-            usuario_id=1,
-        )
+    try:
+        with pytest.raises(ValueError):
+            financeiro_service.add_lancamento_estorno(
+                lancamento_original_id=lanc.id,
+                motivo_estorno="Teste",
+                usuario_id=1,
+            )
+    finally:
+        # Banco compartilhado: reabre o dia para os demais testes
+        if criado:
+            db.session.query(FechamentoCaixa).filter_by(
+                data_fechamento=dia
+            ).delete()
+            db.session.commit()
 
 
 def test_regra_soma_burra_saldo_dinamico(app_ctx):
@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from app.services import storage_service
+
+moto = pytest.importorskip("moto")
+
+
+@pytest.fixture
+def s3_app(app, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    app.config.update(
+        STORAGE_DRIVER="S3",
+        S3_BUCKET="echodent-test",
+        S3_REGION="us-east-1",
+    )
+    with moto.mock_aws(), app.app_context():
+        import boto3
+
+        boto3.client("s3", region_name="us-east-1").create_bucket(
+            Bucket="echodent-test"
+        )
+        yield app
+
+
+def test_s3_driver_singleton_e_cliente_unico(s3_app):
+    d1 = storage_service.get_storage_service()
+    d2 = storage_service.get_storage_service()
+    assert d1 is d2
+    assert d1._client() is d2._client()
+
+
+def test_s3_roundtrip_url_cache_e_delete_many(s3_app):
+    storage = storage_service.get_storage_service()
+    stored = storage.save_content_addressed(
+        io.BytesIO(b"radiografia"), prefix="media", extension=".jpg"
+    )
+    assert storage.exists(stored.relative_path)
+    assert storage.open_file(stored.relative_path).read() == b"radiografia"
+    again = storage.save_content_addressed(
+        io.BytesIO(b"radiografia"), prefix="media", extension="jpg"
+    )
+    assert again.deduplicated is True
+
+    url = storage.generate_url(stored.relative_path)
+    assert storage.generate_url(stored.relative_path) == url
+
+    keys = [f"lote/{i}.txt" for i in range(1005)]
+    for key in keys[:3] + keys[-2:]:
+        storage.save_file(io.BytesIO(b"x"), relative_path=key)
+    assert storage.delete_many(keys + [stored.relative_path]) == 1006
+    assert not storage.exists(keys[0])
+    assert not storage.exists(keys[-1])
+    assert not storage.exists(stored.relative_path)
+    # Cache de URL invalidado junto com o objeto
+    assert (stored.relative_path, 3600) not in storage._url_cache
@@ -0,0 +1,79 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from app import db
+from app.models import Paciente, Tenant
+from app.services import tenant_service
+from app.tenancy import current_schema
+
+
+def test_session_roteia_schema_sem_novo_pool(app_ctx):
+    g.tenant_schema = "tenant_outro"
+    bind = db.session.get_bind(mapper=Paciente.__mapper__)
+    assert bind.get_execution_options()["schema_translate_map"] == {
+        None: "tenant_outro"
+    }
+    # Mesmo objeto entre chamadas e mesmo pool do engine base
+    assert db.session.get_bind(mapper=Paciente.__mapper__) is bind
+    assert bind.pool is db.engine.pool
+    # O SQL sai qualificado com o schema do tenant (sem search_path)
+    with pytest.raises(ProgrammingError, match="tenant_outro.pacientes"):
+        db.session.execute(db.select(Paciente.id).limit(1))
+    db.session.rollback()
+
+
+def test_use_tenant_restaura_schema(app_ctx):
+    assert current_schema() == "tenant_default"
+    with tenant_service.use_tenant("tenant_outro"):
+        assert current_schema() == "tenant_outro"
+    assert current_schema() == "tenant_default"
+
+
+def test_header_tenant_validado(app, client):
+    app.config["MULTI_TENANT_ENABLED"] = True
+    tenant_service.invalidate_active_schemas()
+    client.get("/__dev/login_as/admin")
+    resp = client.get("/pacientes/", headers={"X-Tenant": "tenant_default"})
+    assert resp.status_code == 200
+    resp = client.get("/pacientes/", headers={"X-Tenant": "nao_existe"})
+    assert resp.status_code == 404
+
+
+@pytest.fixture
+def tenant_intruso(app, monkeypatch):
+    """Segundo tenant ativo (só o registro; o schema não é consultado)."""
+    monkeypatch.setitem(app.config, "MULTI_TENANT_ENABLED", True)
+    with app.app_context():
+        tenant = Tenant(schema_name="tenant_intruso", display_name="Intruso")
+        db.session.add(tenant)
+        db.session.commit()
+        tenant_service.invalidate_active_schemas()
+        yield tenant.schema_name
+        db.session.delete(tenant)
+        db.session.commit()
+        tenant_service.invalidate_active_schemas()
+
+
+def test_login_preso_ao_tenant(app, client, tenant_intruso):
+    """Cabeçalho de outro tenant não reaproveita a sessão do login."""
+    client.get("/__dev/login_as/admin")
+    assert client.get("/pacientes/").status_code == 200
+    resp = client.get("/pacientes/", headers={"X-Tenant": tenant_intruso})
+    assert resp.status_code == 403
+
+    # Cookie "remember me" / id sem tenant: o loader recusa
+    with app.test_request_context("/"):
+        with tenant_service.use_tenant(tenant_intruso):
+            assert tenant_service.load_login_user("tenant_default:1") is None
+            assert tenant_service.load_login_user("1") is None
+
+
+def test_sem_search_path_nas_conexoes(client, app):
+    client.get("/__dev/login_as/admin")
+    assert client.get("/pacientes/").status_code == 200
+    with app.app_context():
+        with db.engine.connect() as conn:
+            path = conn.execute(text("SHOW search_path")).scalar()
+    assert "tenant_default" not in path
@@ -0,0 +1,52 @@
+from app import db, migrate
+from app.services import tenant_migration_service as tms
+
+REV = "1bbe8ad76a77"
+
+
+def _state():
+    return {
+        "revision": REV,
+        "public": {"revision": REV, "status": tms.STATUS_DONE},
+        "tenants": {
+            "t_ok": {"status": tms.STATUS_DONE},
+            "t_falhou": {"status": tms.STATUS_FAILED},
+        },
+    }
+
+
+def test_resume_pula_concluidos():
+    todo, pulados = tms.select_tenants(
+        ["t_ok", "t_falhou", "t_novo"], _state(), REV, resume=True
+    )
+    assert todo == ["t_falhou", "t_novo"]
+    assert pulados == ["t_ok"]
+
+
+def test_retry_failed_so_reexecuta_falhas():
+    todo, pulados = tms.select_tenants(
+        ["t_ok", "t_falhou", "t_novo"], _state(), REV, retry_failed=True
+    )
+    assert todo == ["t_falhou"]
+    assert pulados == ["t_ok", "t_novo"]
+
+
+def test_outra_revisao_reexecuta_todos():
+    todo, pulados = tms.select_tenants(
+        ["t_ok", "t_falhou"], _state(), "abc123", resume=True
+    )
+    assert todo == ["t_ok", "t_falhou"]
+    assert pulados == []
+
+
+def test_passe_public_retomado_so_na_mesma_revisao():
+    assert tms.public_done(_state(), REV)
+    assert not tms.public_done(_state(), "abc123")
+    assert not tms.public_done({}, REV)
+
+
+def test_head_resolvido_para_id_concreto(app_ctx, app):
+    migrate.init_app(app, db)
+    head = tms.resolve_revision("head")
+    assert head != "head"
+    assert tms.resolve_revision(head[:6]) == head
@@ -1,7 +1,9 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 
 from app import db
-from app.models import Paciente
+from app.models import Paciente, TimelineEvento
 from app.services import paciente_service, timeline_service
 
 
@@ -28,3 +30,83 @@ def test_create_evento_updates_paciente_denormalization():
     assert p.ultima_interacao_at is not None
     # descricao_curta usa o tipo do evento
     assert p.ultima_interacao_desc == "PAGAMENTO"
+
+
+@pytest.fixture
+def paciente_com_historico(app_ctx):
+    """7 eventos; os 3 mais recentes empatam no timestamp."""
+    paciente = Paciente(nome_completo="Paciente Histórico Longo")
+    db.session.add(paciente)
+    db.session.commit()
+    base = datetime(2015, 3, 1, 12, 0, tzinfo=timezone.utc)
+    instantes = [base + timedelta(days=i) for i in range(4)] + [
+        base + timedelta(days=10)
+    ] * 3
+    for i, ts in enumerate(instantes):
+        db.session.add(
+            TimelineEvento(
+                paciente_id=paciente.id,
+                usuario_id=1,
+                evento_tipo="FINANCEIRO" if i % 2 else "CLINICO",
+                descricao=f"Evento {i}",
+                timestamp=ts,
+            )
+        )
+    db.session.commit()
+    return paciente.id
+
+
+def test_list_eventos_keyset_sem_repetir_nem_pular(paciente_com_historico):
+    esperado = [
+        e.id
+        for e in db.session.query(TimelineEvento)
+        .filter(TimelineEvento.paciente_id == paciente_com_historico)
+        .order_by(TimelineEvento.timestamp.desc(), TimelineEvento.id.desc())
+    ]
+
+    vistos, cursor, paginas = [], None, 0
+    while True:
+        pagina = timeline_service.list_eventos(
+            paciente_com_historico, before=cursor, limite=2
+        )
+        vistos += [e.id for e in pagina.eventos]
+        paginas += 1
+        cursor = pagina.proximo
+        if cursor is None:
+            break
+    assert vistos == esperado
+    assert paginas == 4
+
+    financeiro = timeline_service.list_eventos(
+        paciente_com_historico, tipos=["FINANCEIRO"]
+    )
+    assert len(financeiro.eventos) == 3 and financeiro.proximo is None
+    assert financeiro.eventos[0].usuario_nome
+    assert timeline_service.list_tipos_evento(paciente_com_historico) == [
+        "CLINICO",
+        "FINANCEIRO",
+    ]
+    with pytest.raises(ValueError):
+        timeline_service.list_eventos(paciente_com_historico, before="x")
+
+
+@pytest.mark.query_budget(8)
+def test_historico_scroll_infinito(client, paciente_com_historico):
+    client.get("/__dev/login_as/admin")
+    pid = paciente_com_historico
+    resp = client.get(f"/pacientes/{pid}/historico")
+    html = resp.get_data(as_text=True)
+    assert resp.status_code == 200
+    assert "Evento 6" in html and "historico/eventos" not in html
+
+    primeira = timeline_service.list_eventos(pid, limite=5)
+    resp = client.get(
+        f"/pacientes/{pid}/historico/eventos",
+        query_string={"before": primeira.proximo, "tipo": "CLINICO"},
+    )
+    html = resp.get_data(as_text=True)
+    assert "Evento 0" in html and "Evento 1" not in html
+    assert (
+        client.get(f"/pacientes/{pid}/historico/eventos?before=zz").status_code
+        == 400
+    )